@@ -6,8 +6,11 @@ import plotly.express as px
 import plotly.graph_objects as go
 from profiles import ContentAccount
 from database import read_log
+from profiling import profiled
 from datetime import datetime, timedelta
 
+CHART_DAYS = 30
+CHART_POINTS = 120
 
 class ContentCurator:
     def __init__(self, name: str, lastname: str, model_name: str, color: str):
@@ -33,13 +36,14 @@ class ContentCurator:
 
     def get_engagement_time_series_df(self) -> pd.DataFrame:
         """Get engagement over time as DataFrame"""
-        if not self.account.engagement_time_series:
+        series = self.account.get_engagement_time_series(days=CHART_DAYS, max_points=CHART_POINTS)
+        if not series:
             return pd.DataFrame({
                 "datetime": [datetime.now() - timedelta(days=i) for i in range(7, 0, -1)],
                 "engagement": [0] * 7
             })
         
-        df = pd.DataFrame(self.account.engagement_time_series, columns=["datetime", "engagement"])
+        df = pd.DataFrame(series, columns=["datetime", "engagement"])
         df["datetime"] = pd.to_datetime(df["datetime"])
         return df
 
@@ -300,14 +304,15 @@ class ContentCuratorView:
 
     def refresh(self):
         """Refresh all curator data"""
-        self.curator.reload()
-        return (
-            self.curator.get_performance_metrics(),
-            self.curator.get_engagement_chart(),
-            self.curator.get_platform_performance_chart(),
-            self.curator.get_content_summary_df(),
-            self.curator.get_topic_coverage_df(),
-        )
+        with profiled("refresh", self.curator.name):
+            self.curator.reload()
+            return (
+                self.curator.get_performance_metrics(),
+                self.curator.get_engagement_chart(),
+                self.curator.get_platform_performance_chart(),
+                self.curator.get_content_summary_df(),
+                self.curator.get_topic_coverage_df(),
+            )
 
 
 def create_content_ui():
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the curator hot paths
+"""
+import sys
+import time
+import random
+
+
+def timed(fn, repeat: int = 3) -> float:
+    """Return the best wall-clock time of fn over a few runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_trend_scoring(n_topics: int = 10_000, n_sources: int = 10):
+    """Per-topic Python scoring vs the vectorized topics x sources matrix"""
+    import numpy as np
+    from trends import score_trend_matrix
+
+    rng = np.random.default_rng(0)
+    sources = [f"source_{i}" for i in range(n_sources)]
+    weights = {source: random.random() for source in sources}
+    matrix = rng.integers(0, 50_000, size=(n_topics, n_sources)).astype(np.float64)
+    rows = [dict(zip(sources, row)) for row in matrix.tolist()]
+
+    def loop():
+        for source_data in rows:
+            total = sum(source_data.get(source, 0) * weight for source, weight in weights.items())
+            min(100, max(0, total / 100))
+
+    def vectorized():
+        score_trend_matrix(matrix, sources, weights, normalization={})
+
+    def vectorized_normalized():
+        normalization = {source: "log" if i % 2 else "zscore" for i, source in enumerate(sources)}
+        score_trend_matrix(matrix, sources, weights, normalization)
+
+    print(f"Trend scoring: {n_topics} topics x {n_sources} sources")
+    loop_time = timed(loop)
+    print(f"  python loop:            {loop_time * 1000:8.2f} ms")
+    vector_time = timed(vectorized)
+    print(f"  vectorized:             {vector_time * 1000:8.2f} ms  ({loop_time / vector_time:.0f}x)")
+    print(f"  vectorized + normalize: {timed(vectorized_normalized) * 1000:8.2f} ms")
+
+
+def bench_trend_memory(n_topics: int = 100_000):
+    """Memory and serialization cost of a trends snapshot: dict of TrendData vs TrendSnapshot"""
+    import json
+    import tracemalloc
+    import numpy as np
+    from trends import TrendData, TrendSnapshot
+
+    class DictTrendData:
+        """TrendData as it was before __slots__"""
+        def __init__(self, topic, score, sources, timestamp):
+            self.topic = topic
+            self.score = score
+            self.sources = sources
+            self.timestamp = timestamp
+
+        def to_dict(self):
+            return {"topic": self.topic, "score": self.score, "sources": self.sources, "timestamp": self.timestamp}
+
+    sources = ["reddit", "hackernews", "youtube", "twitter"]
+    rng = np.random.default_rng(0)
+    matrix = rng.integers(0, 50_000, size=(n_topics, len(sources))).astype(np.float64)
+    scores = rng.random(n_topics) * 100
+    topics = [f"topic {i}" for i in range(n_topics)]
+    timestamp = "2025-01-01 00:00:00"
+
+    def measure(build):
+        tracemalloc.start()
+        obj = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return obj, size
+
+    def as_dict(cls):
+        return {
+            topic: cls(topic, float(score), dict(zip(sources, row)), timestamp)
+            for topic, score, row in zip(topics, scores.tolist(), matrix.tolist())
+        }
+
+    print(f"Trend snapshot memory: {n_topics} topics x {len(sources)} sources")
+    before, before_size = measure(lambda: as_dict(DictTrendData))
+    print(f"  dict of TrendData (__dict__): {before_size / 2**20:8.1f} MiB")
+    _, slotted_size = measure(lambda: as_dict(TrendData))
+    print(f"  dict of TrendData (slots):    {slotted_size / 2**20:8.1f} MiB")
+    snapshot, snapshot_size = measure(lambda: TrendSnapshot(topics, sources, matrix, scores, [timestamp] * n_topics))
+    print(f"  TrendSnapshot:                {snapshot_size / 2**20:8.1f} MiB")
+
+    blob = snapshot.to_bytes()
+    encoded = json.dumps({k: v.to_dict() for k, v in before.items()})
+    print(f"  json.dumps(to_dict):          {timed(lambda: json.dumps({k: v.to_dict() for k, v in before.items()})) * 1000:8.1f} ms, {len(encoded) / 2**20:.1f} MiB")
+    print(f"  json.loads:                   {timed(lambda: json.loads(encoded)) * 1000:8.1f} ms")
+    print(f"  TrendSnapshot.to_bytes:       {timed(snapshot.to_bytes) * 1000:8.1f} ms, {len(blob) / 2**20:.1f} MiB")
+    print(f"  TrendSnapshot.from_bytes:     {timed(lambda: TrendSnapshot.from_bytes(blob)) * 1000:8.1f} ms")
+
+
+def bench_serialization(n_content: int = 5_000):
+    """json (indent=2, as the servers used to respond) vs the orjson serialization layer on a large account report"""
+    import json
+    from datetime import datetime
+    from profiles import ContentAccount, ContentPiece
+    from serialization import dumps, loads
+
+    account = ContentAccount(
+        name="bench",
+        credits=100,
+        strategy="Benchmark strategy " * 20,
+        content_history=[
+            ContentPiece(
+                topic=f"AI topic {i}",
+                platform=random.choice(["blog", "twitter", "linkedin", "newsletter"]),
+                content_type="article",
+                trend_score=random.random() * 100,
+                timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                strategy_rationale="Rationale for picking this topic " * 3,
+                engagement_score=random.random() * 1000,
+            )
+            for i in range(n_content)
+        ],
+        platform_stats={},
+        topic_coverage={f"AI topic {i}": 1 for i in range(n_content)},
+    )
+    data = account.model_dump()
+    encoded = json.dumps(data, indent=2)
+    compact = dumps(data)
+
+    print(f"Account report serialization: {n_content} content pieces")
+    print(f"  json.dumps(indent=2):  {timed(lambda: json.dumps(data, indent=2)) * 1000:7.2f} ms, {len(encoded) / 1024:.0f} KiB")
+    print(f"  json.dumps compact:    {timed(lambda: json.dumps(data)) * 1000:7.2f} ms")
+    print(f"  dumps (orjson):        {timed(lambda: dumps(data)) * 1000:7.2f} ms, {len(compact) / 1024:.0f} KiB")
+    print(f"  dumps(pretty=True):    {timed(lambda: dumps(data, pretty=True)) * 1000:7.2f} ms")
+    print(f"  json.loads:            {timed(lambda: json.loads(encoded)) * 1000:7.2f} ms")
+    print(f"  loads (orjson):        {timed(lambda: loads(compact)) * 1000:7.2f} ms")
+
+
+def bench_post_store(n_posts: int = 1_000_000):
+    """Publishing history and post lookup: in-memory lists vs the indexed SQLite post store"""
+    import importlib
+    import os
+    import tempfile
+    import database
+    from datetime import datetime, timedelta
+    from serialization import dumps
+
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    importlib.reload(database)  # recreate the schema in a scratch profiles.db
+    try:
+        platforms = ["twitter", "linkedin", "blog", "newsletter"]
+        start = datetime(2024, 1, 1)
+        engagement = dumps({"views": 0, "likes": 0, "shares": 0, "comments": 0})
+        by_platform = {platform: [] for platform in platforms}
+        rows = []
+        for i in range(n_posts):
+            platform = platforms[i % len(platforms)]
+            timestamp = (start + timedelta(seconds=random.randrange(365 * 86400))).strftime("%Y-%m-%d %H:%M:%S")
+            seq = len(by_platform[platform]) + 1
+            post_id = f"{platform}_{seq}_{timestamp.replace('-', '').replace(' ', '').replace(':', '')}"
+            by_platform[platform].append({"id": post_id, "platform": platform, "timestamp": timestamp})
+            rows.append((post_id, platform, seq, f"Post {i}", "post", timestamp, "published", engagement))
+
+        with database.sqlite3.connect(database.DB) as conn:
+            conn.executemany("INSERT INTO posts (id, platform, seq, content, content_type, timestamp, status, engagement) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO post_counts (platform, count) VALUES (?, ?)",
+                             [(platform, len(posts)) for platform, posts in by_platform.items()])
+            conn.commit()
+        ids = [row[0] for row in random.sample(rows, 100)]
+        del rows
+
+        def list_lookup():
+            for post_id in ids[:5]:
+                next(post for posts in by_platform.values() for post in posts if post["id"] == post_id)
+
+        def list_history():
+            all_posts = [post for posts in by_platform.values() for post in posts]
+            all_posts.sort(key=lambda x: x["timestamp"], reverse=True)
+            return all_posts[:10]
+
+        def db_lookup():
+            for post_id in ids:
+                database.read_post(post_id)
+
+        print(f"Post store: {n_posts} posts")
+        print(f"  list scan lookup:          {timed(list_lookup) / 5 * 1000:9.3f} ms/post")
+        print(f"  indexed lookup:            {timed(db_lookup) / len(ids) * 1000:9.3f} ms/post")
+        print(f"  list concat + sort, top10: {timed(list_history) * 1000:9.3f} ms")
+        print(f"  history page, all:         {timed(lambda: database.read_posts(None, 10)) * 1000:9.3f} ms")
+        print(f"  history page, platform:    {timed(lambda: database.read_posts('blog', 10)) * 1000:9.3f} ms")
+        print(f"  history page, offset 10k:  {timed(lambda: database.read_posts(None, 10, 10_000)) * 1000:9.3f} ms")
+        print(f"  total count:               {timed(database.count_posts) * 1000:9.3f} ms")
+        post = {"platform": "blog", "content": "New post", "content_type": "post",
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "status": "published", "engagement": {}}
+        print(f"  publish (insert):          {timed(lambda: database.write_post(post)) * 1000:9.3f} ms")
+    finally:
+        os.chdir(cwd)
+        importlib.reload(database)
+
+
+def bench_trends_server_concurrency(crawl_seconds: float = 2.0, probe_interval: float = 0.05):
+    """Latency of a cheap trends_server tool while another request waits on a cold trends crawl,
+    with tools run on the event loop vs offloaded to the tool thread pool"""
+    import asyncio
+    import importlib
+    import logging
+    import os
+    import tempfile
+    import numpy as np
+    import database
+    import trends
+    import server_tracing
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    import trends_server
+
+    logging.getLogger("mcp").setLevel(logging.WARNING)  # FastMCP logs every request at INFO
+
+    def slow_crawl():
+        # Stand-in for the network crawl: blocks like one, then returns a small snapshot
+        time.sleep(crawl_seconds)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        topics = trends.AI_KEYWORDS[:20]
+        values = np.ones((len(topics), 2))
+        return trends.TrendSnapshot(topics, ["reddit", "hackernews"], values, np.linspace(10, 90, len(topics)),
+                                    [stamp] * len(topics))
+
+    async def measure():
+        async with create_connected_server_and_client_session(trends_server.mcp._mcp_server) as client:
+            await client.call_tool("get_ai_keywords", {})
+            crawl = asyncio.create_task(client.call_tool("get_trending_ai_topics", {"limit": 5}))
+            start = time.perf_counter()
+            latencies = []
+            while not crawl.done():
+                call_start = time.perf_counter()
+                await client.call_tool("get_ai_keywords", {})
+                latencies.append(time.perf_counter() - call_start)
+                await asyncio.sleep(probe_interval)
+            await crawl
+            return time.perf_counter() - start, np.array(latencies) * 1000
+
+    cwd = os.getcwd()
+    fetch_all_ai_trends = trends.fetch_all_ai_trends
+    trends.fetch_all_ai_trends = slow_crawl
+    print(f"trends_server during a {crawl_seconds:.1f}s cold crawl: get_ai_keywords latency")
+    try:
+        for label, threads in (("on the event loop", 0), (f"offloaded ({server_tracing.TOOL_THREADS} threads)",
+                                                          server_tracing.TOOL_THREADS)):
+            os.chdir(tempfile.mkdtemp())
+            importlib.reload(database)  # a scratch profiles.db with no stored trends, so the first lookup crawls
+            trends.get_trends_for_date.cache_clear()
+            server_tracing.set_tool_threads(threads)
+            elapsed, latencies = asyncio.run(measure())
+            print(f"  {label:<24} {len(latencies):4d} calls  p50 {np.percentile(latencies, 50):8.1f} ms  "
+                  f"max {latencies.max():8.1f} ms  (crawl call {elapsed:.2f}s)")
+    finally:
+        trends.fetch_all_ai_trends = fetch_all_ai_trends
+        server_tracing.set_tool_threads(server_tracing.TOOL_THREADS)
+        os.chdir(cwd)
+        importlib.reload(database)
+
+
+BENCHMARKS = {
+    "trend_scoring": bench_trend_scoring,
+    "trend_memory": bench_trend_memory,
+    "serialization": bench_serialization,
+    "post_store": bench_post_store,
+    "trends_server_concurrency": bench_trends_server_concurrency,
+}
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
+        print()
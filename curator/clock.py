@@ -0,0 +1,53 @@
+"""The time as the curator sees it: the wall clock, or a virtual clock installed by a simulation.
+
+Code that stamps, windows or schedules data by time reads clock.now() / clock.time() instead of
+datetime.now() / time.time(), so simulation.py can run months of floor operation in minutes.
+The virtual clock is process-wide and only moves when advanced.
+"""
+import time as _time
+from datetime import datetime, timedelta
+
+
+class VirtualClock:
+    """A clock that stands still until advanced"""
+
+    def __init__(self, start: datetime | None = None):
+        self.current = (start or datetime.now()).replace(microsecond=0)
+        # Monotonic readings continue from the real ones, so limiters created before install don't go backwards
+        self.monotonic = _time.monotonic()
+
+    def now(self) -> datetime:
+        return self.current
+
+    def advance_to(self, when: datetime) -> None:
+        if when > self.current:
+            self.monotonic += (when - self.current).total_seconds()
+            self.current = when
+
+    def advance(self, seconds: float) -> None:
+        self.advance_to(self.current + timedelta(seconds=seconds))
+
+
+_virtual: VirtualClock | None = None
+
+
+def install(clock: VirtualClock | None) -> VirtualClock | None:
+    """Make every clock reading come from `clock` (None goes back to real time); returns the previous one"""
+    global _virtual
+    previous, _virtual = _virtual, clock
+    return previous
+
+
+def now() -> datetime:
+    """Local time, like datetime.now()"""
+    return _virtual.current if _virtual is not None else datetime.now()
+
+
+def time() -> float:
+    """Epoch seconds, like time.time()"""
+    return _virtual.current.timestamp() if _virtual is not None else _time.time()
+
+
+def monotonic() -> float:
+    """Seconds for measuring intervals, like time.monotonic()"""
+    return _virtual.monotonic if _virtual is not None else _time.monotonic()
@@ -0,0 +1,363 @@
+"""Shared HTTP runtime for the trend collectors: pooled sessions, token cache, conditional GETs,
+per-API rate limiting, retries and circuit breaking"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_MAXSIZE = 10
+RESPONSE_CACHE_SIZE = 2048
+TOKEN_EXPIRY_MARGIN = 60  # refresh tokens this many seconds before they expire
+DEFAULT_TIMEOUT = (5, 20)  # connect, read seconds
+
+MAX_ATTEMPTS = 4
+BASE_RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+MAX_RATE_WAIT = 10.0  # give up on a call rather than wait longer than this for rate budget
+
+FAILURE_THRESHOLD = 5
+RECOVERY_TIME = 300.0
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+REMAINING_HEADERS = ("x-ratelimit-remaining", "x-rate-limit-remaining")
+RESET_HEADERS = ("x-ratelimit-reset", "x-rate-limit-reset")
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# Set by set_span_hook; called with "<METHOD> <host>", returns a context manager the request runs in
+_span_hook = None
+
+
+def set_span_hook(hook) -> None:
+    """Run every request made through the pooled sessions inside hook(name), e.g. a tracing span; None removes it"""
+    global _span_hook
+    _span_hook = hook
+
+
+class PooledSession(requests.Session):
+    """Keep-alive session for one host whose requests go through the span hook when one is set"""
+
+    def request(self, method, url, *args, **kwargs):
+        if _span_hook is None:
+            return super().request(method, url, *args, **kwargs)
+        with _span_hook(f"{method} {urlsplit(url).netloc}"):
+            return super().request(method, url, *args, **kwargs)
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the keep-alive session for the url's host, creating it on first use"""
+    host = urlsplit(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = PooledSession()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+class TokenCache:
+    """Caches access tokens until shortly before their expires_in runs out"""
+
+    def __init__(self, margin: float = TOKEN_EXPIRY_MARGIN):
+        self.margin = margin
+        self._tokens: dict[str, tuple[str, float]] = {}
+        self._fetch_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key: str) -> str | None:
+        with self._lock:
+            cached = self._tokens.get(key)
+            return cached[0] if cached and cached[1] > time.monotonic() else None
+
+    def get(self, key: str, fetch) -> str:
+        """Return a cached token, or call fetch() -> (token, expires_in) to get a fresh one.
+
+        Only one fetch per key runs at a time, and it doesn't hold up callers of other keys.
+        """
+        token = self._cached(key)
+        if token is not None:
+            return token
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            # Another caller may have fetched the token while this one waited
+            token = self._cached(key)
+            if token is not None:
+                return token
+            token, expires_in = fetch()
+            with self._lock:
+                self._tokens[key] = (token, time.monotonic() + max(0.0, float(expires_in) - self.margin))
+            return token
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._tokens.pop(key, None)
+
+
+class ResponseCache:
+    """LRU cache of JSON payloads with the validators needed for conditional requests"""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: dict | None) -> tuple:
+        return (url, tuple(sorted((params or {}).items())))
+
+    def get(self, key: tuple) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, etag: str | None, last_modified: str | None, data) -> None:
+        with self._lock:
+            self._entries[key] = {"etag": etag, "last_modified": last_modified, "data": data}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class RateLimitExceeded(Exception):
+    """The API has no request budget left within the allowed wait"""
+
+
+class CircuitOpenError(Exception):
+    """The API has failed repeatedly and is not being called until it recovers"""
+
+
+class RetryableStatusError(requests.HTTPError):
+    """A throttled or server-error response worth retrying"""
+
+
+def _header_float(headers, names) -> float | None:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+def retry_after_seconds(headers) -> float | None:
+    """Seconds to wait according to Retry-After or a rate-limit reset header"""
+    retry_after = _header_float(headers, ("retry-after",))
+    if retry_after is not None:
+        return retry_after
+    reset = _header_float(headers, RESET_HEADERS)
+    if reset is None:
+        return None
+    # Some APIs send seconds until reset, others an epoch timestamp
+    return max(0.0, reset - time.time()) if reset > 1e9 else reset
+
+
+class TokenBucket:
+    """Token-bucket limiter whose rate adapts to the rate-limit headers the API returns"""
+
+    def __init__(self, rate: float, capacity: float, monotonic=time.monotonic):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.monotonic = monotonic
+        self.updated = monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, max_wait: float = MAX_RATE_WAIT) -> None:
+        """Take one token, sleeping if one becomes available within max_wait"""
+        with self._lock:
+            now = self.monotonic()
+            self._refill(now)
+            wait = max(0.0, self.blocked_until - now, (1 - self.tokens) / self.rate if self.rate > 0 else 0.0)
+            if self.tokens < 1 and self.rate <= 0 or wait > max_wait:
+                raise RateLimitExceeded(f"no request budget for {wait:.0f}s")
+            self.tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+
+    def available(self) -> int:
+        """Whole tokens that can be taken right now without waiting"""
+        with self._lock:
+            now = self.monotonic()
+            self._refill(now)
+            return int(self.tokens) if now >= self.blocked_until else 0
+
+    def update_from_headers(self, headers) -> None:
+        """Clamp the budget to what the server says is left until its window resets"""
+        remaining = _header_float(headers, REMAINING_HEADERS)
+        reset_in = retry_after_seconds(headers)
+        with self._lock:
+            now = self.monotonic()
+            self._refill(now)
+            if remaining is not None:
+                self.tokens = min(self.tokens, remaining)
+                if reset_in:
+                    self.rate = min(self.max_rate, remaining / reset_in) or self.max_rate
+            if reset_in and (remaining is not None and remaining < 1 or headers.get("retry-after")):
+                self.blocked_until = max(self.blocked_until, now + reset_in)
+
+
+class CircuitBreaker:
+    """Stops calling an API after repeated failures, then lets a trial call through"""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, recovery_time: float = RECOVERY_TIME):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: let one call probe the API, and re-open if it fails
+            if time.monotonic() - self.opened_at >= self.recovery_time:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Exponential backoff with full jitter, never shorter than the server's Retry-After"""
+    delay = random.uniform(0, min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class ApiRuntime:
+    """Rate limiter, retry scheduler and circuit breaker for one external API"""
+
+    def __init__(self, name: str, rate: float, capacity: float):
+        self.name = name
+        self.bucket = TokenBucket(rate, capacity)
+        self.breaker = CircuitBreaker()
+
+    def call(self, fn, *args, retry_on=(requests.ConnectionError, requests.Timeout, RetryableStatusError), **kwargs):
+        """Call fn under the API's rate limit, retrying retryable errors with backoff.
+
+        The circuit breaker counts calls, not attempts: one failure when a call runs out of retries.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        for attempt in range(MAX_ATTEMPTS):
+            self.bucket.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except retry_on as e:
+                response = getattr(e, "response", None)
+                headers = response.headers if response is not None else {}
+                self.bucket.update_from_headers(headers)
+                if attempt == MAX_ATTEMPTS - 1:
+                    self.breaker.record_failure()
+                    raise
+                delay = backoff_delay(attempt, retry_after_seconds(headers))
+                if delay > MAX_RETRY_DELAY:
+                    self.breaker.record_failure()
+                    raise RateLimitExceeded(f"{self.name} asked to wait {delay:.0f}s") from e
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the pooled session with a timeout, raising on retryable statuses"""
+        def attempt():
+            response = get_session(url).get(url, timeout=DEFAULT_TIMEOUT, **kwargs)
+            self.bucket.update_from_headers(response.headers)
+            if response.status_code in RETRYABLE_STATUS:
+                raise RetryableStatusError(f"{response.status_code} from {url}", response=response)
+            return response
+        return self.call(attempt)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST through the pooled session with a timeout, raising on retryable statuses"""
+        def attempt():
+            response = get_session(url).post(url, timeout=DEFAULT_TIMEOUT, **kwargs)
+            self.bucket.update_from_headers(response.headers)
+            if response.status_code in RETRYABLE_STATUS:
+                raise RetryableStatusError(f"{response.status_code} from {url}", response=response)
+            return response
+        return self.call(attempt)
+
+
+_apis: dict[str, ApiRuntime] = {}
+
+
+def configure_api(name: str, rate: float, capacity: float) -> ApiRuntime:
+    """Register the rate limit (requests/second and burst size) for an API"""
+    _apis[name] = ApiRuntime(name, rate, capacity)
+    return _apis[name]
+
+
+def get_api(name: str) -> ApiRuntime:
+    if name not in _apis:
+        configure_api(name, rate=10, capacity=10)
+    return _apis[name]
+
+
+token_cache = TokenCache()
+response_cache = ResponseCache()
+
+
+def fetch_json(url: str, params: dict | None = None, headers: dict | None = None, api: str = "default"):
+    """GET a JSON resource under an API's rate limit, revalidating any cached copy.
+
+    Returns the parsed payload for 200 and 304 responses and None for any other status.
+    """
+    key = ResponseCache.key(url, params)
+    cached = response_cache.get(key)
+    headers = dict(headers or {})
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = get_api(api).get(url, params=params, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached["data"]
+    if response.status_code != 200:
+        return None
+
+    data = response.json()
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        response_cache.put(key, etag, last_modified, data)
+    return data
+
+
+def post_json(url: str, api: str = "default", **kwargs):
+    """POST under an API's rate limit, retries and circuit breaker and return the parsed JSON response"""
+    response = get_api(api).post(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
@@ -2,30 +2,42 @@
 """MCP Server for Content Publishing and Social Media Management"""
 
 from mcp.server.fastmcp import FastMCP
-import json
-from datetime import datetime
+from server_tracing import traced_tool, instrument_server
+from tool_metrics import add_metrics_tool, MetricsExporter
+from profiling import add_profiling_tools
+from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from serialization import dumps, loads
+from database import (
+    write_post, read_post, read_posts, count_posts, read_scheduled_posts, read_post_poll, read_post_metrics
+)
+from scheduler import PublishScheduler, schedule_metrics
+from engagement_poller import EngagementPoller, track_post, engagement_value, PLATFORM_METRICS_URL
+import clock
 from dotenv import load_dotenv
 import os
+import sys
 
 load_dotenv(override=True)
 
 # Create the MCP server
 mcp = FastMCP("Content Publishing Server")
+add_metrics_tool(mcp)
+add_profiling_tools(mcp)
 
 # Mock social media APIs
 class MockSocialMediaAPI:
     def __init__(self, platform: str):
         self.platform = platform
-        self.posts = []
     
-    def post_content(self, content: str, content_type: str = "text") -> dict:
-        post_id = f"{self.platform}_{len(self.posts) + 1}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    def post_content(self, content: str, content_type: str = "text", scheduled: dict | None = None,
+                     account: str = "") -> dict | None:
         post = {
-            "id": post_id,
             "platform": self.platform,
             "content": content,
             "content_type": content_type,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": clock.now().strftime("%Y-%m-%d %H:%M:%S"),
             "status": "published",
             "engagement": {
                 "views": 0,
@@ -34,9 +46,17 @@ class MockSocialMediaAPI:
                 "comments": 0
             }
         }
-        self.posts.append(post)
+        post = write_post(post, scheduled)
+        if post:
+            track_post(post, account)
         return post
 
+    def get_posts(self, limit: int = 10, offset: int = 0) -> list[dict]:
+        return read_posts(self.platform, limit, offset)
+
+    def count_posts(self) -> int:
+        return count_posts(self.platform)
+
 # Initialize mock APIs
 twitter_api = MockSocialMediaAPI("twitter")
 linkedin_api = MockSocialMediaAPI("linkedin")
@@ -50,91 +70,203 @@ platform_apis = {
     "newsletter": newsletter_api
 }
 
-@mcp.tool()
-def publish_to_twitter(content: str, content_type: str = "post") -> str:
-    """Publish content to Twitter"""
+def publish_scheduled(entry: dict) -> dict | None:
+    """Publish a claimed queue entry through its platform API"""
+    return platform_apis[entry["platform"]].post_content(entry["content"], entry["content_type"], entry,
+                                                         account=entry["account"])
+
+scheduler = PublishScheduler(publish_scheduled)
+poller = EngagementPoller()
+
+# Most items publish_batch publishes at once
+PUBLISH_BATCH_THREADS = 4
+
+# Maximum content length per platform (platforms not listed have no strict limit)
+PLATFORM_LIMITS = {
+    "twitter": 280,
+    "linkedin": 3000
+}
+
+PLATFORM_NAMES = {
+    "twitter": "Twitter",
+    "linkedin": "LinkedIn",
+    "blog": "blog",
+    "newsletter": "newsletter"
+}
+
+def check_content_length(platform: str, content: str) -> dict | None:
+    """Return an error payload if content is too long for the platform"""
+    max_length = PLATFORM_LIMITS.get(platform)
+    if max_length is not None and len(content) > max_length:
+        return {
+            "error": f"Content too long for {PLATFORM_NAMES[platform]}",
+            "max_length": max_length,
+            "current_length": len(content)
+        }
+    return None
+
+def post_to_twitter(content: str, content_type: str = "post", account: str = "") -> dict:
+    """Publish a tweet and return the result payload"""
+    # Validate content length for Twitter
+    error = check_content_length("twitter", content)
+    if error:
+        return error
+
+    result = twitter_api.post_content(content, content_type, account=account)
+    return {
+        "success": True,
+        "platform": "twitter",
+        "post_id": result["id"],
+        "published_at": result["timestamp"],
+        "content_preview": content[:50] + "..." if len(content) > 50 else content
+    }
+
+def post_to_linkedin(content: str, content_type: str = "post", account: str = "") -> dict:
+    """Publish a LinkedIn post and return the result payload"""
+    # Validate content length for LinkedIn
+    error = check_content_length("linkedin", content)
+    if error:
+        return error
+
+    result = linkedin_api.post_content(content, content_type, account=account)
+    return {
+        "success": True,
+        "platform": "linkedin",
+        "post_id": result["id"],
+        "published_at": result["timestamp"],
+        "content_preview": content[:100] + "..." if len(content) > 100 else content
+    }
+
+def post_to_blog(title: str, content: str, content_type: str = "article", account: str = "") -> dict:
+    """Publish a blog post and return the result payload"""
+    full_content = f"# {title}\n\n{content}"
+    result = blog_api.post_content(full_content, content_type, account=account)
+    return {
+        "success": True,
+        "platform": "blog",
+        "post_id": result["id"],
+        "published_at": result["timestamp"],
+        "title": title,
+        "content_length": len(content),
+        "url": f"https://example-blog.com/posts/{result['id']}"
+    }
+
+def post_to_newsletter(subject: str, content: str, content_type: str = "newsletter", account: str = "") -> dict:
+    """Publish a newsletter issue and return the result payload"""
+    full_content = f"Subject: {subject}\n\n{content}"
+    result = newsletter_api.post_content(full_content, content_type, account=account)
+    return {
+        "success": True,
+        "platform": "newsletter",
+        "post_id": result["id"],
+        "published_at": result["timestamp"],
+        "subject": subject,
+        "content_length": len(content),
+        "estimated_read_time": max(1, len(content.split()) // 200)  # 200 words per minute
+    }
+
+@traced_tool(mcp)
+def publish_to_twitter(content: str, content_type: str = "post", account: str = "") -> str:
+    """Publish content to Twitter; pass your account name to have its engagement tracked"""
     try:
-        # Validate content length for Twitter
-        if len(content) > 280:
-            return json.dumps({
-                "error": "Content too long for Twitter",
-                "max_length": 280,
-                "current_length": len(content)
-            })
-        
-        result = twitter_api.post_content(content, content_type)
-        return json.dumps({
-            "success": True,
-            "platform": "twitter",
-            "post_id": result["id"],
-            "published_at": result["timestamp"],
-            "content_preview": content[:50] + "..." if len(content) > 50 else content
-        }, indent=2)
+        return dumps(post_to_twitter(content, content_type, account))
     except Exception as e:
-        return json.dumps({"error": f"Failed to publish to Twitter: {e}"})
+        return dumps({"error": f"Failed to publish to Twitter: {e}"})
 
-@mcp.tool()
-def publish_to_linkedin(content: str, content_type: str = "post") -> str:
-    """Publish content to LinkedIn"""
+@traced_tool(mcp)
+def publish_to_linkedin(content: str, content_type: str = "post", account: str = "") -> str:
+    """Publish content to LinkedIn; pass your account name to have its engagement tracked"""
     try:
-        # Validate content length for LinkedIn
-        if len(content) > 3000:
-            return json.dumps({
-                "error": "Content too long for LinkedIn",
-                "max_length": 3000,
-                "current_length": len(content)
-            })
-        
-        result = linkedin_api.post_content(content, content_type)
-        return json.dumps({
-            "success": True,
-            "platform": "linkedin",
-            "post_id": result["id"],
-            "published_at": result["timestamp"],
-            "content_preview": content[:100] + "..." if len(content) > 100 else content
-        }, indent=2)
+        return dumps(post_to_linkedin(content, content_type, account))
     except Exception as e:
-        return json.dumps({"error": f"Failed to publish to LinkedIn: {e}"})
+        return dumps({"error": f"Failed to publish to LinkedIn: {e}"})
 
-@mcp.tool()
-def publish_to_blog(title: str, content: str, content_type: str = "article") -> str:
-    """Publish content to blog"""
+@traced_tool(mcp)
+def publish_to_blog(title: str, content: str, content_type: str = "article", account: str = "") -> str:
+    """Publish content to blog; pass your account name to have its engagement tracked"""
     try:
-        full_content = f"# {title}\n\n{content}"
-        result = blog_api.post_content(full_content, content_type)
-        
-        return json.dumps({
-            "success": True,
-            "platform": "blog",
-            "post_id": result["id"],
-            "published_at": result["timestamp"],
-            "title": title,
-            "content_length": len(content),
-            "url": f"https://example-blog.com/posts/{result['id']}"
-        }, indent=2)
+        return dumps(post_to_blog(title, content, content_type, account))
     except Exception as e:
-        return json.dumps({"error": f"Failed to publish to blog: {e}"})
+        return dumps({"error": f"Failed to publish to blog: {e}"})
+
+@traced_tool(mcp)
+def publish_to_newsletter(subject: str, content: str, content_type: str = "newsletter", account: str = "") -> str:
+    """Publish content to newsletter; pass your account name to have its engagement tracked"""
+    try:
+        return dumps(post_to_newsletter(subject, content, content_type, account))
+    except Exception as e:
+        return dumps({"error": f"Failed to publish to newsletter: {e}"})
+
+class PublishItem(BaseModel):
+    platform: str
+    content: str
+    title: str = ""          # required for blog
+    subject: str = ""        # required for newsletter
+    content_type: str = ""   # defaults to the platform's usual type
+    account: str = ""        # account whose engagement the post counts towards
+
+def validate_publish_item(item: PublishItem) -> str | None:
+    """Return why an item can't be published, or None if it can"""
+    platform = item.platform.lower()
+    if platform not in platform_apis:
+        return f"Unknown platform: {item.platform}"
+    if not item.content.strip():
+        return "Content is empty"
+    if platform == "blog" and not item.title.strip():
+        return "Blog posts need a title"
+    if platform == "newsletter" and not item.subject.strip():
+        return "Newsletters need a subject"
+    error = check_content_length(platform, item.content)
+    return f"{error['error']} ({error['current_length']} > {error['max_length']} characters)" if error else None
 
-@mcp.tool()
-def publish_to_newsletter(subject: str, content: str, content_type: str = "newsletter") -> str:
-    """Publish content to newsletter"""
+def publish_item(item: PublishItem) -> dict:
+    """Publish a validated item the way its single-platform tool does"""
+    platform = item.platform.lower()
     try:
-        full_content = f"Subject: {subject}\n\n{content}"
-        result = newsletter_api.post_content(full_content, content_type)
+        if platform == "twitter":
+            return post_to_twitter(item.content, item.content_type or "post", item.account)
+        if platform == "linkedin":
+            return post_to_linkedin(item.content, item.content_type or "post", item.account)
+        if platform == "blog":
+            return post_to_blog(item.title, item.content, item.content_type or "article", item.account)
+        return post_to_newsletter(item.subject, item.content, item.content_type or "newsletter", item.account)
+    except Exception as e:
+        return {"error": f"Failed to publish to {PLATFORM_NAMES[platform]}: {e}"}
+
+@traced_tool(mcp)
+def publish_batch(items: list[PublishItem]) -> str:
+    """Publish to several platforms in one call. Each item has a platform and content, plus a title for
+    blog posts and a subject for newsletters. All items are validated first; if any is invalid nothing is
+    published. Valid batches are published concurrently and results are returned in item order."""
+    try:
+        invalid = [
+            {"index": i, "platform": item.platform, "error": error}
+            for i, item in enumerate(items)
+            if (error := validate_publish_item(item))
+        ]
+        if invalid:
+            return dumps({
+                "success": False,
+                "error": "Validation failed; nothing was published",
+                "invalid_items": invalid
+            })
         
-        return json.dumps({
-            "success": True,
-            "platform": "newsletter",
-            "post_id": result["id"],
-            "published_at": result["timestamp"],
-            "subject": subject,
-            "content_length": len(content),
-            "estimated_read_time": max(1, len(content.split()) // 200)  # 200 words per minute
-        }, indent=2)
+        with ThreadPoolExecutor(max_workers=max(1, min(PUBLISH_BATCH_THREADS, len(items)))) as executor:
+            # Each item runs in a copy of this call's context, so its work is traced under the batch's span
+            futures = [executor.submit(contextvars.copy_context().run, publish_item, item) for item in items]
+            results = [future.result() for future in futures]
+        
+        failed = sum(1 for result in results if "error" in result)
+        return dumps({
+            "success": failed == 0,
+            "published": len(results) - failed,
+            "failed": failed,
+            "results": [{"index": i, **result} for i, result in enumerate(results)]
+        })
     except Exception as e:
-        return json.dumps({"error": f"Failed to publish to newsletter: {e}"})
+        return dumps({"error": f"Failed to publish batch: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp)
 def get_platform_guidelines(platform: str) -> str:
     """Get content guidelines and best practices for a platform"""
     guidelines = {
@@ -190,100 +322,113 @@ def get_platform_guidelines(platform: str) -> str:
     
     platform_guide = guidelines.get(platform.lower())
     if not platform_guide:
-        return json.dumps({"error": f"No guidelines available for platform: {platform}"})
+        return dumps({"error": f"No guidelines available for platform: {platform}"})
     
-    return json.dumps({
+    return dumps({
         "platform": platform,
         "guidelines": platform_guide
-    }, indent=2)
+    })
 
-@mcp.tool()
-def get_publishing_history(platform: str = "all", limit: int = 10) -> str:
-    """Get publishing history for a platform or all platforms"""
+@traced_tool(mcp)
+def get_publishing_history(platform: str = "all", limit: int = 10, offset: int = 0) -> str:
+    """Get publishing history for a platform or all platforms, most recent first, a page at a time"""
     try:
-        all_posts = []
-        
         if platform.lower() == "all":
-            for api in platform_apis.values():
-                all_posts.extend(api.posts)
+            total_posts = count_posts()
+            recent_posts = read_posts(None, limit, offset)
         elif platform.lower() in platform_apis:
-            all_posts = platform_apis[platform.lower()].posts
+            api = platform_apis[platform.lower()]
+            total_posts = api.count_posts()
+            recent_posts = api.get_posts(limit, offset)
         else:
-            return json.dumps({"error": f"Unknown platform: {platform}"})
-        
-        # Sort by timestamp (most recent first)
-        all_posts.sort(key=lambda x: x["timestamp"], reverse=True)
+            return dumps({"error": f"Unknown platform: {platform}"})
         
-        # Limit results
-        recent_posts = all_posts[:limit]
-        
-        return json.dumps({
-            "total_posts": len(all_posts),
+        return dumps({
+            "total_posts": total_posts,
             "returned_posts": len(recent_posts),
+            "offset": offset,
+            "has_more": offset + len(recent_posts) < total_posts,
             "posts": recent_posts
-        }, indent=2)
+        })
     except Exception as e:
-        return json.dumps({"error": f"Failed to get publishing history: {e}"})
+        return dumps({"error": f"Failed to get publishing history: {e}"})
 
-@mcp.tool()
-def schedule_content(platform: str, content: str, scheduled_time: str, content_type: str = "post") -> str:
-    """Schedule content for future publishing"""
+@traced_tool(mcp)
+def schedule_content(platform: str, content: str, scheduled_time: str, content_type: str = "post",
+                     idempotency_key: str = "", account: str = "") -> str:
+    """Schedule content for future publishing; pass your account name to have its engagement tracked.
+    Scheduling the same content for the same time (or reusing an idempotency_key) returns the existing
+    entry instead of queueing a duplicate."""
     try:
-        # In a real implementation, this would integrate with scheduling services
-        scheduled_post = {
-            "id": f"scheduled_{platform}_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            "platform": platform,
-            "content": content,
-            "content_type": content_type,
-            "scheduled_for": scheduled_time,
-            "status": "scheduled",
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        if platform.lower() not in platform_apis:
+            return dumps({"error": f"Unknown platform: {platform}"})
+        error = check_content_length(platform.lower(), content)
+        if error:
+            return dumps(error)
+        
+        scheduled_post, created = scheduler.schedule(
+            platform.lower(), content, content_type, scheduled_time, idempotency_key or None, account
+        )
         
-        return json.dumps({
+        return dumps({
             "success": True,
-            "message": "Content scheduled successfully",
+            "message": "Content scheduled successfully" if created else "Content was already scheduled",
+            "duplicate": not created,
             "schedule_details": scheduled_post
-        }, indent=2)
+        })
+    except ValueError as e:
+        return dumps({"error": f"Invalid scheduled_time {scheduled_time!r}: {e}"})
+    except Exception as e:
+        return dumps({"error": f"Failed to schedule content: {e}"})
+
+@traced_tool(mcp)
+def get_scheduled_content(status: str = "pending", limit: int = 20) -> str:
+    """List scheduled posts in publish order; status is pending, publishing, published, failed or all"""
+    try:
+        entries = read_scheduled_posts(None if status == "all" else status, limit)
+        return dumps({"count": len(entries), "scheduled_posts": entries})
+    except Exception as e:
+        return dumps({"error": f"Failed to get scheduled content: {e}"})
+
+@traced_tool(mcp)
+def get_schedule_metrics() -> str:
+    """Get publishing queue depth and schedule lag"""
+    try:
+        return dumps(schedule_metrics())
     except Exception as e:
-        return json.dumps({"error": f"Failed to schedule content: {e}"})
+        return dumps({"error": f"Failed to get schedule metrics: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp)
 def get_content_performance(post_id: str) -> str:
-    """Get performance metrics for published content"""
+    """Get performance metrics for published content, as last polled from the platform"""
     try:
-        # Search for the post across all platforms
-        for platform, api in platform_apis.items():
-            for post in api.posts:
-                if post["id"] == post_id:
-                    # Mock engagement data (in real implementation, fetch from APIs)
-                    import random
-                    post["engagement"] = {
-                        "views": random.randint(50, 5000),
-                        "likes": random.randint(5, 500),
-                        "shares": random.randint(1, 100),
-                        "comments": random.randint(0, 50)
-                    }
-                    
-                    return json.dumps({
-                        "post_id": post_id,
-                        "platform": platform,
-                        "published_at": post["timestamp"],
-                        "engagement": post["engagement"],
-                        "content_preview": post["content"][:100] + "..."
-                    }, indent=2)
+        post = read_post(post_id)
+        if not post:
+            return dumps({"error": f"Post not found: {post_id}"})
         
-        return json.dumps({"error": f"Post not found: {post_id}"})
+        poll = read_post_poll(post_id) or {}
+        return dumps({
+            "post_id": post_id,
+            "platform": post["platform"],
+            "published_at": post["timestamp"],
+            "engagement": post["engagement"],
+            "engagement_score": engagement_value(post["engagement"]),
+            "polls": poll.get("polls", 0),
+            "last_polled_at": poll.get("last_polled_at"),
+            "next_poll_at": poll.get("next_poll_at"),
+            "history": read_post_metrics(post_id, last_n=10),
+            "content_preview": post["content"][:100] + "..."
+        })
     except Exception as e:
-        return json.dumps({"error": f"Failed to get content performance: {e}"})
+        return dumps({"error": f"Failed to get content performance: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp)
 def optimize_content_for_platform(content: str, source_platform: str, target_platform: str) -> str:
     """Optimize content for a different platform"""
     try:
         # Get platform guidelines
         guidelines = get_platform_guidelines(target_platform)
-        target_info = json.loads(guidelines)["guidelines"]
+        target_info = loads(guidelines)["guidelines"]
         
         # Basic optimization logic
         optimized_content = content
@@ -303,7 +448,7 @@ def optimize_content_for_platform(content: str, source_platform: str, target_pla
         elif target_platform.lower() == "blog":
             optimization_notes.append("Consider adding headings, images, and expanding with more details")
             
-        return json.dumps({
+        return dumps({
             "source_platform": source_platform,
             "target_platform": target_platform,
             "original_length": len(content),
@@ -311,9 +456,16 @@ def optimize_content_for_platform(content: str, source_platform: str, target_pla
             "optimized_length": len(optimized_content),
             "optimization_notes": optimization_notes,
             "platform_guidelines": target_info
-        }, indent=2)
+        })
     except Exception as e:
-        return json.dumps({"error": f"Failed to optimize content: {e}"})
+        return dumps({"error": f"Failed to optimize content: {e}"})
 
 if __name__ == "__main__":
+    instrument_server()
+    MetricsExporter(mcp.name).start()
+    scheduler.start()
+    if PLATFORM_METRICS_URL:
+        poller.start()
+    else:
+        print("PLATFORM_METRICS_URL is not set; engagement polling is off", file=sys.stderr)
     mcp.run(transport='stdio')
\ No newline at end of file
@@ -1,12 +1,13 @@
 from contextlib import AsyncExitStack
 from profiles_client import read_content_account, read_content_strategy
-from tracers import make_trace_id
-from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace
+from tracers import make_trace_id, TracedMCPServerStdio
+from profiling import profiled
+from memory_tracking import track_cycle
+from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace, custom_span
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import os
-import json
-from agents.mcp import MCPServerStdio
+from serialization import dumps, loads
 from curator_templates import (
     researcher_instructions,
     curator_instructions,
@@ -26,6 +27,8 @@ groq_api_key = os.getenv("GROQ_API_KEY")
 # Base URLs
 GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
 GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+# Send every model to one OpenAI-compatible endpoint instead, e.g. the llm_replay stub
+LLM_BASE_URL = os.getenv("LLM_BASE_URL")
 
 MAX_TURNS = 30
 
@@ -35,10 +38,13 @@ print("GROQ_API_KEY:", "SET" if groq_api_key else "NOT SET")
 
 gemini_client = AsyncOpenAI(base_url=GEMINI_BASE_URL, api_key=google_api_key)
 groq_client = AsyncOpenAI(base_url=GROQ_BASE_URL, api_key=groq_api_key)
+llm_client = AsyncOpenAI(base_url=LLM_BASE_URL, api_key=os.getenv("LLM_API_KEY", "replay")) if LLM_BASE_URL else None
 
 def get_model(model_name: str):
     print(f"[DEBUG] get_model called with: {model_name}")
 
+    if LLM_BASE_URL:
+        return OpenAIChatCompletionsModel(model=model_name, openai_client=llm_client)
     if "groq" in model_name:
         return OpenAIChatCompletionsModel(model=model_name, openai_client=groq_client)
     elif "gemini" in model_name:
@@ -87,9 +93,9 @@ class ContentCurator:
 
     async def get_content_account_report(self) -> str:
         account = await read_content_account(self.name)
-        account_json = json.loads(account)
+        account_json = loads(account)
         account_json.pop("engagement_time_series", None)
-        return json.dumps(account_json, indent=2)
+        return dumps(account_json)
 
     async def run_content_creation(self, curator_mcp_servers, researcher_mcp_servers):
         self.agent = await self.create_agent(curator_mcp_servers, researcher_mcp_servers)
@@ -131,19 +137,21 @@ class ContentCurator:
 
     async def run_with_mcp_servers(self):
         async with AsyncExitStack() as stack:
-            curator_mcp_servers = [
-                await stack.enter_async_context(
-                    MCPServerStdio(params, client_session_timeout_seconds=120)
-                )
-                for params in curator_mcp_server_params
-            ]
-            async with AsyncExitStack() as stack:
-                researcher_mcp_servers = [
+            with custom_span("mcp_startup", data={"servers": "curator"}):
+                curator_mcp_servers = [
                     await stack.enter_async_context(
-                        MCPServerStdio(params, client_session_timeout_seconds=120)
+                        TracedMCPServerStdio(params, client_session_timeout_seconds=120)
                     )
-                    for params in researcher_mcp_server_params(self.name)
+                    for params in curator_mcp_server_params
                 ]
+            async with AsyncExitStack() as stack:
+                with custom_span("mcp_startup", data={"servers": "researcher"}):
+                    researcher_mcp_servers = [
+                        await stack.enter_async_context(
+                            TracedMCPServerStdio(params, client_session_timeout_seconds=120)
+                        )
+                        for params in researcher_mcp_server_params(self.name)
+                    ]
                 await self.run_agent(curator_mcp_servers, researcher_mcp_servers)
 
     async def run_with_trace(self):
@@ -154,9 +162,11 @@ class ContentCurator:
 
     async def run(self):
         try:
-            await self.run_with_trace()
+            with profiled("curator", f"{self.name}-{self.mode}"):
+                await self.run_with_trace()
         except Exception as e:
             print(f"Error running content curator {self.name}: {e}")
+        track_cycle(f"{self.name}-{self.mode}")
 
         mode_cycle = ["content_creation", "review", "research_only", "analytics"]
         current_index = mode_cycle.index(self.mode) if self.mode in mode_cycle else 0
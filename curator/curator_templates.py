@@ -1,4 +1,4 @@
-from datetime import datetime
+import clock
 from trends import AI_KEYWORDS
 
 def researcher_instructions():
@@ -34,7 +34,7 @@ Use your knowledge graph tools to store and recall information about:
 If there isn't a specific request, search for the most trending AI topics of the day
 and provide content opportunities ranked by potential impact.
 
-Current datetime: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Current datetime: {clock.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
 
 def research_tool():
@@ -58,7 +58,8 @@ Your workflow:
 1. Research trending AI topics using your research tool
 2. Evaluate content opportunities based on trend scores and your strategy
 3. Make decisions: CREATE content, SKIP topics, or PROMOTE existing content
-4. Execute content creation across appropriate platforms (blog, Twitter, LinkedIn, newsletter)
+4. Execute content creation across appropriate platforms (blog, Twitter, LinkedIn, newsletter);
+   use publish_batch to publish to several platforms in a single call
 5. Track performance and refine your approach
 
 Content platforms and formats:
@@ -76,7 +77,7 @@ Use your entity knowledge graph to:
 Your account name is {name}. After creating content, send an email 
 with a brief summary, then provide a 2-3 sentence assessment of your content strategy performance.
 
-Current datetime: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Current datetime: {clock.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
 
 def content_creation_message(name: str, strategy: str, account: str):
@@ -101,7 +102,7 @@ Your content strategy:
 Your current account status:
 {account}
 
-Current datetime: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Current datetime: {clock.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 Now research trending topics, evaluate opportunities, and create compelling AI content.
 Your account name is {name}.
@@ -141,7 +142,7 @@ Your current content strategy:
 Your account performance:
 {account}
 
-Current datetime: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Current datetime: {clock.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 Analyze your content performance, research current trends, and optimize your approach.
 Your account name is {name}.
@@ -171,7 +172,7 @@ For each trending topic you identify:
 Your content strategy for reference:
 {strategy}
 
-Current datetime: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Current datetime: {clock.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 After researching, provide a prioritized list of content opportunities 
 with specific recommendations for each topic.
@@ -198,5 +199,5 @@ Based on this analysis:
 
 Provide actionable insights to improve your content strategy going forward.
 
-Current datetime: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+Current datetime: {clock.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
\ No newline at end of file
@@ -1,6 +1,7 @@
 import sqlite3
-import json
-from datetime import datetime
+from serialization import dumps, loads
+from datetime import datetime, timedelta
+import clock
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -26,15 +27,215 @@ with sqlite3.connect(DB) as conn:
     
     # Trends table (replaces market)
     cursor.execute('CREATE TABLE IF NOT EXISTS trends (date TEXT PRIMARY KEY, data TEXT)')
+
+    # Engagement time series, rolled up from raw points to hourly and daily buckets
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS engagement_series (
+            name TEXT,
+            resolution TEXT,
+            bucket TEXT,
+            value REAL,
+            samples INTEGER,
+            PRIMARY KEY (name, resolution, bucket)
+        ) WITHOUT ROWID
+    ''')
+
+    # Trigram index over each profile's content topics, keyed by content_history position
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_index (
+            name TEXT,
+            gram TEXT,
+            position INTEGER,
+            PRIMARY KEY (name, gram, position)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_topic_index_position ON topic_index (name, position)')
+
+    # HackerNews item cache for the incremental crawler
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS hn_items (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            score INTEGER,
+            time INTEGER,
+            fetched_at REAL
+        )
+    ''')
+    cursor.execute('CREATE TABLE IF NOT EXISTS hn_state (key TEXT PRIMARY KEY, value TEXT)')
+
+    # Per-topic, per-source engagement samples taken at each trend collection
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS topic_samples (
+            topic TEXT,
+            ts INTEGER,
+            source TEXT,
+            value REAL,
+            PRIMARY KEY (topic, ts, source)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_topic_samples_ts ON topic_samples (ts)')
+
+    # Published posts, numbered per platform; post_counts keeps per-platform totals without a scan
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS posts (
+            id TEXT PRIMARY KEY,
+            platform TEXT,
+            seq INTEGER,
+            content TEXT,
+            content_type TEXT,
+            timestamp TEXT,
+            status TEXT,
+            engagement TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts (timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_posts_platform_timestamp ON posts (platform, timestamp)')
+    cursor.execute('CREATE TABLE IF NOT EXISTS post_counts (platform TEXT PRIMARY KEY, count INTEGER)')
+
+    # Publishing queue: pending posts are served in publish_at order per platform
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT UNIQUE,
+            platform TEXT,
+            content TEXT,
+            content_type TEXT,
+            publish_at TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            claimed_at TEXT,
+            published_at TEXT,
+            post_id TEXT,
+            error TEXT,
+            created_at TEXT,
+            account TEXT DEFAULT ''
+        )
+    ''')
+    # Databases from before scheduled posts carried the account they count towards
+    if 'account' not in {row[1] for row in cursor.execute('PRAGMA table_info(scheduled_posts)')}:
+        cursor.execute("ALTER TABLE scheduled_posts ADD COLUMN account TEXT DEFAULT ''")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_posts_due ON scheduled_posts (status, platform, publish_at)')
+    # Publish rate limit state per platform, shared by every process that drains the queue
+    cursor.execute('CREATE TABLE IF NOT EXISTS publish_budgets (platform TEXT PRIMARY KEY, tokens REAL, updated_at REAL)')
+
+    # Structured trace spans; start_ts/end_ts are epoch seconds taken from a monotonic clock
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS spans (
+            span_id TEXT PRIMARY KEY,
+            trace_id TEXT,
+            parent_id TEXT,
+            account TEXT,
+            mode TEXT,
+            kind TEXT,
+            name TEXT,
+            server TEXT,
+            model TEXT,
+            start_ts REAL,
+            end_ts REAL,
+            duration_ms REAL,
+            input_tokens INTEGER,
+            output_tokens INTEGER,
+            error TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_spans_trace ON spans (trace_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_spans_kind_start ON spans (kind, start_ts)')
+
+    # Outgoing email; next_attempt_at doubles as the claim lease while an email is being sent
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            to_email TEXT,
+            subject TEXT,
+            html TEXT,
+            digest_key TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at TEXT,
+            created_at TEXT,
+            sent_at TEXT,
+            resend_id TEXT,
+            error TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at)')
+
+    # Engagement polling state per published post; next_poll_at is NULL once a post is no longer polled
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS post_polls (
+            post_id TEXT PRIMARY KEY,
+            account TEXT,
+            platform TEXT,
+            published_at TEXT,
+            next_poll_at TEXT,
+            last_polled_at TEXT,
+            polls INTEGER DEFAULT 0,
+            last_value REAL DEFAULT 0
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_post_polls_next ON post_polls (next_poll_at)')
+
+    # Engagement observed on the platforms per account; kept out of the profile so polls can add to it in place
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS observed_engagement (
+            account TEXT,
+            platform TEXT,
+            value REAL,
+            PRIMARY KEY (account, platform)
+        ) WITHOUT ROWID
+    ''')
+
+    # Engagement metrics observed at each poll
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS post_metrics (
+            post_id TEXT,
+            ts TEXT,
+            views INTEGER,
+            likes INTEGER,
+            shares INTEGER,
+            comments INTEGER,
+            PRIMARY KEY (post_id, ts)
+        ) WITHOUT ROWID
+    ''')
     
     conn.commit()
 
 
+# ---- Connections ----
+# Set by set_span_hook; called with the operation's name, returns a context manager the connection's `with` runs in
+_span_hook = None
+
+class _SpanConnection(sqlite3.Connection):
+    def __enter__(self):
+        self.span.__enter__()
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        try:
+            return super().__exit__(*exc)
+        finally:
+            self.span.__exit__(*exc)
+
+def set_span_hook(hook) -> None:
+    """Run every connection's `with` block inside hook(operation), e.g. a tracing span; None removes it."""
+    global _span_hook
+    _span_hook = hook
+
+def connect(operation: str) -> sqlite3.Connection:
+    """Open the database for one operation, named after the function doing it."""
+    if _span_hook is None:
+        return sqlite3.connect(DB)
+    conn = sqlite3.connect(DB, factory=_SpanConnection)
+    conn.span = _span_hook(operation)
+    return conn
+
+
+
 # ---- Profiles ----
 def write_profile(name: str, profile_dict: dict) -> None:
     """Insert or update a profile record."""
-    json_data = json.dumps(profile_dict)
-    with sqlite3.connect(DB) as conn:
+    json_data = dumps(profile_dict)
+    with connect("write_profile") as conn:
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO profiles (name, profile)
@@ -45,17 +246,17 @@ def write_profile(name: str, profile_dict: dict) -> None:
 
 def read_profile(name: str) -> dict | None:
     """Read a profile record by name."""
-    with sqlite3.connect(DB) as conn:
+    with connect("read_profile") as conn:
         cursor = conn.cursor()
         cursor.execute('SELECT profile FROM profiles WHERE name = ?', (name.lower(),))
         row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
+        return loads(row[0]) if row else None
 
 
 # ---- Logs ----
 def write_log(name: str, type: str, message: str) -> None:
     """Write a log entry."""
-    with sqlite3.connect(DB) as conn:
+    with connect("write_log") as conn:
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO logs (name, datetime, type, message)
@@ -65,7 +266,7 @@ def write_log(name: str, type: str, message: str) -> None:
 
 def read_log(name: str, last_n=10):
     """Read the most recent log entries for a given profile."""
-    with sqlite3.connect(DB) as conn:
+    with connect("read_log") as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT datetime, type, message FROM logs 
@@ -76,11 +277,62 @@ def read_log(name: str, last_n=10):
         return reversed(cursor.fetchall())
 
 
+# ---- Spans ----
+SPAN_COLUMNS = (
+    "span_id, trace_id, parent_id, account, mode, kind, name, server, model, "
+    "start_ts, end_ts, duration_ms, input_tokens, output_tokens, error"
+)
+
+def write_spans(spans: list[dict]) -> None:
+    """Insert a batch of finished spans."""
+    columns = SPAN_COLUMNS.split(", ")
+    with connect("write_spans") as conn:
+        cursor = conn.cursor()
+        cursor.executemany(f'''
+            INSERT OR REPLACE INTO spans ({SPAN_COLUMNS}) VALUES ({", ".join("?" * len(columns))})
+        ''', [tuple(span.get(column) for column in columns) for span in spans])
+        conn.commit()
+
+def read_spans(trace_id: str | None = None, kind: str | None = None, since: float | None = None) -> list[dict]:
+    """Read spans for a trace, or of a kind, started since an epoch time, in start order."""
+    conditions, params = [], []
+    if trace_id is not None:
+        conditions.append("trace_id = ?")
+        params.append(trace_id)
+    if kind is not None:
+        conditions.append("kind = ?")
+        params.append(kind)
+    if since is not None:
+        conditions.append("start_ts >= ?")
+        params.append(since)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with connect("read_spans") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {SPAN_COLUMNS} FROM spans {where} ORDER BY start_ts', params)
+        columns = SPAN_COLUMNS.split(", ")
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def read_tokens_by_mode(since: float | None = None) -> list[tuple[str, int, int, int]]:
+    """(mode, traces, input_tokens, output_tokens) summed over generation spans."""
+    with connect("read_tokens_by_mode") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT mode, COUNT(DISTINCT trace_id), COALESCE(SUM(input_tokens), 0), COALESCE(SUM(output_tokens), 0)
+            FROM spans WHERE kind = 'generation' AND start_ts >= ?
+            GROUP BY mode ORDER BY mode
+        ''', (since or 0,))
+        return cursor.fetchall()
+
+
+
 # ---- Trends ----
-def write_trends(date: str, data: dict) -> None:
-    """Insert or update trend data for a specific date."""
-    data_json = json.dumps({k: v.to_dict() if hasattr(v, "to_dict") else v for k, v in data.items()})
-    with sqlite3.connect(DB) as conn:
+def write_trends(date: str, data: dict | bytes) -> None:
+    """Insert or update trend data for a specific date, as a dict or an already-serialized blob."""
+    if isinstance(data, bytes):
+        data_json = data
+    else:
+        data_json = dumps(data)
+    with connect("write_trends") as conn:
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO trends (date, data)
@@ -89,10 +341,641 @@ def write_trends(date: str, data: dict) -> None:
         ''', (date, data_json))
         conn.commit()
 
-def read_trends(date: str) -> dict | None:
-    """Read stored trend data for a specific date."""
-    with sqlite3.connect(DB) as conn:
+def read_trends(date: str) -> dict | bytes | None:
+    """Read stored trend data for a specific date (blobs are returned as written)."""
+    with connect("read_trends") as conn:
         cursor = conn.cursor()
         cursor.execute('SELECT data FROM trends WHERE date = ?', (date,))
         row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
+        if not row:
+            return None
+        return row[0] if isinstance(row[0], bytes) else loads(row[0])
+
+
+
+# ---- Engagement time series ----
+RAW_RETENTION = timedelta(hours=24)
+HOURLY_RETENTION = timedelta(days=30)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# (source resolution, target resolution, bucket prefix length, bucket suffix, retention of source)
+ENGAGEMENT_ROLLUPS = [
+    ("raw", "hour", 13, ":00:00", RAW_RETENTION),
+    ("hour", "day", 10, " 00:00:00", HOURLY_RETENTION),
+]
+
+
+def _rollup_engagement(cursor, name: str, now: datetime) -> None:
+    """Fold points that fell out of a resolution's retention window into the next coarser one."""
+    for source, target, prefix, suffix, retention in ENGAGEMENT_ROLLUPS:
+        cutoff = (now - retention).strftime(TIMESTAMP_FORMAT)
+        # Engagement is cumulative, so a bucket keeps the last value seen in it
+        cursor.execute('''
+            INSERT INTO engagement_series (name, resolution, bucket, value, samples)
+            SELECT name, ?, substr(bucket, 1, ?) || ?, value, total FROM (
+                SELECT name, bucket, value, MAX(bucket) AS latest, SUM(samples) AS total
+                FROM engagement_series
+                WHERE name = ? AND resolution = ? AND bucket < ?
+                GROUP BY substr(bucket, 1, ?)
+            ) WHERE true
+            ON CONFLICT(name, resolution, bucket) DO UPDATE SET
+                value=excluded.value, samples=samples + excluded.samples
+        ''', (target, prefix, suffix, name, source, cutoff, prefix))
+        cursor.execute('''
+            DELETE FROM engagement_series WHERE name = ? AND resolution = ? AND bucket < ?
+        ''', (name, source, cutoff))
+
+
+def write_engagement(name: str, points: list[tuple[str, float]]) -> None:
+    """Append (timestamp, engagement) points and roll up anything past its retention window."""
+    name = name.lower()
+    with connect("write_engagement") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO engagement_series (name, resolution, bucket, value, samples)
+            VALUES (?, 'raw', ?, ?, 1)
+            ON CONFLICT(name, resolution, bucket) DO UPDATE SET
+                value=excluded.value, samples=samples + 1
+        ''', [(name, timestamp, value) for timestamp, value in points])
+        _rollup_engagement(cursor, name, clock.now())
+        conn.commit()
+
+
+def read_engagement(name: str, since: str | None = None, bucket_seconds: int | None = None) -> list[tuple[str, float]]:
+    """Read the engagement series, optionally downsampled to one point per bucket_seconds."""
+    since = since or ""
+    with connect("read_engagement") as conn:
+        cursor = conn.cursor()
+        if bucket_seconds:
+            cursor.execute('''
+                SELECT MAX(bucket), value FROM engagement_series
+                WHERE name = ? AND bucket >= ?
+                GROUP BY CAST(strftime('%s', bucket) AS INTEGER) / ?
+                ORDER BY 1
+            ''', (name.lower(), since, bucket_seconds))
+        else:
+            cursor.execute('''
+                SELECT bucket, value FROM engagement_series
+                WHERE name = ? AND bucket >= ?
+                ORDER BY bucket
+            ''', (name.lower(), since))
+        return cursor.fetchall()
+
+
+def delete_engagement(name: str) -> None:
+    """Delete the whole engagement series for a profile."""
+    with connect("delete_engagement") as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM engagement_series WHERE name = ?', (name.lower(),))
+        conn.commit()
+
+
+
+# ---- Topic index ----
+def write_topic_grams(name: str, entries: list[tuple[int, set[str]]]) -> None:
+    """Index the trigrams of topics at the given content_history positions."""
+    with connect("write_topic_grams") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR IGNORE INTO topic_index (name, gram, position) VALUES (?, ?, ?)
+        ''', [(name.lower(), gram, position) for position, grams in entries for gram in grams])
+        conn.commit()
+
+def read_topic_positions(name: str, grams: set[str]) -> list[int]:
+    """Return the positions whose topics contain every one of the given trigrams."""
+    grams = list(grams)
+    placeholders = ", ".join("?" * len(grams))
+    with connect("read_topic_positions") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT position FROM topic_index
+            WHERE name = ? AND gram IN ({placeholders})
+            GROUP BY position
+            HAVING COUNT(*) = ?
+            ORDER BY position
+        ''', (name.lower(), *grams, len(grams)))
+        return [row[0] for row in cursor.fetchall()]
+
+def read_topic_index_size(name: str) -> int:
+    """Return how many content_history positions are indexed for a profile."""
+    with connect("read_topic_index_size") as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(position) FROM topic_index WHERE name = ?', (name.lower(),))
+        row = cursor.fetchone()
+        return row[0] + 1 if row[0] is not None else 0
+
+def delete_topic_index(name: str) -> None:
+    """Drop the topic index for a profile."""
+    with connect("delete_topic_index") as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM topic_index WHERE name = ?', (name.lower(),))
+        conn.commit()
+
+
+
+# ---- HackerNews item cache ----
+def write_hn_items(items: list[dict], fetched_at: float) -> None:
+    """Insert or refresh cached HackerNews items."""
+    with connect("write_hn_items") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO hn_items (id, title, score, time, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                title=excluded.title, score=excluded.score, time=excluded.time, fetched_at=excluded.fetched_at
+        ''', [(item["id"], item.get("title"), item.get("score", 0), item.get("time"), fetched_at) for item in items])
+        conn.commit()
+
+def read_hn_items(ids: list[int]) -> dict[int, dict]:
+    """Read cached HackerNews items by id."""
+    items = {}
+    with connect("read_hn_items") as conn:
+        cursor = conn.cursor()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            cursor.execute(f'''
+                SELECT id, title, score, time, fetched_at FROM hn_items
+                WHERE id IN ({", ".join("?" * len(chunk))})
+            ''', chunk)
+            for id, title, score, time, fetched_at in cursor.fetchall():
+                items[id] = {"id": id, "title": title, "score": score, "time": time, "fetched_at": fetched_at}
+    return items
+
+def read_hn_state(key: str) -> str | None:
+    """Read a HackerNews crawler state value."""
+    with connect("read_hn_state") as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT value FROM hn_state WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+def write_hn_state(key: str, value: str) -> None:
+    """Insert or update a HackerNews crawler state value."""
+    with connect("write_hn_state") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO hn_state (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value=excluded.value
+        ''', (key, value))
+        conn.commit()
+
+
+
+# ---- Topic samples ----
+def write_topic_samples(samples: list[tuple[str, int, str, float]]) -> None:
+    """Insert (topic, ts, source, value) engagement samples."""
+    with connect("write_topic_samples") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO topic_samples (topic, ts, source, value) VALUES (?, ?, ?, ?)
+            ON CONFLICT(topic, ts, source) DO UPDATE SET value=excluded.value
+        ''', samples)
+        conn.commit()
+
+def read_topic_samples(since: int, until: int, topics: list[str] | None = None) -> list[tuple[str, int, str, float]]:
+    """Read samples in [since, until), for all topics or only the given ones, ordered by topic and time."""
+    with connect("read_topic_samples") as conn:
+        cursor = conn.cursor()
+        if topics is None:
+            cursor.execute('''
+                SELECT topic, ts, source, value FROM topic_samples
+                WHERE ts >= ? AND ts < ?
+                ORDER BY topic, ts
+            ''', (since, until))
+            return cursor.fetchall()
+        rows = []
+        for topic in topics:
+            cursor.execute('''
+                SELECT topic, ts, source, value FROM topic_samples
+                WHERE topic = ? AND ts >= ? AND ts < ?
+                ORDER BY ts
+            ''', (topic, since, until))
+            rows.extend(cursor.fetchall())
+        return rows
+
+
+
+# ---- Posts ----
+POST_COLUMNS = "id, platform, content, content_type, timestamp, status, engagement"
+
+def _post_from_row(row) -> dict:
+    id, platform, content, content_type, timestamp, status, engagement = row
+    return {
+        "id": id,
+        "platform": platform,
+        "content": content,
+        "content_type": content_type,
+        "timestamp": timestamp,
+        "status": status,
+        "engagement": loads(engagement),
+    }
+
+def write_post(post: dict, scheduled: dict | None = None) -> dict | None:
+    """Insert a new post, numbering it within its platform, and return it with its id.
+
+    With scheduled (a claimed queue entry), the entry is marked published in the same transaction; returns None
+    if that claim was lost, so a requeued entry can never be posted twice.
+    """
+    with connect("write_post") as conn:
+        cursor = conn.cursor()
+        if scheduled is not None:
+            # Every claim bumps attempts, so a later claim of the same entry no longer matches
+            cursor.execute('''
+                UPDATE scheduled_posts SET status = 'published', published_at = ?
+                WHERE id = ? AND status = 'publishing' AND attempts = ?
+            ''', (post["timestamp"], scheduled["id"], scheduled["attempts"]))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return None
+        # The counter upsert takes the write lock, so concurrent servers never hand out the same number
+        cursor.execute('''
+            INSERT INTO post_counts (platform, count) VALUES (?, 1)
+            ON CONFLICT(platform) DO UPDATE SET count = count + 1
+            RETURNING count
+        ''', (post["platform"],))
+        seq = cursor.fetchone()[0]
+        stamp = post["timestamp"].replace("-", "").replace(" ", "").replace(":", "")
+        post = {"id": f"{post['platform']}_{seq}_{stamp}", **post}
+        cursor.execute(f'''
+            INSERT INTO posts (seq, {POST_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (seq, post["id"], post["platform"], post["content"], post["content_type"], post["timestamp"],
+              post["status"], dumps(post["engagement"])))
+        if scheduled is not None:
+            cursor.execute('UPDATE scheduled_posts SET post_id = ? WHERE id = ?', (post["id"], scheduled["id"]))
+        conn.commit()
+    return post
+
+def read_post(post_id: str) -> dict | None:
+    """Read a post by id."""
+    with connect("read_post") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {POST_COLUMNS} FROM posts WHERE id = ?', (post_id,))
+        row = cursor.fetchone()
+        return _post_from_row(row) if row else None
+
+def read_posts(platform: str | None = None, limit: int = 10, offset: int = 0) -> list[dict]:
+    """Read posts newest first, for one platform or all of them."""
+    with connect("read_posts") as conn:
+        cursor = conn.cursor()
+        if platform is None:
+            cursor.execute(f'''
+                SELECT {POST_COLUMNS} FROM posts
+                ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?
+            ''', (limit, offset))
+        else:
+            cursor.execute(f'''
+                SELECT {POST_COLUMNS} FROM posts WHERE platform = ?
+                ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?
+            ''', (platform, limit, offset))
+        return [_post_from_row(row) for row in cursor.fetchall()]
+
+def count_posts(platform: str | None = None) -> int:
+    """Number of posts published on one platform or all of them."""
+    with connect("count_posts") as conn:
+        cursor = conn.cursor()
+        if platform is None:
+            cursor.execute('SELECT COALESCE(SUM(count), 0) FROM post_counts')
+        else:
+            cursor.execute('SELECT COALESCE(SUM(count), 0) FROM post_counts WHERE platform = ?', (platform,))
+        return cursor.fetchone()[0]
+
+
+
+# ---- Scheduled posts ----
+SCHEDULED_COLUMNS = (
+    "id, idempotency_key, platform, content, content_type, publish_at, status, attempts, published_at, post_id, error, "
+    "account"
+)
+
+def _scheduled_from_row(row) -> dict:
+    return dict(zip(SCHEDULED_COLUMNS.split(", "), row))
+
+def write_scheduled_post(entry: dict) -> tuple[dict, bool]:
+    """Queue a post unless its idempotency key is already queued; returns the entry and whether it is new."""
+    with connect("write_scheduled_post") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO scheduled_posts (idempotency_key, platform, content, content_type, publish_at, status, created_at,
+                                         account)
+            VALUES (?, ?, ?, ?, ?, 'pending', ?, ?)
+            ON CONFLICT(idempotency_key) DO NOTHING
+        ''', (entry["idempotency_key"], entry["platform"], entry["content"], entry["content_type"],
+              entry["publish_at"], entry["created_at"], entry.get("account", "")))
+        created = cursor.rowcount > 0
+        conn.commit()
+        cursor.execute(f'SELECT {SCHEDULED_COLUMNS} FROM scheduled_posts WHERE idempotency_key = ?',
+                       (entry["idempotency_key"],))
+        return _scheduled_from_row(cursor.fetchone()), created
+
+def claim_due_posts(platform: str, now: str, limit: int, rate: float, capacity: float, now_ts: float) -> list[dict]:
+    """Atomically mark due posts for a platform as publishing and return them, earliest first.
+
+    At most limit posts are claimed, and no more than the platform's publish budget holds: a token bucket that
+    refills at rate posts per second up to capacity, kept in publish_budgets and debited in the same transaction.
+    """
+    with connect("claim_due_posts") as conn:
+        cursor = conn.cursor()
+        # Take the write lock before reading the budget so two processes can't both spend the same tokens
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT tokens, updated_at FROM publish_budgets WHERE platform = ?', (platform,))
+        row = cursor.fetchone()
+        tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now_ts - row[1]) * rate)
+        cursor.execute(f'''
+            UPDATE scheduled_posts SET status = 'publishing', claimed_at = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM scheduled_posts
+                WHERE status = 'pending' AND platform = ? AND publish_at <= ?
+                ORDER BY publish_at, id LIMIT ?
+            )
+            RETURNING {SCHEDULED_COLUMNS}
+        ''', (now, platform, now, min(limit, int(tokens))))
+        entries = [_scheduled_from_row(row) for row in cursor.fetchall()]
+        cursor.execute('''
+            INSERT INTO publish_budgets (platform, tokens, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(platform) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at
+        ''', (platform, tokens - len(entries), now_ts))
+        conn.commit()
+    return sorted(entries, key=lambda entry: (entry["publish_at"], entry["id"]))
+
+def release_scheduled_post(entry: dict, error: str, failed: bool) -> None:
+    """Return a claimed post to the queue after a failed attempt, or give up on it, unless the claim was lost."""
+    with connect("release_scheduled_post") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE scheduled_posts SET status = ?, error = ?
+            WHERE id = ? AND status = 'publishing' AND attempts = ?
+        ''', ("failed" if failed else "pending", error, entry["id"], entry["attempts"]))
+        conn.commit()
+
+def unclaim_scheduled_posts(entries: list[dict]) -> None:
+    """Return claimed posts that were never attempted to the queue, giving back the attempt and the publish budget
+    their claim took."""
+    with connect("unclaim_scheduled_posts") as conn:
+        cursor = conn.cursor()
+        for entry in entries:
+            cursor.execute('''
+                UPDATE scheduled_posts SET status = 'pending', attempts = attempts - 1
+                WHERE id = ? AND status = 'publishing' AND attempts = ?
+            ''', (entry["id"], entry["attempts"]))
+            if cursor.rowcount:
+                cursor.execute('UPDATE publish_budgets SET tokens = tokens + 1 WHERE platform = ?',
+                               (entry["platform"],))
+        conn.commit()
+
+def requeue_stale_claims(claimed_before: str) -> int:
+    """Put posts claimed by a worker that died before publishing back in the queue."""
+    with connect("requeue_stale_claims") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE scheduled_posts SET status = 'pending'
+            WHERE status = 'publishing' AND claimed_at < ?
+        ''', (claimed_before,))
+        conn.commit()
+        return cursor.rowcount
+
+def read_scheduled_posts(status: str | None = None, limit: int = 20) -> list[dict]:
+    """Read queued posts in publish order, optionally only those with a given status."""
+    with connect("read_scheduled_posts") as conn:
+        cursor = conn.cursor()
+        if status is None:
+            cursor.execute(f'SELECT {SCHEDULED_COLUMNS} FROM scheduled_posts ORDER BY publish_at, id LIMIT ?', (limit,))
+        else:
+            cursor.execute(f'''
+                SELECT {SCHEDULED_COLUMNS} FROM scheduled_posts WHERE status = ?
+                ORDER BY publish_at, id LIMIT ?
+            ''', (status, limit))
+        return [_scheduled_from_row(row) for row in cursor.fetchall()]
+
+def read_schedule_counts() -> dict[str, int]:
+    """Number of queued posts in each status."""
+    with connect("read_schedule_counts") as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT status, COUNT(*) FROM scheduled_posts GROUP BY status')
+        return dict(cursor.fetchall())
+
+def read_schedule_lags(since: str) -> list[float]:
+    """Seconds between scheduled and actual publish time for posts published since a time."""
+    with connect("read_schedule_lags") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT (julianday(published_at) - julianday(publish_at)) * 86400 FROM scheduled_posts
+            WHERE status = 'published' AND published_at >= ?
+        ''', (since,))
+        return [row[0] for row in cursor.fetchall()]
+
+def read_oldest_due(now: str) -> str | None:
+    """publish_at of the longest-waiting pending post that is already due."""
+    with connect("read_oldest_due") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT MIN(publish_at) FROM scheduled_posts WHERE status = 'pending' AND publish_at <= ?
+        ''', (now,))
+        return cursor.fetchone()[0]
+
+
+
+# ---- Engagement polling ----
+POLL_COLUMNS = "post_id, account, platform, published_at, next_poll_at, last_polled_at, polls, last_value"
+METRIC_NAMES = ("views", "likes", "shares", "comments")
+
+def write_post_poll(post_id: str, account: str, platform: str, published_at: str, next_poll_at: str) -> None:
+    """Start polling engagement for a published post."""
+    with connect("write_post_poll") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO post_polls (post_id, account, platform, published_at, next_poll_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(post_id) DO NOTHING
+        ''', (post_id, account.lower(), platform, published_at, next_poll_at))
+        conn.commit()
+
+def claim_due_polls(now: str, lease_until: str, limit: int) -> list[dict]:
+    """Take up to limit posts due for polling, pushing their next poll out to lease_until so no other poller takes them."""
+    with connect("claim_due_polls") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE post_polls SET next_poll_at = ?
+            WHERE post_id IN (
+                SELECT post_id FROM post_polls WHERE next_poll_at <= ?
+                ORDER BY next_poll_at LIMIT ?
+            )
+            RETURNING {POLL_COLUMNS}
+        ''', (lease_until, now, limit))
+        polls = [dict(zip(POLL_COLUMNS.split(", "), row)) for row in cursor.fetchall()]
+        conn.commit()
+    return polls
+
+def write_poll_results(results: list[dict]) -> None:
+    """Record one poll per post: metrics sample, latest engagement on the post and the next poll time.
+
+    The change in each post's engagement value since its last poll is added to its account's observed engagement
+    in the same transaction.
+    """
+    with connect("write_poll_results") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO observed_engagement (account, platform, value)
+            SELECT account, platform, ? - last_value FROM post_polls WHERE post_id = ? AND account != ''
+            ON CONFLICT(account, platform) DO UPDATE SET value = value + excluded.value
+        ''', [(r["value"], r["post_id"]) for r in results])
+        cursor.executemany('''
+            INSERT INTO post_metrics (post_id, ts, views, likes, shares, comments) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(post_id, ts) DO UPDATE SET
+                views=excluded.views, likes=excluded.likes, shares=excluded.shares, comments=excluded.comments
+        ''', [(r["post_id"], r["ts"], *(r["metrics"].get(name, 0) for name in METRIC_NAMES)) for r in results])
+        cursor.executemany('UPDATE posts SET engagement = ? WHERE id = ?',
+                           [(dumps(r["metrics"]), r["post_id"]) for r in results])
+        cursor.executemany('''
+            UPDATE post_polls SET last_polled_at = ?, next_poll_at = ?, polls = polls + 1, last_value = ?
+            WHERE post_id = ?
+        ''', [(r["ts"], r["next_poll_at"], r["value"], r["post_id"]) for r in results])
+        conn.commit()
+
+def reschedule_polls(post_ids: list[str], next_poll_at: str) -> None:
+    """Retry polls that could not be completed at a later time."""
+    with connect("reschedule_polls") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('UPDATE post_polls SET next_poll_at = ? WHERE post_id = ?',
+                           [(next_poll_at, post_id) for post_id in post_ids])
+        conn.commit()
+
+def read_post_poll(post_id: str) -> dict | None:
+    """Read the polling state of a post."""
+    with connect("read_post_poll") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {POLL_COLUMNS} FROM post_polls WHERE post_id = ?', (post_id,))
+        row = cursor.fetchone()
+        return dict(zip(POLL_COLUMNS.split(", "), row)) if row else None
+
+def read_post_metrics(post_id: str, last_n: int = 20) -> list[dict]:
+    """Read the most recent engagement samples for a post, oldest first."""
+    with connect("read_post_metrics") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT ts, views, likes, shares, comments FROM post_metrics
+            WHERE post_id = ? ORDER BY ts DESC LIMIT ?
+        ''', (post_id, last_n))
+        return [dict(zip(("ts", *METRIC_NAMES), row)) for row in reversed(cursor.fetchall())]
+
+
+
+# ---- Observed engagement ----
+def read_observed_engagement(account: str) -> dict[str, float]:
+    """Read an account's observed engagement per platform."""
+    with connect("read_observed_engagement") as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT platform, value FROM observed_engagement WHERE account = ?', (account.lower(),))
+        return dict(cursor.fetchall())
+
+def add_observed_engagement(account: str, platform_deltas: dict[str, float]) -> None:
+    """Add engagement to an account's observed engagement per platform."""
+    with connect("add_observed_engagement") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO observed_engagement (account, platform, value) VALUES (?, ?, ?)
+            ON CONFLICT(account, platform) DO UPDATE SET value = value + excluded.value
+        ''', [(account.lower(), platform, delta) for platform, delta in platform_deltas.items()])
+        conn.commit()
+
+def delete_observed_engagement(account: str) -> None:
+    """Delete an account's observed engagement."""
+    with connect("delete_observed_engagement") as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM observed_engagement WHERE account = ?', (account.lower(),))
+        conn.commit()
+
+
+
+# ---- Email outbox ----
+EMAIL_COLUMNS = "id, to_email, subject, html, digest_key, status, attempts, next_attempt_at, created_at, sent_at, resend_id, error"
+
+def _email_from_row(row) -> dict:
+    return dict(zip(EMAIL_COLUMNS.split(", "), row))
+
+def write_email(to_email: str, subject: str, html: str, digest_key: str | None, created_at: str) -> int:
+    """Add an email to the outbox and return its id."""
+    with connect("write_email") as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO email_outbox (to_email, subject, html, digest_key, status, next_attempt_at, created_at)
+            VALUES (?, ?, ?, ?, 'pending', ?, ?)
+        ''', (to_email, subject, html, digest_key, created_at, created_at))
+        conn.commit()
+        return cursor.lastrowid
+
+def claim_due_emails(now: str, lease_until: str, limit: int) -> list[dict]:
+    """Claim individual emails that are due, including ones whose previous claim lapsed."""
+    with connect("claim_due_emails") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE email_outbox SET status = 'sending', next_attempt_at = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM email_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? AND digest_key IS NULL
+                ORDER BY next_attempt_at, id LIMIT ?
+            )
+            RETURNING {EMAIL_COLUMNS}
+        ''', (lease_until, now, limit))
+        emails = [_email_from_row(row) for row in cursor.fetchall()]
+        conn.commit()
+    return sorted(emails, key=lambda email: email["id"])
+
+def claim_due_digests(window_start: str, now: str, lease_until: str) -> list[dict]:
+    """Claim every queued digest email for keys whose oldest queued email is older than window_start."""
+    with connect("claim_due_digests") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE email_outbox SET status = 'sending', next_attempt_at = ?, attempts = attempts + 1
+            WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? AND digest_key IN (
+                SELECT digest_key FROM email_outbox
+                WHERE status IN ('pending', 'sending') AND digest_key IS NOT NULL
+                GROUP BY digest_key HAVING MIN(created_at) <= ?
+            )
+            RETURNING {EMAIL_COLUMNS}
+        ''', (lease_until, now, window_start))
+        emails = [_email_from_row(row) for row in cursor.fetchall()]
+        conn.commit()
+    return sorted(emails, key=lambda email: email["id"])
+
+def write_email_results(results: list[dict]) -> None:
+    """Record the outcome of send attempts: status, resend_id, error and when to try again."""
+    with connect("write_email_results") as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            UPDATE email_outbox SET status = ?, resend_id = ?, error = ?, next_attempt_at = ?, sent_at = ?
+            WHERE id = ?
+        ''', [(r["status"], r.get("resend_id"), r.get("error"), r.get("next_attempt_at"), r.get("sent_at"), r["id"])
+              for r in results])
+        conn.commit()
+
+def read_email(email_id: int) -> dict | None:
+    """Read an outbox email by id."""
+    with connect("read_email") as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {EMAIL_COLUMNS} FROM email_outbox WHERE id = ?', (email_id,))
+        row = cursor.fetchone()
+        return _email_from_row(row) if row else None
+
+def read_outbox_counts() -> dict[str, int]:
+    """Number of outbox emails in each status."""
+    with connect("read_outbox_counts") as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT status, COUNT(*) FROM email_outbox GROUP BY status')
+        return dict(cursor.fetchall())
+
+
+# ---- Storage ----
+
+def read_storage_stats() -> dict:
+    """Database size in bytes and the row count of every table."""
+    with connect("read_storage_stats") as conn:
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        size = pages * cursor.fetchone()[0]
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+        tables = [row[0] for row in cursor.fetchall()]
+        rows = {table: cursor.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+        return {"bytes": size, "rows": rows}
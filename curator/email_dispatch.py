@@ -0,0 +1,162 @@
+"""Email delivery through a persistent outbox: pooled, rate-limited Resend calls with retry,
+batching and an optional digest window"""
+import hashlib
+import html
+import os
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import requests
+from dotenv import load_dotenv
+
+import clock
+from collector_runtime import configure_api, RateLimitExceeded, CircuitOpenError
+from database import write_email, claim_due_emails, claim_due_digests, write_email_results
+from serialization import dumpb
+
+load_dotenv(override=True)
+
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com").rstrip("/")
+RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+EMAIL_FROM = os.getenv("EMAIL_FROM", "Content Curator <onboarding@resend.dev>")
+# Seconds to collect curator summaries into one digest per recipient; 0 sends each email on its own
+DIGEST_WINDOW = float(os.getenv("EMAIL_DIGEST_WINDOW", "0"))
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BATCH_LIMIT = 100             # Resend's batch endpoint takes at most 100 emails
+DISPATCH_INTERVAL = 10.0
+SEND_LEASE = timedelta(minutes=2)
+MAX_SEND_ATTEMPTS = 5
+BASE_REQUEUE_DELAY = 30       # seconds, doubled per failed attempt
+MAX_REQUEUE_DELAY = 3600
+
+resend_api = configure_api("resend", rate=2, capacity=2)  # Resend allows 2 requests per second
+
+
+def enqueue_email(to_email: str, subject: str, html_content: str, digest: bool | None = None) -> int:
+    """Put an email in the outbox; digest emails to the same recipient are sent together"""
+    digest = DIGEST_WINDOW > 0 if digest is None else digest
+    return write_email(to_email, subject, html_content, to_email.lower() if digest else None,
+                       clock.now().strftime(TIME_FORMAT))
+
+
+def compose_digest(emails: list[dict]) -> dict:
+    """Coalesce queued emails for one recipient into a single message"""
+    if len(emails) == 1:
+        return {"to": emails[0]["to_email"], "subject": emails[0]["subject"], "html": emails[0]["html"]}
+    sections = "<hr>".join(
+        f"<h3>{html.escape(email['subject'])}</h3>\n{email['html']}" for email in emails
+    )
+    return {
+        "to": emails[0]["to_email"],
+        "subject": f"Curator digest: {len(emails)} updates",
+        "html": f"<h2>Curator digest</h2>\n{sections}",
+    }
+
+
+def post_emails(messages: list[dict]) -> list[str]:
+    """Send one message, or up to BATCH_LIMIT through the batch endpoint; returns the Resend ids in order"""
+    batch = len(messages) > 1
+    url = f"{RESEND_API_URL}/emails/batch" if batch else f"{RESEND_API_URL}/emails"
+    payloads = [
+        {"from": EMAIL_FROM, "to": [message["to"]], "subject": message["subject"], "html": message["html"]}
+        for message in messages
+    ]
+    # Same key on every retry, so Resend drops duplicates if a timed-out request actually went through
+    idempotency_key = hashlib.sha256(dumpb(payloads)).hexdigest()
+    response = resend_api.post(url, data=dumpb(payloads if batch else payloads[0]), headers={
+        "Authorization": f"Bearer {RESEND_API_KEY}",
+        "Content-Type": "application/json",
+        "Idempotency-Key": idempotency_key,
+    })
+    response.raise_for_status()
+    data = response.json()
+    return [item["id"] for item in data["data"]] if batch else [data["id"]]
+
+
+def requeue_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(MAX_REQUEUE_DELAY, BASE_REQUEUE_DELAY * 2 ** attempts))
+
+
+class EmailDispatcher:
+    """Drains the outbox: individual emails in batches, digests once their window has passed"""
+
+    def __init__(self, digest_window: float = DIGEST_WINDOW, dispatch_interval: float = DISPATCH_INTERVAL):
+        self.digest_window = digest_window
+        self.dispatch_interval = dispatch_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, now: datetime | None = None) -> int:
+        """Send everything that is due; returns the number of outbox emails delivered"""
+        now = now or clock.now()
+        lease_until = (now + SEND_LEASE).strftime(TIME_FORMAT)
+
+        # Each message carries the outbox emails it delivers
+        messages = [
+            (compose_digest([email]), [email])
+            for email in claim_due_emails(now.strftime(TIME_FORMAT), lease_until, BATCH_LIMIT)
+        ]
+        window_start = (now - timedelta(seconds=self.digest_window)).strftime(TIME_FORMAT)
+        by_recipient = defaultdict(list)
+        for email in claim_due_digests(window_start, now.strftime(TIME_FORMAT), lease_until):
+            by_recipient[email["digest_key"]].append(email)
+        messages += [(compose_digest(emails), emails) for emails in by_recipient.values()]
+
+        delivered = 0
+        for start in range(0, len(messages), BATCH_LIMIT):
+            chunk = messages[start:start + BATCH_LIMIT]
+            delivered += self._send(chunk, now)
+        return delivered
+
+    def _send(self, chunk: list[tuple[dict, list[dict]]], now: datetime) -> int:
+        try:
+            resend_ids = post_emails([message for message, _ in chunk])
+        except (RateLimitExceeded, CircuitOpenError, requests.RequestException) as e:
+            response = getattr(e, "response", None)
+            # Client errors other than throttling won't succeed on retry
+            permanent = response is not None and 400 <= response.status_code < 500 and response.status_code != 429
+            if permanent and len(chunk) > 1:
+                # Resend rejects a whole batch over one bad email, so send each on its own and fail only those
+                print(f"Batch of {len(chunk)} emails rejected, sending them one by one: {e}", file=sys.stderr)
+                return sum(self._send([item], now) for item in chunk)
+            print(f"Error sending {len(chunk)} email(s): {e}", file=sys.stderr)
+            write_email_results([
+                {
+                    "id": email["id"],
+                    "status": "failed" if permanent or email["attempts"] >= MAX_SEND_ATTEMPTS else "pending",
+                    "error": str(e),
+                    "next_attempt_at": (now + requeue_delay(email["attempts"])).strftime(TIME_FORMAT),
+                }
+                for _, emails in chunk for email in emails
+            ])
+            return 0
+
+        sent_at = clock.now().strftime(TIME_FORMAT)
+        write_email_results([
+            {"id": email["id"], "status": "sent", "resend_id": resend_id, "sent_at": sent_at}
+            for (_, emails), resend_id in zip(chunk, resend_ids) for email in emails
+        ])
+        return sum(len(emails) for _, emails in chunk)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Email dispatcher error: {e}", file=sys.stderr)
+            self._stop.wait(self.dispatch_interval)
+
+    def start(self) -> None:
+        """Start draining the outbox on a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="email-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,134 @@
+"""Background polling of engagement metrics for published posts, folded into account stats"""
+import os
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+import clock
+from collector_runtime import fetch_json, configure_api
+from database import write_post_poll, claim_due_polls, write_poll_results, reschedule_polls
+
+load_dotenv(override=True)
+
+# Base URL of the platforms' metrics API (mock_platform_server.py locally); polling is off when unset
+PLATFORM_METRICS_URL = os.getenv("PLATFORM_METRICS_URL")
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+POLL_INTERVAL = 30.0          # seconds between checks for due polls
+POLL_BATCH_SIZE = 100         # posts polled per check, and ids per metrics request
+POLL_LEASE = timedelta(minutes=5)
+RETRY_DELAY = timedelta(minutes=2)
+
+# A post is polled again after a quarter of its age, between 5 minutes and a day, until it is 30 days old
+POLL_AGE_FRACTION = 0.25
+MIN_POLL_INTERVAL = timedelta(minutes=5)
+MAX_POLL_INTERVAL = timedelta(days=1)
+POLL_HORIZON = timedelta(days=30)
+
+ENGAGEMENT_WEIGHTS = {"views": 0.1, "likes": 1.0, "shares": 3.0, "comments": 2.0}
+
+configure_api("platform_metrics", rate=5, capacity=10)
+
+
+def engagement_value(metrics: dict) -> float:
+    """Collapse raw metrics into one engagement number"""
+    return sum(metrics.get(name, 0) * weight for name, weight in ENGAGEMENT_WEIGHTS.items())
+
+
+def next_poll_time(published_at: datetime, now: datetime) -> datetime | None:
+    """When to poll a post next; polls thin out as the post ages and stop after POLL_HORIZON"""
+    age = now - published_at
+    if age >= POLL_HORIZON:
+        return None
+    interval = min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, age * POLL_AGE_FRACTION))
+    return now + interval
+
+
+def track_post(post: dict, account: str = "") -> None:
+    """Start polling a newly published post"""
+    published_at = datetime.strptime(post["timestamp"], TIME_FORMAT)
+    write_post_poll(post["id"], account, post["platform"], post["timestamp"],
+                    (published_at + MIN_POLL_INTERVAL).strftime(TIME_FORMAT))
+
+
+def fetch_metrics(platform: str, post_ids: list[str]) -> dict[str, dict]:
+    """Fetch current metrics for a batch of posts from the platform's metrics API"""
+    data = fetch_json(f"{PLATFORM_METRICS_URL}/{platform}/metrics", params={"ids": ",".join(post_ids)},
+                      api="platform_metrics")
+    return (data or {}).get("metrics", {})
+
+
+class EngagementPoller:
+    """Polls due posts in batches, stores the samples and folds the change into account stats.
+
+    fetch(platform, post_ids) returns {post_id: metrics}; by default the platform metrics API.
+    """
+
+    def __init__(self, batch_size: int = POLL_BATCH_SIZE, poll_interval: float = POLL_INTERVAL,
+                 fetch=fetch_metrics):
+        self.batch_size = batch_size
+        self.fetch = fetch
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, now: datetime | None = None) -> int:
+        """Poll every due post (up to batch_size); returns the number of posts polled"""
+        now = now or clock.now()
+        polls = claim_due_polls(now.strftime(TIME_FORMAT), (now + POLL_LEASE).strftime(TIME_FORMAT), self.batch_size)
+        by_platform = defaultdict(list)
+        for poll in polls:
+            by_platform[poll["platform"]].append(poll)
+
+        results = []
+        for platform, platform_polls in by_platform.items():
+            try:
+                metrics = self.fetch(platform, [poll["post_id"] for poll in platform_polls])
+            except Exception as e:
+                print(f"Error polling {platform} metrics: {e}", file=sys.stderr)
+                reschedule_polls([poll["post_id"] for poll in platform_polls], (now + RETRY_DELAY).strftime(TIME_FORMAT))
+                continue
+            for poll in platform_polls:
+                post_metrics = metrics.get(poll["post_id"])
+                published_at = datetime.strptime(poll["published_at"], TIME_FORMAT)
+                next_poll = next_poll_time(published_at, now)
+                if post_metrics is None:
+                    reschedule_polls([poll["post_id"]], next_poll.strftime(TIME_FORMAT) if next_poll else None)
+                    continue
+                value = engagement_value(post_metrics)
+                results.append({
+                    "post_id": poll["post_id"],
+                    "ts": now.strftime(TIME_FORMAT),
+                    "metrics": post_metrics,
+                    "value": value,
+                    "next_poll_at": next_poll.strftime(TIME_FORMAT) if next_poll else None,
+                })
+
+        if results:
+            write_poll_results(results)
+        return len(results)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Keep going while full batches come back so a backlog drains without waiting
+                while self.run_once() >= self.batch_size and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                print(f"Engagement poller error: {e}", file=sys.stderr)
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start polling on a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="engagement-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -3,6 +3,7 @@
 Generate demo data for immediate dashboard testing
 """
 from profiles import ContentAccount
+from database import write_engagement, delete_engagement, delete_topic_index
 from datetime import datetime, timedelta
 import random
 
@@ -49,6 +50,7 @@ def generate_mock_content_history(account: ContentAccount, num_pieces: int = 15)
     
     # Clear existing content
     account.content_history = []
+    delete_topic_index(account.name)
     account.platform_stats = {
         "blog": {"posts": 0, "total_engagement": 0.0},
         "twitter": {"posts": 0, "total_engagement": 0.0},
@@ -56,7 +58,7 @@ def generate_mock_content_history(account: ContentAccount, num_pieces: int = 15)
         "newsletter": {"posts": 0, "total_engagement": 0.0}
     }
     account.topic_coverage = {}
-    account.engagement_time_series = []
+    delete_engagement(account.name)
     
     # Generate content over the last 30 days
     for i in range(num_pieces):
@@ -104,14 +106,13 @@ def generate_mock_content_history(account: ContentAccount, num_pieces: int = 15)
                 pass
     
     # Generate engagement time series
+    points = []
     for i in range(7):
         date = datetime.now() - timedelta(days=i)
         total_engagement = sum(c.engagement_score for c in account.content_history 
                              if datetime.strptime(c.timestamp, "%Y-%m-%d %H:%M:%S") <= date)
-        account.engagement_time_series.append((
-            date.strftime("%Y-%m-%d %H:%M:%S"), 
-            total_engagement
-        ))
+        points.append((date.strftime("%Y-%m-%d %H:%M:%S"), total_engagement))
+    write_engagement(account.name, points)
     
     account.save()
     return account
@@ -0,0 +1,82 @@
+"""Incremental HackerNews crawler backed by a local item cache"""
+import clock
+from collector_runtime import fetch_json, RateLimitExceeded, CircuitOpenError
+from database import write_hn_items, read_hn_items, read_hn_state, write_hn_state
+
+hackernews_base_url = "https://hacker-news.firebaseio.com/v0"
+
+CRAWL_DEPTH = 200              # top stories considered per refresh (the API lists up to 500)
+FETCH_BUDGET = 50              # item requests per refresh
+HOT_STORIES = 30               # top-ranked stories whose scores are kept fresh
+HOT_REFRESH_SECONDS = 15 * 60
+STALE_SECONDS = 6 * 60 * 60    # refetch anything older than this when budget is left over
+
+
+def is_tombstone(item: dict) -> bool:
+    """Cached stand-in for an item that came back null, dead or deleted; it is kept so it isn't refetched"""
+    return item.get("title") is None
+
+
+def plan_fetches(story_ids: list[int], cached: dict[int, dict], updated: set[int],
+                 last_max_item: int, now: float, budget: int = FETCH_BUDGET) -> list[int]:
+    """Pick which story ids to (re)fetch this refresh, most valuable first"""
+    missing = [i for i in story_ids if i not in cached]
+    # Items above the last seen maxitem are brand new stories; get those before older misses
+    missing.sort(key=lambda i: i <= last_max_item)
+    changed = [i for i in story_ids if i in cached and i in updated]
+    hot = [
+        i for i in story_ids[:HOT_STORIES]
+        if i in cached and not is_tombstone(cached[i]) and now - cached[i]["fetched_at"] >= HOT_REFRESH_SECONDS
+    ]
+    stale = [i for i in story_ids if i in cached and now - cached[i]["fetched_at"] >= STALE_SECONDS]
+
+    plan = []
+    seen = set()
+    for story_id in missing + changed + hot + stale:
+        if story_id not in seen:
+            seen.add(story_id)
+            plan.append(story_id)
+    return plan[:budget]
+
+
+def _fetch_hint(path: str):
+    """Fetch updates.json or maxitem.json; they only sharpen the fetch plan, so failures return None"""
+    try:
+        return fetch_json(f"{hackernews_base_url}/{path}", api="hackernews")
+    except Exception as e:
+        print(f"Error fetching HackerNews {path}, planning without it: {e}")
+        return None
+
+
+def crawl_hackernews(depth: int = CRAWL_DEPTH, budget: int = FETCH_BUDGET) -> list[dict]:
+    """Return the current top stories in rank order, fetching only new, changed or stale items"""
+    story_ids = (fetch_json(f"{hackernews_base_url}/topstories.json", api="hackernews") or [])[:depth]
+    cached = read_hn_items(story_ids)
+
+    updates = _fetch_hint("updates.json") or {}
+    max_item = _fetch_hint("maxitem.json")
+    last_max_item = int(read_hn_state("maxitem") or 0)
+
+    now = clock.time()
+    fetched = []
+    for story_id in plan_fetches(story_ids, cached, set(updates.get("items", [])), last_max_item, now, budget):
+        try:
+            item = fetch_json(f"{hackernews_base_url}/item/{story_id}.json", api="hackernews")
+        except (RateLimitExceeded, CircuitOpenError) as e:
+            print(f"Stopping HackerNews crawl after {len(fetched)} items: {e}")
+            break
+        except Exception as e:
+            print(f"Error fetching HackerNews item {story_id}: {e}")
+            continue
+        if not item or item.get("dead") or item.get("deleted"):
+            item = {"id": story_id}
+        fetched.append(item)
+
+    if fetched:
+        write_hn_items(fetched, now)
+        for item in fetched:
+            cached[item["id"]] = {**item, "fetched_at": now}
+    if max_item:
+        write_hn_state("maxitem", str(max_item))
+
+    return [cached[i] for i in story_ids if i in cached and not is_tombstone(cached[i])]
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""OpenAI-compatible stub that records chat completions to a cassette and replays them offline.
+
+Point the curator at it with LLM_BASE_URL (see curator.get_model); every model then goes through
+the stub's /v1/chat/completions.
+
+    python llm_replay.py record cassette.jsonl [--port 8766]
+        forwards each request to the real provider for its model and appends the exchange
+    python llm_replay.py replay cassette.jsonl [--port 8766] [--latency recorded|MS] [--scale 1.0]
+        answers from the cassette, waiting the recorded (or a fixed) latency
+    python llm_replay.py bench cassette.jsonl [--cycles 4] [--curators Alex,Sam] [--latency MS] [--workdir DIR]
+        replays full ContentCurator cycles (agents, MCP servers, database) and reports cycle times
+
+Requests are matched on their content with timestamps masked, falling back to the model, message
+count, last message role and tool set, so prompts that embed the current time still replay.
+Responses recorded for a key are handed out in order and wrap around.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from serialization import dumpb, loads
+
+DEFAULT_PORT = 8766
+# Provider endpoints recording forwards to, matching curator.get_model
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai"
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+UPSTREAM_TIMEOUT = 300
+# Request fields that don't change what the model answers
+IGNORED_FIELDS = ("stream_options", "metadata", "store", "user", "extra_headers")
+VOLATILE = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?|\d{14}")
+
+
+def request_keys(request: dict) -> tuple[str, str]:
+    """Exact key (content with timestamps masked) and fallback key (shape of the conversation)"""
+    canonical = {k: v for k, v in request.items() if k not in IGNORED_FIELDS}
+    masked = VOLATILE.sub("<ts>", dumpb(canonical).decode())
+    exact = hashlib.sha256(masked.encode()).hexdigest()
+    messages = request.get("messages", [])
+    tools = sorted(tool.get("function", {}).get("name", "") for tool in request.get("tools") or [])
+    shape = [request.get("model"), len(messages), messages[-1].get("role") if messages else None, tools]
+    return exact, hashlib.sha256(dumpb(shape)).hexdigest()
+
+
+def upstream_for(model: str) -> tuple[str, str | None]:
+    """Provider base URL and API key for a model, chosen as in curator.get_model"""
+    if "groq" in model:
+        return GROQ_BASE_URL, os.getenv("GROQ_API_KEY")
+    if "gemini" in model:
+        return GEMINI_BASE_URL, os.getenv("GOOGLE_API_KEY")
+    if model.startswith("gpt-"):
+        return OPENAI_BASE_URL, os.getenv("OPENAI_API_KEY")
+    raise ValueError(f"Model {model} is not supported.")
+
+
+class Cassette:
+    """Recorded exchanges, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.exact = defaultdict(list)
+        self.fallback = defaultdict(list)
+        self._next = defaultdict(int)
+        self.hits = {"exact": 0, "fallback": 0, "miss": 0}
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(loads(line))
+
+    def _index(self, entry: dict) -> None:
+        self.exact[entry["key"]].append(entry)
+        self.fallback[entry["fallback_key"]].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.exact.values())
+
+    def record(self, request: dict, response: dict, latency_ms: float) -> None:
+        exact, fallback = request_keys(request)
+        entry = {
+            "key": exact, "fallback_key": fallback, "model": request.get("model"),
+            "latency_ms": round(latency_ms, 1), "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "request": request, "response": response,
+        }
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(dumpb(entry) + b"\n")
+            self._index(entry)
+
+    def lookup(self, request: dict) -> dict | None:
+        exact, fallback = request_keys(request)
+        with self._lock:
+            for kind, key, entries in (("exact", exact, self.exact), ("fallback", fallback, self.fallback)):
+                if entries.get(key):
+                    index = self._next[(kind, key)]
+                    self._next[(kind, key)] = index + 1
+                    self.hits[kind] += 1
+                    return entries[key][index % len(entries[key])]
+            self.hits["miss"] += 1
+            return None
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    cassette: Cassette
+    recording = False
+    latency_ms: float | None = None    # None replays the recorded latency
+    latency_scale = 1.0
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            models = sorted({entry["model"] for entries in self.cassette.exact.values() for entry in entries})
+            self._send(200, {"object": "list", "data": [{"id": m, "object": "model"} for m in models]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if request.get("stream"):
+            self._send(400, {"error": {"message": "Streaming is not supported by the replay stub"}})
+            return
+        if self.recording:
+            self._forward(request)
+            return
+        entry = self.cassette.lookup(request)
+        if entry is None:
+            # 400 rather than 5xx, so the client fails fast instead of retrying
+            self._send(400, {"error": {"message": "No recorded response matches this request",
+                                       "type": "cassette_miss"}})
+            return
+        delay_ms = entry["latency_ms"] if self.latency_ms is None else self.latency_ms
+        time.sleep(delay_ms * self.latency_scale / 1000)
+        self._send(200, entry["response"])
+
+    def _forward(self, request: dict) -> None:
+        try:
+            base_url, api_key = upstream_for(request.get("model", ""))
+        except ValueError as e:
+            self._send(400, {"error": {"message": str(e)}})
+            return
+        start = time.perf_counter()
+        try:
+            response = requests.post(f"{base_url}/chat/completions", data=dumpb(request), timeout=UPSTREAM_TIMEOUT,
+                                     headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error forwarding to {base_url}: {e}", file=sys.stderr)
+            self._send(502, {"error": {"message": f"Upstream error: {e}"}})
+            return
+        latency_ms = (time.perf_counter() - start) * 1000
+        if response.ok:
+            self.cassette.record(request, body, latency_ms)
+        self._send(response.status_code, body)
+
+    def _send(self, status: int, body: dict) -> None:
+        data = dumpb(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(cassette: Cassette, host: str = "127.0.0.1", port: int = DEFAULT_PORT, recording: bool = False,
+          latency_ms: float | None = None, latency_scale: float = 1.0) -> ThreadingHTTPServer:
+    handler = type("Handler", (ReplayHandler,), {
+        "cassette": cassette, "recording": recording, "latency_ms": latency_ms, "latency_scale": latency_scale,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def parse_latency(value: str) -> float | None:
+    return None if value == "recorded" else float(value)
+
+
+async def run_cycles(curators: list[str], model: str, cycles: int) -> list[dict]:
+    """Run every curator through `cycles` cycles concurrently, as the floor does; returns per-cycle timings"""
+    from curator import ContentCurator
+
+    timings = []
+
+    async def run_curator(name: str):
+        curator = ContentCurator(name, model)
+        for _ in range(cycles):
+            mode = curator.mode
+            start = time.perf_counter()
+            await curator.run()
+            timings.append({"curator": name, "mode": mode, "seconds": time.perf_counter() - start})
+
+    await asyncio.gather(*(run_curator(name) for name in curators))
+    return timings
+
+
+def bench(cassette_path: str, curators: list[str], model: str, cycles: int, port: int,
+          latency_ms: float | None, latency_scale: float, workdir: str | None = None) -> None:
+    cassette = Cassette(cassette_path)
+    if not len(cassette):
+        sys.exit(f"Cassette {cassette_path} is empty; record one first")
+    server = serve(cassette, port=port, latency_ms=latency_ms, latency_scale=latency_scale)
+    threading.Thread(target=server.serve_forever, name="llm-replay", daemon=True).start()
+    # curator.get_model reads this when curator is imported
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+
+    # The curator and the MCP servers it starts use profiles.db in the working directory, so
+    # move to a scratch one before importing anything that opens it, and store today's trends there
+    os.chdir(workdir or tempfile.mkdtemp(prefix="curator-bench-"))
+    print(f"Bench database: {os.path.abspath('profiles.db')}")
+    from memory_tracking import seed_trends
+    seed_trends()
+    # Email stays in the scratch outbox: digests wait a day, and Resend calls would reach this stub's 404
+    from mcp_servers import resend_mcp
+    resend_mcp["env"].update({"EMAIL_DIGEST_WINDOW": "86400", "RESEND_API_URL": f"http://127.0.0.1:{port}"})
+
+    from agents import set_trace_processors
+    from tracers import LogTracer
+    set_trace_processors([LogTracer()])
+
+    start = time.perf_counter()
+    timings = asyncio.run(run_cycles(curators, model, cycles))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    durations = np.array([t["seconds"] for t in timings])
+    print(f"\n{len(timings)} cycles in {elapsed:.1f}s: {len(timings) / elapsed * 60:.1f} cycles/min")
+    print(f"cycle time p50 {np.percentile(durations, 50):.2f}s  p95 {np.percentile(durations, 95):.2f}s  "
+          f"max {durations.max():.2f}s")
+    by_mode = defaultdict(list)
+    for timing in timings:
+        by_mode[timing["mode"]].append(timing["seconds"])
+    for mode, seconds in sorted(by_mode.items()):
+        print(f"  {mode:<18} {len(seconds):>3} runs  p50 {np.percentile(seconds, 50):.2f}s")
+    hits = cassette.hits
+    print(f"cassette: {hits['exact']} exact, {hits['fallback']} fallback, {hits['miss']} missed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay LLM chat completions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("record", "replay", "bench"):
+        sub = commands.add_parser(command)
+        sub.add_argument("cassette")
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+        if command != "record":
+            sub.add_argument("--latency", type=parse_latency, default=None,
+                             help='"recorded" (default) or a fixed latency in ms')
+            sub.add_argument("--scale", type=float, default=1.0, help="multiply every replayed latency")
+        if command == "bench":
+            sub.add_argument("--cycles", type=int, default=4, help="cycles per curator")
+            sub.add_argument("--curators", default="Alex,Sam,Timi")
+            sub.add_argument("--model", default="gpt-4o-mini")
+            sub.add_argument("--no-web-search", action="store_true",
+                             help="run without the Brave search server (record with CURATOR_WEB_SEARCH=0 too)")
+            sub.add_argument("--workdir", help="directory for the scratch database (default: a temp dir)")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        if args.no_web_search:
+            os.environ["CURATOR_WEB_SEARCH"] = "0"
+        bench(os.path.abspath(args.cassette), args.curators.split(","), args.model, args.cycles, args.port,
+              args.latency, args.scale, args.workdir)
+        return
+    cassette = Cassette(args.cassette)
+    recording = args.command == "record"
+    server = serve(cassette, port=args.port, recording=recording,
+                   latency_ms=None if recording else args.latency, latency_scale=1.0 if recording else args.scale)
+    print(f"{'Recording to' if recording else 'Replaying'} {args.cassette} ({len(cassette)} exchanges) "
+          f"on http://127.0.0.1:{args.port}/v1 - set LLM_BASE_URL to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    if not recording:
+        print(f"cassette: {cassette.hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Scripted load against the real stdio MCP servers, no LLM involved.
+
+Virtual curators run tool-call sequences in a closed loop: either the synthetic content cycle
+(report -> trend score -> create_content -> publish -> send_email) or the tool calls recorded in an
+llm_replay cassette. Results are per tool: throughput, latency percentiles and error rate.
+
+    python mcp_loadgen.py run [--curators 8] [--seconds 30] [--cassette c.jsonl] [--isolated] [--workdir DIR]
+    python mcp_loadgen.py saturate [--start 1] [--max 128] [--seconds 15] [--workdir DIR]
+
+saturate doubles the number of virtual curators until throughput stops growing and reports the knee.
+The servers run in a scratch working directory, so accounts, posts, trends and the email outbox are
+those of a throwaway profiles.db; email is queued in digest mode, so nothing is sent to Resend.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+
+import numpy as np
+from agents.mcp import MCPServerStdio
+
+from content_floor import names
+from mcp_servers import content_accounts_mcp, trends_mcp, content_publishing_mcp, resend_mcp
+from memory_tracking import SOAK_TOPICS, seed_trends
+from serialization import dumps, loads
+from tool_metrics import is_error_result
+
+SERVER_PARAMS = {
+    "accounts": content_accounts_mcp,
+    "trends": trends_mcp,
+    "publishing": content_publishing_mcp,
+    # A long digest window keeps send_email to an outbox insert
+    "email": {**resend_mcp, "env": {**resend_mcp["env"], "EMAIL_DIGEST_WINDOW": "86400"}},
+}
+SESSION_TIMEOUT = 120
+SATURATION_GAIN = 1.10   # a stage must beat the previous one's throughput by 10% to count as scaling
+PLATFORMS = ["twitter", "linkedin", "blog", "newsletter"]
+
+
+def content_cycle(curator: str, rng: random.Random) -> list[tuple[str, str, dict]]:
+    """The tool calls of one content-creation cycle, as (server, tool, arguments)"""
+    topic = rng.choice(SOAK_TOPICS)
+    platform = rng.choice(PLATFORMS)
+    return [
+        ("accounts", "get_content_account_report", {"name": curator}),
+        ("trends", "get_trend_score", {"topic": topic}),
+        ("accounts", "add_content_credits", {"name": curator, "amount": 1}),
+        ("accounts", "create_content", {"name": curator, "topic": topic, "platform": platform,
+                                        "content_type": "post", "rationale": "Load test"}),
+        ("publishing", "publish_to_twitter", {"content": f"{topic} #{rng.randrange(10**6)}", "account": curator}),
+        ("email", "send_email", {"to_email": f"{curator}@example.com", "subject": f"New post: {topic}",
+                                 "html_content": f"<p>Published a post about {topic}</p>"}),
+    ]
+
+
+def cassette_calls(path: str) -> list[tuple[str, dict]]:
+    """Tool calls the model made in an llm_replay cassette, in recorded order"""
+    calls = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for choice in loads(line)["response"].get("choices", []):
+                for call in choice.get("message", {}).get("tool_calls") or []:
+                    function = call["function"]
+                    calls.append((function["name"], loads(function["arguments"] or "{}")))
+    return calls
+
+
+class LoadRun:
+    """Per-tool latencies and errors for one stage"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.examples = {}
+
+    def record(self, tool: str, seconds: float, error: str | None) -> None:
+        self.latencies[tool].append(seconds * 1000)
+        if error:
+            self.errors[tool] += 1
+            self.examples.setdefault(tool, error[:200])
+
+    def summary(self, elapsed: float) -> dict:
+        tools = {}
+        for tool, latencies in sorted(self.latencies.items()):
+            values = np.array(latencies)
+            tools[tool] = {
+                "calls": len(values),
+                "errors": self.errors[tool],
+                "error_rate": round(self.errors[tool] / len(values), 4),
+                "per_second": round(len(values) / elapsed, 2),
+                "p50_ms": round(float(np.percentile(values, 50)), 1),
+                "p95_ms": round(float(np.percentile(values, 95)), 1),
+                "p99_ms": round(float(np.percentile(values, 99)), 1),
+                "max_ms": round(float(values.max()), 1),
+            }
+        calls = sum(tool["calls"] for tool in tools.values())
+        all_latencies = np.concatenate([np.array(v) for v in self.latencies.values()]) if calls else np.zeros(1)
+        return {
+            "seconds": round(elapsed, 1),
+            "calls": calls,
+            "errors": sum(self.errors.values()),
+            "per_second": round(calls / elapsed, 2),
+            "p50_ms": round(float(np.percentile(all_latencies, 50)), 1),
+            "p95_ms": round(float(np.percentile(all_latencies, 95)), 1),
+            "tools": tools,
+            "error_examples": self.examples,
+        }
+
+
+async def start_servers(stack: AsyncExitStack, keys) -> dict[str, MCPServerStdio]:
+    servers = {}
+    for key in keys:
+        servers[key] = await stack.enter_async_context(
+            MCPServerStdio(SERVER_PARAMS[key], client_session_timeout_seconds=SESSION_TIMEOUT, name=key)
+        )
+    return servers
+
+
+async def tool_servers(servers: dict[str, MCPServerStdio]) -> dict[str, str]:
+    """Which server offers each tool"""
+    return {tool.name: key for key, server in servers.items() for tool in await server.list_tools()}
+
+
+async def call(server: MCPServerStdio, tool: str, arguments: dict, run: LoadRun) -> None:
+    start = time.perf_counter()
+    error = None
+    try:
+        result = await server.call_tool(tool, arguments)
+        text = "".join(getattr(item, "text", "") for item in result.content)
+        if result.isError:
+            error = text or "tool error"
+        elif is_error_result(text):
+            error = text
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    run.record(tool, time.perf_counter() - start, error)
+
+
+async def virtual_curator(index: int, servers: dict[str, MCPServerStdio], deadline: float, run: LoadRun,
+                          recorded: list[tuple[str, dict]] | None, tool_map: dict[str, str],
+                          think_time: float) -> None:
+    curator = names[index % len(names)].lower()
+    rng = random.Random(index)
+    position = rng.randrange(len(recorded)) if recorded else 0
+    while time.monotonic() < deadline:
+        if recorded:
+            tool, arguments = recorded[position % len(recorded)]
+            position += 1
+            steps = [(tool_map[tool], tool, arguments)]
+        else:
+            steps = content_cycle(curator, rng)
+        for key, tool, arguments in steps:
+            if time.monotonic() >= deadline:
+                return
+            await call(servers[key], tool, arguments, run)
+            if think_time:
+                await asyncio.sleep(think_time)
+
+
+async def run_stage(curators: int, seconds: float, cassette: str | None = None, isolated: bool = False,
+                    think_time: float = 0.0, servers: dict[str, MCPServerStdio] | None = None) -> dict:
+    """Run `curators` virtual curators for `seconds`; shared servers unless isolated (a set per curator,
+    as real curator cycles start their own)"""
+    recorded = cassette_calls(cassette) if cassette else None
+    run = LoadRun()
+    async with AsyncExitStack() as stack:
+        if isolated:
+            server_sets = [await start_servers(stack, SERVER_PARAMS) for _ in range(curators)]
+        else:
+            shared = servers or await start_servers(stack, SERVER_PARAMS)
+            server_sets = [shared] * curators
+        tool_map = await tool_servers(server_sets[0])
+        if recorded:
+            missing = sorted({tool for tool, _ in recorded} - set(tool_map))
+            if missing:
+                print(f"Skipping recorded tools no local server offers: {', '.join(missing)}")
+            recorded = [(tool, arguments) for tool, arguments in recorded if tool in tool_map]
+            if not recorded:
+                raise ValueError(f"No tool calls in {cassette} can be served locally")
+        start = time.monotonic()
+        deadline = start + seconds
+        await asyncio.gather(*(
+            virtual_curator(i, server_sets[i], deadline, run, recorded, tool_map, think_time)
+            for i in range(curators)
+        ))
+        elapsed = time.monotonic() - start
+    summary = run.summary(elapsed)
+    summary["curators"] = curators
+    return summary
+
+
+async def saturate(start: int, maximum: int, seconds: float, cassette: str | None, think_time: float) -> dict:
+    """Double the load until throughput stops scaling; the knee is the last stage that still scaled"""
+    stages = []
+    knee = None
+    async with AsyncExitStack() as stack:
+        servers = await start_servers(stack, SERVER_PARAMS)
+        curators = start
+        while curators <= maximum:
+            stage = await run_stage(curators, seconds, cassette, think_time=think_time, servers=servers)
+            stages.append(stage)
+            print_stage(stage)
+            if knee is not None and stage["per_second"] < knee["per_second"] * SATURATION_GAIN:
+                break
+            knee = stage
+            curators *= 2
+    return {"stages": stages, "saturation": {"curators": knee["curators"], "per_second": knee["per_second"],
+                                             "p95_ms": knee["p95_ms"]}}
+
+
+def print_stage(stage: dict) -> None:
+    print(f"\n{stage['curators']} curators, {stage['seconds']}s: {stage['calls']} calls, "
+          f"{stage['per_second']:.1f}/s, p50 {stage['p50_ms']:.0f} ms, p95 {stage['p95_ms']:.0f} ms, "
+          f"{stage['errors']} errors")
+    print(f"  {'tool':<32}{'calls':>7}{'/s':>8}{'err%':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for tool, stats in stage["tools"].items():
+        print(f"  {tool:<32}{stats['calls']:>7}{stats['per_second']:>8.1f}{stats['error_rate']:>7.1%}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}")
+    for tool, example in stage["error_examples"].items():
+        print(f"  first {tool} error: {example}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the MCP servers with scripted tool calls")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("run", "saturate"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--seconds", type=float, default=30 if command == "run" else 15)
+        sub.add_argument("--cassette", help="replay the tool calls recorded in an llm_replay cassette")
+        sub.add_argument("--think-ms", type=float, default=0.0, help="pause between a curator's calls")
+        sub.add_argument("--seed-trends", action="store_true",
+                         help="store synthetic trends for today so trend tools don't crawl the sources")
+        sub.add_argument("--json", help="also write the results to this file")
+        sub.add_argument("--workdir", help="directory for the scratch database (default: a temp dir)")
+        if command == "run":
+            sub.add_argument("--curators", type=int, default=8)
+            sub.add_argument("--isolated", action="store_true", help="one set of servers per curator")
+        else:
+            sub.add_argument("--start", type=int, default=1)
+            sub.add_argument("--max", type=int, default=128)
+    args = parser.parse_args()
+    cassette = args.cassette and os.path.abspath(args.cassette)
+    json_path = args.json and os.path.abspath(args.json)
+
+    # The servers open profiles.db in the working directory they inherit, so load them in a scratch one
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="curator-load-"))
+    print(f"Load test database: {os.path.abspath('profiles.db')}")
+    if args.seed_trends:
+        seed_trends()
+    think_time = args.think_ms / 1000
+    if args.command == "run":
+        result = asyncio.run(run_stage(args.curators, args.seconds, cassette, args.isolated, think_time))
+        print_stage(result)
+    else:
+        result = asyncio.run(saturate(args.start, args.max, args.seconds, cassette, think_time))
+        knee = result["saturation"]
+        print(f"\nSaturation at about {knee['curators']} concurrent curators: "
+              f"{knee['per_second']:.1f} calls/s, p95 {knee['p95_ms']:.0f} ms")
+    if json_path:
+        with open(json_path, "w") as f:
+            f.write(dumps(result, pretty=True))
+
+
+if __name__ == "__main__":
+    main()
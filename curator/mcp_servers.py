@@ -31,22 +31,33 @@ reddit_env = _make_env({
 twitter_env = _make_env({"TWITTER_BEARER_TOKEN": twitter_bearer_token})
 youtube_env = _make_env({"YOUTUBE_API_KEY": youtube_api_key})
 
+# The MCP client starts servers with only a handful of variables from our environment, so profiling
+# switched on with CURATOR_PROFILE (see profiling.py) is passed on to each curator server explicitly
+profiling_env = _make_env({
+    "CURATOR_PROFILE": os.getenv("CURATOR_PROFILE"),
+    "PROFILE_DIR": os.getenv("PROFILE_DIR"),
+    "PROFILE_KEEP": os.getenv("PROFILE_KEEP"),
+})
+
 # Merge envs for trends server (only non-empty keys)
-trends_env = {}
+trends_env = dict(profiling_env)
 for e in (reddit_env, twitter_env, youtube_env, brave_env):
     trends_env.update(e)
 
 # -------------------------
 # MCP server commands
 # -------------------------
+# Scripts are given by absolute path so the servers can run in another working directory
+# (their database is profiles.db in the working directory they inherit)
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
 
-content_accounts_mcp = {"command": "python", "args": ["profiles_server.py"], "env": {}}  
-trends_mcp = {"command": "python", "args": ["trends_server.py"], "env": trends_env}
-content_publishing_mcp = {"command": "python", "args": ["content_server.py"], "env": _make_env({
+content_accounts_mcp = {"command": "python", "args": [os.path.join(SERVER_DIR, "profiles_server.py")], "env": dict(profiling_env)}  
+trends_mcp = {"command": "python", "args": [os.path.join(SERVER_DIR, "trends_server.py")], "env": trends_env}
+content_publishing_mcp = {"command": "python", "args": [os.path.join(SERVER_DIR, "content_server.py")], "env": {**profiling_env, **_make_env({
     "TWITTER_BEARER_TOKEN": twitter_bearer_token,
     "YOUTUBE_API_KEY": youtube_api_key
-})}
-resend_mcp = {"command": "python", "args": ["resend_server.py"], "env": {}}
+})}}
+resend_mcp = {"command": "python", "args": [os.path.join(SERVER_DIR, "resend_server.py")], "env": dict(profiling_env)}
 
 curator_mcp_server_params = [
     content_accounts_mcp,
@@ -60,6 +71,9 @@ curator_mcp_server_params = [
 # -------------------------
 def researcher_mcp_server_params(name: str):
     """Parameters to start supporting only the Brave Search MCP server."""
+    if os.getenv("CURATOR_WEB_SEARCH", "1") == "0":
+        # Offline runs (e.g. llm_replay benchmarks) skip the search server, which needs npx and the network
+        return []
     params = [{
         "command": "npx",
         "args": ["-y", "@modelcontextprotocol/server-brave-search"],
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Memory growth tracking for long-running curator processes.
+
+With CURATOR_MEMORY_TRACKING=1 the curator takes a tracemalloc snapshot after every cycle, diffs it
+against the previous one and prints the top allocation sites alongside traced memory and RSS.
+
+The soak command runs simulated curator cycles (accounts, publishing and tracing, no LLM or network)
+against a scratch database and fails if memory keeps growing per cycle once warmed up:
+
+    python memory_tracking.py soak [--cycles 1000] [--threshold-kb 1.0] [--warmup 100]
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+import numpy as np
+
+MEMORY_TRACKING = os.getenv("CURATOR_MEMORY_TRACKING", "").lower() in ("1", "true", "yes")
+TRACE_FRAMES = int(os.getenv("CURATOR_MEMORY_FRAMES", "1"))
+TOP_SITES = 10
+# Allocations made by the tracking itself or by imports are not growth in the curator
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> int:
+    """Current resident set size; peak RSS where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def growth_per_cycle(values) -> float:
+    """Least-squares slope of a per-cycle series, in units per cycle"""
+    if len(values) < 2:
+        return 0.0
+    return float(np.polyfit(np.arange(len(values)), np.array(values, dtype=np.float64), 1)[0])
+
+
+class MemoryTracker:
+    """Traced memory and RSS per cycle, with the allocation sites that grew most since the last snapshot"""
+
+    def __init__(self, top: int = TOP_SITES, frames: int = TRACE_FRAMES):
+        self.top = top
+        self.frames = frames
+        # Per-cycle history kept in flat arrays so the tracker's own growth stays negligible
+        self.traced = array("q")
+        self.rss = array("q")
+        self._previous = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._previous = self._snapshot()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(IGNORED)
+
+    def cycle(self, label: str = "", snapshot: bool = True) -> dict:
+        """Record the end of a cycle; with snapshot, also diff allocation sites against the last snapshot"""
+        if self._previous is None:
+            self.start()
+        # Only count what is still reachable, not cyclic garbage waiting for the next collection
+        gc.collect()
+        traced, peak = tracemalloc.get_traced_memory()
+        record = {
+            "cycle": len(self.traced) + 1,
+            "label": label,
+            "time": time.time(),
+            "traced_bytes": traced,
+            "peak_traced_bytes": peak,
+            "rss_bytes": rss_bytes(),
+            "top": [],
+        }
+        if snapshot:
+            current = self._snapshot()
+            record["top"] = [
+                {
+                    "site": str(stat.traceback[0]),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                }
+                for stat in current.compare_to(self._previous, "lineno")[:self.top]
+                if stat.size_diff
+            ]
+            self._previous = current
+        self.traced.append(traced)
+        self.rss.append(record["rss_bytes"])
+        return record
+
+    def report(self, warmup: int = 0) -> dict:
+        """Growth per cycle of traced memory and RSS, ignoring the first `warmup` cycles"""
+        traced, rss = self.traced[warmup:], self.rss[warmup:]
+        return {
+            "cycles": len(traced),
+            "traced_growth_per_cycle": growth_per_cycle(traced),
+            "rss_growth_per_cycle": growth_per_cycle(rss),
+            "traced_bytes": traced[-1] if traced else 0,
+            "rss_bytes": rss[-1] if rss else 0,
+        }
+
+
+def format_cycle(record: dict, previous_traced: int | None = None) -> str:
+    traced_change = record["traced_bytes"] - previous_traced if previous_traced is not None else 0
+    lines = [
+        f"Memory after cycle {record['cycle']} {record['label']}: traced {record['traced_bytes'] / 2**20:.1f} MiB "
+        f"({traced_change / 1024:+.1f} KiB), RSS {record['rss_bytes'] / 2**20:.1f} MiB"
+    ]
+    for site in record["top"]:
+        lines.append(f"  {site['size_diff'] / 1024:+9.1f} KiB {site['count_diff']:+7d} blocks  {site['site']}")
+    return "\n".join(lines)
+
+
+memory_tracker = MemoryTracker() if MEMORY_TRACKING else None
+
+
+def track_cycle(label: str) -> None:
+    """Log memory at the end of a curator cycle, if tracking is on"""
+    if memory_tracker is None:
+        return
+    previous = memory_tracker.traced[-1] if memory_tracker.traced else None
+    print(format_cycle(memory_tracker.cycle(label), previous))
+
+
+# ---- Soak test ----
+
+SOAK_TOPICS = [
+    "LLM reasoning benchmarks", "Open-weight model releases", "AI agents in production",
+    "EU AI Act enforcement", "Multimodal models", "AI chip supply", "Retrieval augmented generation",
+]
+SOAK_MODES = ["content_creation", "review", "research_only", "analytics"]
+
+
+def seed_trends() -> None:
+    """Store today's trends so trend scoring never goes to the network"""
+    from trends import TrendSnapshot
+    from database import write_trends
+
+    today = time.strftime("%Y-%m-%d")
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    values = np.arange(len(SOAK_TOPICS) * 2, dtype=np.float64).reshape(len(SOAK_TOPICS), 2) * 100
+    snapshot = TrendSnapshot(SOAK_TOPICS, ["reddit", "hackernews"], values,
+                             np.linspace(20, 90, len(SOAK_TOPICS)), [stamp] * len(SOAK_TOPICS))
+    write_trends(today, snapshot.to_bytes())
+
+
+def simulated_cycle(name: str, mode: str, index: int) -> None:
+    """One curator cycle without the LLM: the account, publishing and tracing work its tools do"""
+    from agents import trace, custom_span
+    from tracers import make_trace_id
+    from profiles import ContentAccount
+    import content_server
+
+    topic = SOAK_TOPICS[index % len(SOAK_TOPICS)]
+    with trace(f"{name}-{mode}", trace_id=make_trace_id(name.lower())):
+        with custom_span("soak_cycle", data={"mode": mode}):
+            account = ContentAccount.get(name)
+            if account.credits < 2:
+                account.add_credits(100)
+            if mode == "content_creation":
+                account.create_content(topic, "twitter", "post", "Soak test")
+                content_server.publish_to_twitter(f"{topic} #{index}", account=name.lower())
+                content_server.publish_to_blog(topic, f"Soak test post {index} about {topic}",
+                                               account=name.lower())
+            elif mode == "review":
+                account.report()
+                content_server.get_publishing_history("all", limit=10)
+            elif mode == "research_only":
+                account.find_content_by_topic(topic)
+            else:
+                account.analyze_performance()
+                account.get_engagement_time_series(days=30, max_points=120)
+
+
+def soak(cycles: int, threshold_kb: float, warmup: int, snapshot_every: int) -> bool:
+    """Run simulated cycles round-robin over the curators; True if growth stays under the threshold"""
+    from agents import set_trace_processors
+    from content_floor import names
+    from tracers import LogTracer
+
+    seed_trends()
+    set_trace_processors([LogTracer()])
+    tracker = MemoryTracker()
+    tracker.start()
+    for index in range(cycles):
+        name = names[index % len(names)]
+        mode = SOAK_MODES[(index // len(names)) % len(SOAK_MODES)]
+        simulated_cycle(name, mode, index)
+        snapshot = (index + 1) % snapshot_every == 0 or index + 1 == cycles
+        previous = tracker.traced[-snapshot_every] if len(tracker.traced) >= snapshot_every else None
+        record = tracker.cycle(f"{name}-{mode}", snapshot=snapshot)
+        if snapshot:
+            print(format_cycle(record, previous))
+
+    report = tracker.report(warmup)
+    growth_kb = report["traced_growth_per_cycle"] / 1024
+    print(f"\n{report['cycles']} cycles after {warmup} warm-up: traced memory {growth_kb:+.2f} KiB/cycle, "
+          f"RSS {report['rss_growth_per_cycle'] / 1024:+.2f} KiB/cycle "
+          f"(now {report['traced_bytes'] / 2**20:.1f} MiB traced, {report['rss_bytes'] / 2**20:.1f} MiB RSS)")
+    passed = growth_kb <= threshold_kb
+    print(f"{'PASS' if passed else 'FAIL'}: threshold {threshold_kb:.2f} KiB/cycle")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Curator memory growth tracking")
+    commands = parser.add_subparsers(dest="command", required=True)
+    soak_parser = commands.add_parser("soak", help="simulated cycles against a scratch database")
+    soak_parser.add_argument("--cycles", type=int, default=1000)
+    soak_parser.add_argument("--threshold-kb", type=float, default=1.0,
+                             help="fail if traced memory grows more than this per cycle")
+    soak_parser.add_argument("--warmup", type=int, default=100, help="cycles left out of the growth fit")
+    soak_parser.add_argument("--snapshot-every", type=int, default=100,
+                             help="cycles between allocation-site snapshots")
+    soak_parser.add_argument("--workdir", help="directory for the scratch database (default: a temp dir)")
+    args = parser.parse_args()
+
+    # database.py opens profiles.db in the working directory, so move before importing it
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="curator-soak-"))
+    print(f"Soak database: {os.path.abspath('profiles.db')}")
+    passed = soak(args.cycles, args.threshold_kb, args.warmup, args.snapshot_every)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
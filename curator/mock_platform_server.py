@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Local stand-in for the social platforms' metrics APIs, for exercising the engagement poller.
+
+GET /<platform>/metrics?ids=a,b,c returns {"metrics": {id: {"views", "likes", "shares", "comments"}}}.
+Engagement for a post follows a deterministic curve that saturates as the post ages.
+Point the engagement poller at it with PLATFORM_METRICS_URL=http://127.0.0.1:8765.
+"""
+import argparse
+import hashlib
+import math
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from serialization import dumpb
+
+PLATFORM_REACH = {"twitter": 1.2, "linkedin": 0.8, "blog": 1.5, "newsletter": 1.0}
+GROWTH_HOURS = 6.0  # time constant of the engagement curve
+
+
+def post_metrics(post_id: str, platform: str, now: datetime) -> dict | None:
+    """Metrics for a post id of the form <platform>_<seq>_<YYYYmmddHHMMSS>"""
+    try:
+        published_at = datetime.strptime(post_id.rsplit("_", 1)[1], "%Y%m%d%H%M%S")
+    except (IndexError, ValueError):
+        return None
+    age_hours = max(0.0, (now - published_at).total_seconds() / 3600)
+    seed = int(hashlib.sha256(post_id.encode()).hexdigest()[:8], 16)
+    peak_views = (200 + seed % 5000) * PLATFORM_REACH.get(platform, 1.0)
+    views = peak_views * (1 - math.exp(-age_hours / GROWTH_HOURS))
+    return {
+        "views": int(views),
+        "likes": int(views * 0.05),
+        "shares": int(views * 0.01),
+        "comments": int(views * 0.005),
+    }
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 2 or parts[1] != "metrics":
+            self.send_error(404)
+            return
+        platform = parts[0]
+        ids = [i for i in parse_qs(url.query).get("ids", [""])[0].split(",") if i]
+        now = datetime.now()
+        metrics = {}
+        for post_id in ids:
+            values = post_metrics(post_id, platform, now)
+            if values is not None:
+                metrics[post_id] = values
+        body = dumpb({"metrics": metrics})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), MetricsHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock platform metrics API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    print(f"Serving mock platform metrics on http://{args.host}:{args.port}")
+    serve(args.host, args.port).serve_forever()
@@ -1,9 +1,16 @@
 from pydantic import BaseModel
-import json
+from serialization import dumps
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
+import clock
 from trends import get_trend_score_with_fallback
-from database import write_profile, read_profile, write_log
+from database import (
+    write_profile, read_profile, write_log,
+    write_engagement, read_engagement, delete_engagement,
+    write_topic_grams, read_topic_positions, read_topic_index_size, delete_topic_index,
+    read_observed_engagement, add_observed_engagement, delete_observed_engagement,
+)
+from topic_index import topic_grams, query_grams, matches
 from typing import List
 
 load_dotenv(override=True)
@@ -31,7 +38,6 @@ class ContentAccount(BaseModel):
     credits: float
     strategy: str
     content_history: List[ContentPiece]
-    engagement_time_series: list[tuple[str, float]]
     platform_stats: dict[str, dict]  
     topic_coverage: dict[str, int]  
 
@@ -44,7 +50,6 @@ class ContentAccount(BaseModel):
                 "credits": INITIAL_CREDITS,
                 "strategy": "",
                 "content_history": [],
-                "engagement_time_series": [],
                 "platform_stats": {
                     "blog": {"posts": 0, "total_engagement": 0.0},
                     "twitter": {"posts": 0, "total_engagement": 0.0},
@@ -54,7 +59,20 @@ class ContentAccount(BaseModel):
                 "topic_coverage": {}
             }
             write_profile(name, fields)
-        return cls(**fields)
+        legacy_series = fields.pop("engagement_time_series", None)
+        fields.pop("observed_engagement", None)
+        legacy_observed = {platform: stats.pop("observed_engagement")
+                           for platform, stats in fields["platform_stats"].items() if "observed_engagement" in stats}
+        account = cls(**fields)
+        if legacy_series:
+            # Move the series out of the profile blob into the rolled-up store
+            write_engagement(account.name, [tuple(point) for point in legacy_series])
+        if legacy_observed:
+            # Observed engagement is added to by the poller in its own table
+            add_observed_engagement(account.name, legacy_observed)
+        if legacy_series or legacy_observed:
+            account.save()
+        return account
     
     def save(self):
         write_profile(self.name.lower(), self.model_dump())
@@ -63,7 +81,9 @@ class ContentAccount(BaseModel):
         self.credits = INITIAL_CREDITS
         self.strategy = strategy
         self.content_history = []
-        self.engagement_time_series = []
+        delete_topic_index(self.name)
+        delete_engagement(self.name)
+        delete_observed_engagement(self.name)
         self.platform_stats = {
             "blog": {"posts": 0, "total_engagement": 0.0},
             "twitter": {"posts": 0, "total_engagement": 0.0},
@@ -95,7 +115,7 @@ class ContentAccount(BaseModel):
             raise ValueError("Insufficient credits to create content.")
         
         trend_score = get_trend_score_with_fallback(topic)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = clock.now().strftime("%Y-%m-%d %H:%M:%S")
         
         
         platform_multipliers = {
@@ -119,6 +139,7 @@ class ContentAccount(BaseModel):
         )
 
         self.content_history.append(content_piece)
+        self.sync_topic_index()
         self.use_credits(CONTENT_COST)
 
         if platform not in self.platform_stats:
@@ -135,14 +156,14 @@ class ContentAccount(BaseModel):
 
     def skip_content(self, topic: str, rationale: str) -> str:
         """Record a decision to skip content creation for a topic"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = clock.now().strftime("%Y-%m-%d %H:%M:%S")
         write_log(self.name, "content", f"Skipped content for {topic}: {rationale}")
         return f"Content skipped for {topic}. Rationale: {rationale}"
 
     def promote_existing_content(self, topic: str, platform: str, rationale: str) -> str:
         """Promote existing content to a new platform"""
  
-        existing_content = [c for c in self.content_history if topic.lower() in c.topic.lower()]
+        existing_content = self.find_content_by_topic(topic)
         
         if not existing_content:
             raise ValueError(f"No existing content found for topic: {topic}")
@@ -156,6 +177,27 @@ class ContentAccount(BaseModel):
         return self.create_content(topic, platform, "promoted_post", 
                                  f"Promotion: {rationale}")
 
+    def sync_topic_index(self):
+        """Index topics appended to content_history since the index was last written"""
+        indexed = read_topic_index_size(self.name)
+        if indexed > len(self.content_history):
+            delete_topic_index(self.name)
+            indexed = 0
+        if indexed < len(self.content_history):
+            write_topic_grams(self.name, [
+                (position, topic_grams(self.content_history[position].topic))
+                for position in range(indexed, len(self.content_history))
+            ])
+
+    def find_content_by_topic(self, topic: str) -> list[ContentPiece]:
+        """Find content whose topic contains the given text (case-insensitive)"""
+        grams = query_grams(topic)
+        if grams is None:
+            return [c for c in self.content_history if matches(topic, c.topic)]
+        self.sync_topic_index()
+        candidates = read_topic_positions(self.name, grams)
+        return [self.content_history[i] for i in candidates if matches(topic, self.content_history[i].topic)]
+
     def calculate_total_engagement(self) -> float:
         """Calculate total engagement across all content"""
         return sum(content.engagement_score for content in self.content_history)
@@ -167,15 +209,23 @@ class ContentAccount(BaseModel):
         return self.calculate_total_engagement() / len(self.content_history)
 
     def get_platform_performance(self) -> dict[str, float]:
-        """Get engagement performance by platform"""
+        """Get engagement per post by platform: as observed on the platform once any has been polled,
+        as estimated at creation until then"""
+        observed = read_observed_engagement(self.name)
         performance = {}
         for platform, stats in self.platform_stats.items():
             if stats["posts"] > 0:
-                performance[platform] = stats["total_engagement"] / stats["posts"]
+                performance[platform] = (observed.get(platform) or stats["total_engagement"]) / stats["posts"]
             else:
                 performance[platform] = 0.0
         return performance
 
+    def get_platform_stats(self) -> dict[str, dict]:
+        """Platform stats with the engagement observed on each platform alongside the estimate"""
+        observed = read_observed_engagement(self.name)
+        return {platform: {**stats, "observed_engagement": observed.get(platform, 0.0)}
+                for platform, stats in self.platform_stats.items()}
+
     def get_top_topics(self, limit: int = 5) -> list[tuple[str, int]]:
         """Get most covered topics"""
         sorted_topics = sorted(self.topic_coverage.items(), key=lambda x: x[1], reverse=True)
@@ -187,7 +237,7 @@ class ContentAccount(BaseModel):
 
     def get_recent_content(self, days: int = 7) -> list[dict]:
         """Get content created in the last N days as plain dicts (JSON-ready)"""
-        cutoff_date = datetime.now().timestamp() - (days * 24 * 60 * 60)
+        cutoff_date = clock.now().timestamp() - (days * 24 * 60 * 60)
         
         recent_content = [
             content.model_dump()
@@ -197,27 +247,34 @@ class ContentAccount(BaseModel):
         
         return recent_content
 
+    def get_engagement_time_series(self, days: int | None = None, max_points: int | None = None) -> list[tuple[str, float]]:
+        """Get engagement over time, downsampled to at most max_points over the last N days"""
+        since = None
+        bucket_seconds = None
+        if days is not None:
+            since = (clock.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+            if max_points:
+                bucket_seconds = max(1, -(-days * 24 * 60 * 60 // max_points))
+        return read_engagement(self.name, since, bucket_seconds)
 
     def report(self) -> str:
         """Return a JSON string representing the account"""
         total_engagement = self.calculate_total_engagement()
         engagement_rate = self.calculate_engagement_rate()
         
-        self.engagement_time_series.append((
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
-            total_engagement
-        ))
-        self.save()
+        write_engagement(self.name, [(clock.now().strftime("%Y-%m-%d %H:%M:%S"), total_engagement)])
         
         data = self.model_dump()
+        data["platform_stats"] = self.get_platform_stats()
         data["total_engagement"] = total_engagement
+        data["observed_engagement"] = sum(stats["observed_engagement"] for stats in data["platform_stats"].values())
         data["engagement_rate"] = engagement_rate
         data["platform_performance"] = self.get_platform_performance()
         data["top_topics"] = self.get_top_topics()
         data["recent_content_count"] = len(self.get_recent_content())
         
         write_log(self.name, "content_account", "Retrieved account details")
-        return json.dumps(data, indent=2)
+        return dumps(data)
 
     def get_strategy(self) -> str:
         """Return the content strategy of the account"""
@@ -236,15 +293,16 @@ class ContentAccount(BaseModel):
         if not self.content_history:
             return {"message": "No content history to analyze"}
 
+        platform_stats = self.get_platform_stats()
         platform_analysis = {}
-        for platform in self.platform_stats:
-            stats = self.platform_stats[platform]
+        for platform, stats in platform_stats.items():
             if stats["posts"] > 0:
                 avg_engagement = stats["total_engagement"] / stats["posts"]
                 platform_analysis[platform] = {
                     "posts": stats["posts"],
                     "total_engagement": stats["total_engagement"],
-                    "avg_engagement": avg_engagement
+                    "avg_engagement": avg_engagement,
+                    "observed_engagement": stats["observed_engagement"]
                 }
 
         topic_performance = {}
@@ -270,6 +328,7 @@ class ContentAccount(BaseModel):
             "total_content": len(self.content_history),
             "total_engagement": self.calculate_total_engagement(),
             "avg_engagement": self.calculate_engagement_rate(),
+            "observed_engagement": sum(stats["observed_engagement"] for stats in platform_stats.values()),
             "platform_analysis": platform_analysis,
             "topic_performance": topic_performance,
             "credits_remaining": self.credits
@@ -294,4 +353,4 @@ if __name__ == "__main__":
     
     print("\nPerformance Analysis:")
     analysis = account.analyze_performance()
-    print(json.dumps(analysis, indent=2))
\ No newline at end of file
+    print(dumps(analysis, pretty=True))
\ No newline at end of file
@@ -3,10 +3,11 @@ import mcp
 from mcp.client.stdio import stdio_client
 from mcp import StdioServerParameters
 from agents import FunctionTool
-import json
+from serialization import loads
+from mcp_servers import content_accounts_mcp
 
 # Point to your profiles_server.py
-params = StdioServerParameters(command="python", args=["profiles_server.py"], env=None)
+params = StdioServerParameters(command="python", args=content_accounts_mcp["args"], env=None)
 
 
 # ---- Tool Management ----
@@ -55,7 +56,7 @@ async def get_profiles_tools_openai():
             name=tool.name,
             description=tool.description,
             params_json_schema=schema,
-            on_invoke_tool=lambda ctx, args, toolname=tool.name: call_profiles_tool(toolname, json.loads(args))
+            on_invoke_tool=lambda ctx, args, toolname=tool.name: call_profiles_tool(toolname, loads(args))
         )
         openai_tools.append(openai_tool)
     return openai_tools
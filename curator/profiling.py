@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""On-demand cProfile captures of MCP tool calls, curator cycles and dashboard refreshes.
+
+Profiling is off unless a target is switched on, either with CURATOR_PROFILE (comma-separated
+targets, or "all"; mcp_servers.py passes it on to the curator's MCP servers) or at runtime through the
+flag file in the profile directory, which the set_profiling tool and `python profiling.py on|off` write
+so every process picks it up:
+
+    tools     each MCP tool call (traced_tool)
+    curator   each ContentCurator.run cycle
+    refresh   each dashboard refresh
+
+Every profiled call is written to PROFILE_DIR as <target>-<name>-<time>-<pid>-<n>.prof, keeping the
+newest PROFILE_KEEP files. Summaries merge recent files and rank functions by cumulative time:
+
+    python profiling.py summary [--target T] [--files N] [--top N]
+    python profiling.py on [TARGET ...] | off
+"""
+import argparse
+import cProfile
+import glob
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from serialization import dumps
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiling")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+TARGETS = ("tools", "curator", "refresh")
+FLAG_FILE = "enabled"
+FLAG_CHECK_INTERVAL = 1.0     # seconds between looks at the flag file
+
+
+def _parse_targets(value: str) -> set[str]:
+    targets = {target.strip() for target in value.split(",") if target.strip()}
+    return set(TARGETS) if targets & {"all", "1", "true", "yes"} else targets & set(TARGETS)
+
+
+ENV_TARGETS = _parse_targets(os.getenv("CURATOR_PROFILE", ""))
+
+_flag = {"checked": 0.0, "targets": set()}
+# Python allows one active cProfile per process, so captures never overlap, across threads too
+_capture_lock = threading.Lock()
+_sequence = itertools.count()
+
+
+def flag_targets() -> set[str]:
+    """Targets switched on through the flag file, re-read at most once a second"""
+    now = time.monotonic()
+    if now - _flag["checked"] >= FLAG_CHECK_INTERVAL:
+        _flag["checked"] = now
+        try:
+            with open(os.path.join(PROFILE_DIR, FLAG_FILE)) as f:
+                _flag["targets"] = _parse_targets(f.read())
+        except OSError:
+            _flag["targets"] = set()
+    return _flag["targets"]
+
+
+def is_enabled(target: str) -> bool:
+    return target in ENV_TARGETS or target in flag_targets()
+
+
+def set_enabled(targets: list[str] | None) -> set[str]:
+    """Switch profiling on for the given targets in every process (all of them if None); [] switches it off"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    enabled = set(TARGETS) if targets is None else set(targets) & set(TARGETS)
+    path = os.path.join(PROFILE_DIR, FLAG_FILE)
+    if enabled:
+        with open(path, "w") as f:
+            f.write(",".join(sorted(enabled)))
+    elif os.path.exists(path):
+        os.remove(path)
+    _flag["checked"] = 0.0
+    return enabled
+
+
+def _rotate() -> None:
+    files = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.prof")), key=os.path.getmtime)
+    for path in files[:max(0, len(files) - PROFILE_KEEP)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def profiled(target: str, name: str):
+    """Profile the block with cProfile if the target is switched on.
+
+    cProfile sees the whole thread, so around an await it also picks up whatever else the event loop
+    runs meanwhile. Only one profile runs per process: blocks entered while one is active, in any thread,
+    are skipped, as are blocks entered while another profiler (a debugger, say) is running.
+    """
+    if not is_enabled(target) or not _capture_lock.acquire(blocking=False):
+        yield
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        _capture_lock.release()
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        _capture_lock.release()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9_.]+", "_", name)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            filename = f"{target}-{slug}-{stamp}-{os.getpid()}-{next(_sequence)}.prof"
+            profile.dump_stats(os.path.join(PROFILE_DIR, filename))
+            _rotate()
+        except Exception as e:
+            print(f"Error writing profile for {name}: {e}", file=sys.stderr)
+
+
+def recent_profiles(target: str | None = None, files: int = 20) -> list[str]:
+    pattern = f"{target}-*.prof" if target else "*.prof"
+    paths = sorted(glob.glob(os.path.join(PROFILE_DIR, pattern)), key=os.path.getmtime)
+    return paths[-files:]
+
+
+def profile_summary(target: str | None = None, files: int = 20, top: int = 25) -> dict:
+    """Top functions by cumulative time, merged across the most recent profiles"""
+    paths = recent_profiles(target, files)
+    if not paths:
+        return {"profiles": 0, "functions": []}
+    stats = pstats.Stats(*paths)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return {
+        "profiles": len(paths),
+        "total_seconds": round(stats.total_tt, 4),
+        "functions": [
+            {
+                "function": f"{os.path.basename(filename)}:{line}({function})",
+                "calls": calls,
+                "tottime_s": round(tottime, 4),
+                "cumtime_s": round(cumtime, 4),
+                "cum_per_call_ms": round(cumtime / calls * 1000, 3) if calls else 0.0,
+            }
+            for (filename, line, function), (_, calls, tottime, cumtime, _) in rows
+        ],
+    }
+
+
+def add_profiling_tools(mcp) -> None:
+    """Register tools to switch profiling on or off and to summarise recent profiles"""
+    @mcp.tool()
+    def set_profiling(enabled: bool, targets: list[str] | None = None) -> str:
+        """Switch cProfile capture on or off for tools, curator cycles and/or dashboard refreshes"""
+        return dumps({"enabled": sorted(set_enabled(targets if enabled else []))})
+
+    @mcp.tool()
+    def get_profile_summary(target: str = "", files: int = 20, top: int = 25) -> str:
+        """Get the top functions by cumulative time across the most recent profiles"""
+        return dumps(profile_summary(target or None, files, top))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Curator profiling captures")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = commands.add_parser("summary", help="top cumulative functions across recent profiles")
+    summary_parser.add_argument("--target", choices=TARGETS)
+    summary_parser.add_argument("--files", type=int, default=20)
+    summary_parser.add_argument("--top", type=int, default=25)
+    on_parser = commands.add_parser("on", help="switch profiling on (all targets by default)")
+    on_parser.add_argument("targets", nargs="*", help=f"any of {', '.join(TARGETS)}")
+    commands.add_parser("off", help="switch profiling off")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        summary = profile_summary(args.target, args.files, args.top)
+        print(f"{summary['profiles']} profiles")
+        print(f"{'calls':>9} {'tottime s':>10} {'cumtime s':>10} {'ms/call':>9}  function")
+        for row in summary["functions"]:
+            print(f"{row['calls']:>9} {row['tottime_s']:>10.3f} {row['cumtime_s']:>10.3f} "
+                  f"{row['cum_per_call_ms']:>9.2f}  {row['function']}")
+    elif args.command == "on":
+        print(f"Profiling: {', '.join(sorted(set_enabled(args.targets or None)))}")
+    else:
+        set_enabled([])
+        print("Profiling off")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,54 @@
 from mcp.server.fastmcp import FastMCP
-import os, requests, json
+from server_tracing import traced_tool, instrument_server
+from tool_metrics import add_metrics_tool, MetricsExporter
+from profiling import add_profiling_tools
+from serialization import dumps
 from dotenv import load_dotenv
+from database import read_email, read_outbox_counts
+from email_dispatch import EmailDispatcher, enqueue_email, DIGEST_WINDOW
 load_dotenv(override=True)
 
-RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 mcp = FastMCP("Resend Email Server")
+add_metrics_tool(mcp)
+add_profiling_tools(mcp)
+dispatcher = EmailDispatcher()
 
-@mcp.tool()
+@traced_tool(mcp)
 def send_email(to_email: str, subject: str, html_content: str) -> str:
     """Send an email via Resend API"""
-    url = "https://api.resend.com/emails"
-    headers = {
-        "Authorization": f"Bearer {RESEND_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "from": "Content Curator <onboarding@resend.dev>",
-        "to": [to_email],
-        "subject": subject,
-        "html": html_content
-    }
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        return json.dumps(response.json(), indent=2)
+        outbox_id = enqueue_email(to_email, subject, html_content)
+        if DIGEST_WINDOW > 0:
+            return dumps({
+                "queued": True,
+                "outbox_id": outbox_id,
+                "message": f"Added to the digest sent within {DIGEST_WINDOW:.0f} seconds"
+            })
+
+        dispatcher.run_once()
+        email = read_email(outbox_id)
+        if email["status"] == "sent":
+            return dumps({"id": email["resend_id"], "outbox_id": outbox_id})
+        if email["status"] == "failed":
+            return dumps({"error": email["error"], "outbox_id": outbox_id})
+        return dumps({
+            "queued": True,
+            "outbox_id": outbox_id,
+            "message": f"Delivery will be retried: {email['error']}"
+        })
+    except Exception as e:
+        return dumps({"error": str(e)})
+
+@traced_tool(mcp)
+def get_email_outbox_status() -> str:
+    """Get the number of outbox emails pending, sending, sent and failed"""
+    try:
+        return dumps(read_outbox_counts())
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return dumps({"error": str(e)})
 
 if __name__ == "__main__":
+    instrument_server()
+    MetricsExporter(mcp.name).start()
+    dispatcher.start()
     mcp.run(transport='stdio')
@@ -0,0 +1,155 @@
+"""Durable publishing queue drained by a background worker under per-platform rate limits.
+
+The rate limits are token buckets kept in the database, so every process draining the queue shares them.
+Run this module to drain the queue on its own, between curator cycles: python scheduler.py
+"""
+import argparse
+import hashlib
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import clock
+from database import (
+    write_scheduled_post, claim_due_posts, release_scheduled_post, unclaim_scheduled_posts, requeue_stale_claims,
+    read_schedule_counts, read_schedule_lags, read_oldest_due,
+)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+POLL_INTERVAL = 5.0        # seconds between queue checks
+BATCH_SIZE = 20            # most posts claimed per platform per check
+MAX_PUBLISH_ATTEMPTS = 3
+CLAIM_LEASE = timedelta(minutes=5)  # a claim older than this belongs to a worker that died
+LAG_WINDOW = timedelta(hours=24)
+
+# Posts per second and burst size for each platform
+PUBLISH_RATE_LIMITS = {
+    "twitter": (1 / 30, 5),
+    "linkedin": (1 / 300, 2),
+    "blog": (1 / 600, 2),
+    "newsletter": (1 / 3600, 1),
+}
+
+
+def normalize_publish_time(value: str) -> str:
+    """Parse an ISO-style time into the local "%Y-%m-%d %H:%M:%S" form the queue sorts on"""
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.strftime(TIME_FORMAT)
+
+
+def make_idempotency_key(platform: str, content: str, publish_at: str) -> str:
+    """Key that identifies the same post scheduled for the same time, whoever schedules it"""
+    return hashlib.sha256(f"{platform}\0{publish_at}\0{content}".encode()).hexdigest()
+
+
+class PublishScheduler:
+    """Publishes due posts from the scheduled_posts queue in batches.
+
+    publish(entry) must publish a claimed entry and return the post, or None if the claim was lost.
+    """
+
+    def __init__(self, publish, rate_limits: dict[str, tuple[float, float]] = PUBLISH_RATE_LIMITS,
+                 batch_size: int = BATCH_SIZE, poll_interval: float = POLL_INTERVAL):
+        self.publish = publish
+        self.rate_limits = rate_limits
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def schedule(self, platform: str, content: str, content_type: str, scheduled_time: str,
+                 idempotency_key: str | None = None, account: str = "") -> tuple[dict, bool]:
+        """Queue a post, to count towards account's engagement once published; returns the queue entry and
+        False if the idempotency key was already queued"""
+        publish_at = normalize_publish_time(scheduled_time)
+        return write_scheduled_post({
+            "idempotency_key": idempotency_key or make_idempotency_key(platform, content, publish_at),
+            "platform": platform,
+            "content": content,
+            "content_type": content_type,
+            "publish_at": publish_at,
+            "created_at": clock.now().strftime(TIME_FORMAT),
+            "account": account,
+        })
+
+    def run_once(self, now: datetime | None = None) -> int:
+        """Publish whatever is due and within each platform's budget; returns the number published"""
+        now = now or clock.now()
+        requeue_stale_claims((now - CLAIM_LEASE).strftime(TIME_FORMAT))
+        published = 0
+        for platform, (rate, capacity) in self.rate_limits.items():
+            entries = claim_due_posts(platform, now.strftime(TIME_FORMAT), self.batch_size, rate, capacity,
+                                      now.timestamp())
+            attempted = 0
+            try:
+                for entry in entries:
+                    attempted += 1
+                    try:
+                        if self.publish(entry) is not None:
+                            published += 1
+                    except Exception as e:
+                        print(f"Error publishing scheduled post {entry['id']}: {e}", file=sys.stderr)
+                        release_scheduled_post(entry, str(e), failed=entry["attempts"] >= MAX_PUBLISH_ATTEMPTS)
+            finally:
+                # Anything claimed but not attempted goes straight back rather than waiting out the lease
+                if attempted < len(entries):
+                    unclaim_scheduled_posts(entries[attempted:])
+        return published
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Scheduler error: {e}", file=sys.stderr)
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start draining the queue on a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="publish-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def schedule_metrics(now: datetime | None = None) -> dict:
+    """Queue depth and schedule lag: how late posts go out relative to their publish time"""
+    now = now or clock.now()
+    oldest_due = read_oldest_due(now.strftime(TIME_FORMAT))
+    lags = np.array(read_schedule_lags((now - LAG_WINDOW).strftime(TIME_FORMAT)))
+    recent = {"published": len(lags)}
+    if len(lags):
+        recent.update({
+            "lag_p50_seconds": round(float(np.percentile(lags, 50)), 1),
+            "lag_p95_seconds": round(float(np.percentile(lags, 95)), 1),
+            "lag_max_seconds": round(float(lags.max()), 1),
+        })
+    return {
+        "queue": read_schedule_counts(),
+        "current_lag_seconds": (
+            round((now - datetime.strptime(oldest_due, TIME_FORMAT)).total_seconds(), 1) if oldest_due else 0.0
+        ),
+        "last_24h": recent,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish scheduled posts as they fall due, until interrupted")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Seconds between queue checks")
+    args = parser.parse_args()
+
+    from content_server import publish_scheduled
+    scheduler = PublishScheduler(publish_scheduled, poll_interval=args.interval)
+    try:
+        scheduler._run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,53 @@
+"""Single JSON encode/decode path for tool responses and storage, backed by orjson"""
+import os
+
+import orjson
+from pydantic import BaseModel
+
+# Compact output by default; set PRETTY_JSON=1 to indent everything while debugging
+PRETTY_BY_DEFAULT = os.getenv("PRETTY_JSON", "").lower() in ("1", "true", "yes")
+
+BASE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Set by set_span_hook; called with "dumps" or "loads", returns a context manager the call runs in
+_span_hook = None
+
+
+def set_span_hook(hook) -> None:
+    """Run every encode and decode inside hook(operation), e.g. a tracing span; None removes it"""
+    global _span_hook
+    _span_hook = hook
+
+
+def _default(obj):
+    """Encode the types orjson doesn't handle natively (datetime, dataclasses and numpy it does)"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumpb(obj, pretty: bool | None = None) -> bytes:
+    """Encode to UTF-8 JSON bytes"""
+    pretty = PRETTY_BY_DEFAULT if pretty is None else pretty
+    option = BASE_OPTIONS | orjson.OPT_INDENT_2 if pretty else BASE_OPTIONS
+    if _span_hook is None:
+        return orjson.dumps(obj, default=_default, option=option)
+    with _span_hook("dumps"):
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+def dumps(obj, pretty: bool | None = None) -> str:
+    """Encode to a JSON string, compact unless pretty output is requested"""
+    return dumpb(obj, pretty).decode()
+
+
+def loads(data: str | bytes):
+    """Decode JSON from str or bytes"""
+    if _span_hook is None:
+        return orjson.loads(data)
+    with _span_hook("loads"):
+        return orjson.loads(data)
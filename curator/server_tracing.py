@@ -0,0 +1,199 @@
+"""Server-side spans for the MCP servers, joined to the curator's trace through tool-call metadata.
+
+The curator sends its trace id and the calling span's id in each tools/call request's _meta
+(see TracedMCPServerStdio in tracers.py). Tools registered with traced_tool record a span under
+that parent, and instrument_server() adds sub-spans for SQLite, JSON encoding and outbound HTTP
+while a traced tool is running. Spans go to the same spans table LogTracer writes to. Every call,
+traced or not, also updates the tool's stats in tool_metrics.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import secrets
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from mcp.server.lowlevel.server import request_ctx
+
+import collector_runtime
+import database
+import serialization
+from database import write_spans
+from tool_metrics import registry, payload_size, is_error_result
+from profiling import profiled
+
+# Worker threads for tools registered with offload=True; 0 runs them on the event loop like other sync tools
+TOOL_THREADS = int(os.getenv("MCP_TOOL_THREADS", "4"))
+
+# Span timestamps come from the monotonic clock, anchored once to the epoch so they line up across processes
+EPOCH_ANCHOR = time.time() - time.perf_counter()
+
+
+def now_ts() -> float:
+    """Epoch seconds measured on the monotonic clock"""
+    return EPOCH_ANCHOR + time.perf_counter()
+
+
+def make_span_id() -> str:
+    return f"span_{secrets.token_hex(12)}"
+
+
+class ToolTrace:
+    """Spans collected while one tool call runs; written together when it returns"""
+
+    def __init__(self, trace_id: str, trace_name: str | None, server: str):
+        self.trace_id = trace_id
+        self.server = server
+        self.account = trace_id.split("_")[1].split("0")[0] if "0" in trace_id.split("_")[1] else None
+        self.mode = trace_name.rsplit("-", 1)[-1] if trace_name else None
+        self.spans: list[dict] = []
+
+
+_current: contextvars.ContextVar[tuple[ToolTrace, str] | None] = contextvars.ContextVar("server_span", default=None)
+
+
+@contextmanager
+def server_span(kind: str, name: str):
+    """Record a child of the current server span; does nothing outside a traced tool call"""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    tool_trace, parent_id = current
+    span_id = make_span_id()
+    token = _current.set((tool_trace, span_id))
+    start = now_ts()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end = now_ts()
+        _current.reset(token)
+        tool_trace.spans.append({
+            "span_id": span_id, "trace_id": tool_trace.trace_id, "parent_id": parent_id,
+            "account": tool_trace.account, "mode": tool_trace.mode, "kind": kind, "name": name,
+            "server": tool_trace.server, "start_ts": start, "end_ts": end, "duration_ms": (end - start) * 1000,
+            "error": error,
+        })
+
+
+def _request_meta() -> dict:
+    try:
+        meta = request_ctx.get().meta
+    except LookupError:
+        return {}
+    return meta.model_dump() if meta is not None else {}
+
+
+@contextmanager
+def tool_span(server: str, name: str):
+    """Span for one tool call, parented to the curator span that made the call"""
+    if _current.get() is not None:
+        # A tool called from inside another tool is just a nested span
+        with server_span("mcp_server", name):
+            yield
+        return
+    meta = _request_meta()
+    if not meta.get("trace_id"):
+        yield
+        return
+    tool_trace = ToolTrace(meta["trace_id"], meta.get("trace_name"), server)
+    token = _current.set((tool_trace, meta.get("span_id") or meta["trace_id"]))
+    try:
+        with server_span("mcp_server", name):
+            yield
+    finally:
+        _current.reset(token)
+        try:
+            write_spans(tool_trace.spans)
+        except Exception as e:
+            print(f"Error writing server spans: {e}", file=sys.stderr)
+
+
+@contextmanager
+def measured_call(server: str, name: str, kwargs: dict):
+    """Record a tool call's latency, payload sizes and outcome in tool_metrics; the body sets
+    call["result"] to what the tool returned"""
+    call = {"result": None}
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield call
+        failed = is_error_result(call["result"])
+    finally:
+        registry.record(server, name, time.perf_counter() - start, payload_size(kwargs),
+                        payload_size(call["result"]), failed)
+
+
+_tool_pool = {"threads": TOOL_THREADS, "executor": None}
+
+
+def set_tool_threads(threads: int) -> None:
+    """Resize the pool offloaded tools run on; 0 runs them on the event loop"""
+    executor = _tool_pool["executor"]
+    _tool_pool.update(threads=threads, executor=None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+async def run_in_tool_thread(fn, *args, **kwargs):
+    """Run a blocking call on the bounded tool pool with the caller's context (request and server span)"""
+    if _tool_pool["threads"] <= 0:
+        return fn(*args, **kwargs)
+    if _tool_pool["executor"] is None:
+        _tool_pool["executor"] = ThreadPoolExecutor(_tool_pool["threads"], thread_name_prefix="mcp-tool")
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _tool_pool["executor"], functools.partial(context.run, fn, *args, **kwargs)
+    )
+
+
+def traced_tool(mcp, offload: bool = False, **tool_kwargs):
+    """Register a function as an MCP tool whose calls are recorded as server spans and in the
+    server's tool metrics, and profiled when the "tools" profiling target is on.
+
+    With offload, a blocking function runs on the tool thread pool so the server keeps answering
+    other requests meanwhile; its latency in the metrics includes any wait for a free thread.
+    """
+    def decorator(fn):
+        name = fn.__name__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with measured_call(mcp.name, name, kwargs) as call, tool_span(mcp.name, name), \
+                        profiled("tools", name):
+                    call["result"] = await fn(*args, **kwargs)
+                    return call["result"]
+        elif offload:
+            def traced(*args, **kwargs):
+                with tool_span(mcp.name, name), profiled("tools", name):
+                    return fn(*args, **kwargs)
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with measured_call(mcp.name, name, kwargs) as call:
+                    call["result"] = await run_in_tool_thread(traced, *args, **kwargs)
+                    return call["result"]
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with measured_call(mcp.name, name, kwargs) as call, tool_span(mcp.name, name), \
+                        profiled("tools", name):
+                    call["result"] = fn(*args, **kwargs)
+                    return call["result"]
+        return mcp.tool(**tool_kwargs)(wrapper)
+    return decorator
+
+
+def instrument_server() -> None:
+    """Record SQLite, JSON and HTTP sub-spans inside traced tool calls (call once at server start-up)"""
+    database.set_span_hook(lambda operation: server_span("sqlite", operation))
+    serialization.set_span_hook(lambda operation: server_span("json", operation))
+    collector_runtime.set_span_hook(lambda name: server_span("http", name))
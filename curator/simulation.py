@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""Discrete-event simulation of the curator floor on a virtual clock.
+
+Months of floor operation run in minutes against a scratch database. Each curator cycles through the
+modes in ContentCurator.run's order, with a stub policy in place of the LLM that makes the account,
+trend and publishing calls the agents' tools make. Alongside them run the publish scheduler, the
+engagement poller (fed by mock_platform_server's engagement curve), trend refreshes with drifting
+synthetic trends and a monthly credit allocation. Nothing goes to the network.
+
+    python simulation.py [--days 90] [--cycle-minutes 60] [--sample-days 7] [--json results.json]
+
+Every sample reports storage (database size and rows per table), the wall-clock latency of the calls
+made since the previous sample, credits left and the scheduler's queue depth and lag.
+"""
+import argparse
+import contextlib
+import heapq
+import itertools
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import clock
+
+MODES = ["content_creation", "review", "research_only", "analytics"]   # ContentCurator.run's order
+TREND_SOURCES = ["reddit", "hackernews", "youtube", "twitter"]
+TREND_DRIFT = 0.25            # log-scale standard deviation of each source value per refresh
+CANDIDATE_TOPICS = 5          # topics the policy scores before choosing one to post about
+SKIP_BELOW = 5.0              # trend score under which the policy skips instead of posting
+MAX_SCHEDULE_HOURS = 24       # follow-up posts are scheduled up to this far ahead
+CREDIT_PERIOD = timedelta(days=30)
+REPORTED_CALLS = ["account_get", "report", "score_topics", "create_content", "publish",
+                  "publishing_history", "engagement_series", "find_content", "trend_momentum"]
+
+
+def platform_metrics(platform: str, post_ids: list[str]) -> dict[str, dict]:
+    """The mock platforms' metrics at the virtual time, without going through HTTP"""
+    from mock_platform_server import post_metrics
+
+    now = clock.now()
+    metrics = {post_id: post_metrics(post_id, platform, now) for post_id in post_ids}
+    return {post_id: values for post_id, values in metrics.items() if values is not None}
+
+
+def percentiles(values: list[float]) -> dict:
+    array = np.array(values)
+    return {
+        "calls": len(array),
+        "p50_ms": round(float(np.percentile(array, 50)), 2),
+        "p95_ms": round(float(np.percentile(array, 95)), 2),
+        "max_ms": round(float(array.max()), 2),
+    }
+
+
+class TrendFeed:
+    """Synthetic trends that drift between refreshes, stored the way fetch_all_ai_trends stores them"""
+
+    def __init__(self, seed: int):
+        from trends import AI_KEYWORDS
+
+        self.rng = np.random.default_rng(seed)
+        self.topics = list(AI_KEYWORDS)
+        self.values = self.rng.lognormal(5.0, 1.0, (len(self.topics), len(TREND_SOURCES)))
+        self.date = None
+
+    def refresh(self) -> None:
+        from database import write_trends
+        from topic_series import record_samples
+        from trends import (
+            TrendSnapshot, score_trend_matrix,
+            get_trends_for_date, get_keyword_scores_for_date, get_trend_index_for_date,
+        )
+
+        self.values *= np.exp(self.rng.normal(0.0, TREND_DRIFT, self.values.shape))
+        now = clock.now()
+        stamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        snapshot = TrendSnapshot(self.topics, TREND_SOURCES, self.values,
+                                 score_trend_matrix(self.values, TREND_SOURCES), [stamp] * len(self.topics))
+        self.date = now.strftime("%Y-%m-%d")
+        write_trends(self.date, snapshot.to_bytes())
+        record_samples(snapshot)
+        # The trend caches are keyed by date, so a second refresh on the same day would go unseen
+        for cached in (get_trends_for_date, get_keyword_scores_for_date, get_trend_index_for_date):
+            cached.cache_clear()
+
+    def ensure_today(self) -> None:
+        """Refresh if the date has moved on, as the first trend lookup of a day would fetch"""
+        if self.date != clock.now().strftime("%Y-%m-%d"):
+            self.refresh()
+
+
+class StubCurator:
+    """One curator's cycles: the tool calls its agents make in each mode, chosen by fixed rules"""
+
+    def __init__(self, floor: "Floor", index: int):
+        from content_floor import names, primary_platforms, default_strategies
+        from profiles import ContentAccount
+
+        self.floor = floor
+        self.name = names[index]
+        self.account_name = self.name.lower()
+        self.platforms = [platform.lower() for platform in primary_platforms[index]]
+        self.mode = MODES[0]
+        self.rng = random.Random(f"{floor.seed}-{self.name}")
+        ContentAccount.get(self.name).reset(default_strategies[index])
+
+    def run(self) -> None:
+        """One cycle in the current mode, then on to the next mode"""
+        self.floor.trends.ensure_today()
+        getattr(self, self.mode)()
+        self.floor.counts[self.mode] += 1
+        self.mode = MODES[(MODES.index(self.mode) + 1) % len(MODES)]
+
+    def account(self):
+        from profiles import ContentAccount
+
+        return self.floor.timed("account_get", ContentAccount.get, self.name)
+
+    def content_creation(self) -> None:
+        from profiles import CONTENT_COST
+        from trends import get_trend_scores_with_fallback
+        import content_server
+
+        account = self.account()
+        self.floor.timed("report", account.report)
+        topics = self.rng.sample(self.floor.trends.topics, CANDIDATE_TOPICS)
+        scores = self.floor.timed("score_topics", get_trend_scores_with_fallback, topics)
+        best = int(np.argmax(scores))
+        topic = topics[best]
+        if account.credits < CONTENT_COST:
+            account.skip_content(topic, "Out of credits")
+            self.floor.counts["out_of_credits"] += 1
+            return
+        if scores[best] < SKIP_BELOW:
+            account.skip_content(topic, f"Trend score {scores[best]:.1f} is too low")
+            self.floor.counts["skipped"] += 1
+            return
+
+        first, *others = self.platforms
+        self.floor.timed("create_content", account.create_content, topic, first, "post",
+                         f"Highest trend score among {len(topics)} candidates")
+        self.floor.counts["created"] += 1
+        text = f"{topic}: what changed this week #{self.floor.counts['created']}"
+        self.floor.check("publish", self.floor.timed("publish", self.publish, first, topic, text))
+        for platform in others:
+            publish_at = clock.now() + timedelta(hours=self.rng.uniform(1, MAX_SCHEDULE_HOURS))
+            self.floor.check("schedule", self.floor.timed(
+                "schedule_content", content_server.schedule_content, platform, text,
+                publish_at.strftime("%Y-%m-%d %H:%M:%S"), account=self.account_name))
+            self.floor.counts["scheduled"] += 1
+
+    def publish(self, platform: str, topic: str, text: str) -> str:
+        import content_server
+
+        if platform == "blog":
+            return content_server.publish_to_blog(topic, text, account=self.account_name)
+        if platform == "newsletter":
+            return content_server.publish_to_newsletter(topic, text, account=self.account_name)
+        publish_to = getattr(content_server, f"publish_to_{platform}")
+        return publish_to(text, account=self.account_name)
+
+    def review(self) -> None:
+        import content_server
+
+        account = self.account()
+        self.floor.timed("report", account.report)
+        self.floor.timed("recent_content", account.get_recent_content, 7)
+        self.floor.check("history", self.floor.timed("publishing_history", content_server.get_publishing_history,
+                                                     "all", 10))
+        self.floor.check("scheduled", self.floor.timed("scheduled_content", content_server.get_scheduled_content))
+
+    def research_only(self) -> None:
+        from trends import get_top_trending_topics, search_trending_topics, get_trend_momentum
+
+        account = self.account()
+        top = self.floor.timed("top_trending", get_top_trending_topics, 10)
+        keyword = self.rng.choice(self.floor.trends.topics)
+        self.floor.timed("search_trending", search_trending_topics, keyword.split()[0])
+        self.floor.timed("trend_momentum", get_trend_momentum, [trend.topic for trend in top])
+        self.floor.timed("find_content", account.find_content_by_topic, keyword)
+
+    def analytics(self) -> None:
+        import content_server
+
+        account = self.account()
+        self.floor.timed("analyze_performance", account.analyze_performance)
+        self.floor.timed("engagement_series", account.get_engagement_time_series, 30, 120)
+        self.floor.check("schedule_metrics", self.floor.timed("schedule_metrics",
+                                                              content_server.get_schedule_metrics))
+
+
+class Floor:
+    """Curators, background workers and the virtual-time event queue they run on"""
+
+    def __init__(self, virtual: clock.VirtualClock, curators: list[int], cycle: timedelta,
+                 scheduler_interval: timedelta, poll_interval: timedelta, trend_interval: timedelta,
+                 monthly_credits: float, seed: int = 0):
+        from scheduler import PublishScheduler
+        from engagement_poller import EngagementPoller
+        import content_server
+
+        self.clock = virtual
+        self.seed = seed
+        self.start = virtual.now()
+        self.events = []
+        self._sequence = itertools.count()
+        self.latencies = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.error_examples = {}
+        self.samples = []
+        self.sampled_at = None
+        self.monthly_credits = monthly_credits
+        self.trends = TrendFeed(seed)
+        self.scheduler = PublishScheduler(content_server.publish_scheduled)
+        self.poller = EngagementPoller(fetch=platform_metrics)
+        self.curators = [StubCurator(self, index) for index in curators]
+
+        self.trends.refresh()
+        for position, curator in enumerate(self.curators):
+            # Stagger the curators across the cycle, as they would drift apart on a real floor
+            self.every(cycle, curator.run, f"{curator.name} cycle", offset=cycle * position / len(self.curators))
+        self.every(scheduler_interval, self.scheduler.run_once, "publish scheduler")
+        self.every(poll_interval, self.poller.run_once, "engagement poller")
+        self.every(trend_interval, self.trends.refresh, "trend refresh", offset=trend_interval)
+        if monthly_credits > 0:
+            self.every(CREDIT_PERIOD, self.add_credits, "credit allocation", offset=CREDIT_PERIOD)
+
+    def every(self, interval: timedelta, action, label: str, offset: timedelta = timedelta()) -> None:
+        heapq.heappush(self.events, (self.start + offset, next(self._sequence), interval, action, label))
+
+    def step(self, action, label: str, quiet: bool) -> None:
+        try:
+            # The account and trend code print as they go; thousands of cycles of it bury the report
+            with contextlib.redirect_stdout(self._devnull) if quiet else contextlib.nullcontext():
+                action()
+        except Exception as e:
+            self.errors[label] += 1
+            self.error_examples.setdefault(label, f"{type(e).__name__}: {e}"[:200])
+
+    def timed(self, call: str, function, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.latencies[call].append((time.perf_counter() - start) * 1000)
+
+    def check(self, call: str, result: str) -> str:
+        """Count tool responses that report an error"""
+        from tool_metrics import is_error_result
+
+        if is_error_result(result):
+            self.errors[call] += 1
+            self.error_examples.setdefault(call, result[:200])
+        return result
+
+    def add_credits(self) -> None:
+        from profiles import ContentAccount
+
+        for curator in self.curators:
+            ContentAccount.get(curator.name).add_credits(self.monthly_credits)
+
+    def run(self, until: datetime, sample_interval: timedelta, quiet: bool = True) -> None:
+        """Process events in time order up to `until`, sampling every sample_interval"""
+        self.every(sample_interval, self.sample, "sample", offset=sample_interval)
+        self.wall_start = time.perf_counter()
+        with open(os.devnull, "w") as self._devnull:
+            while self.events and self.events[0][0] <= until:
+                when, _, interval, action, label = heapq.heappop(self.events)
+                self.clock.advance_to(when)
+                self.step(action, label, quiet and action != self.sample)
+                self.counts["events"] += 1
+                heapq.heappush(self.events, (when + interval, next(self._sequence), interval, action, label))
+        if self.sampled_at != until:
+            self.clock.advance_to(until)
+            self.sample()
+
+    def sample(self) -> None:
+        """Record storage, call latencies since the last sample, credits and scheduler state"""
+        from database import read_storage_stats, count_posts
+        from profiles import ContentAccount
+        from scheduler import schedule_metrics
+
+        self.sampled_at = self.clock.now()
+        storage = read_storage_stats()
+        accounts = [ContentAccount.get(curator.name) for curator in self.curators]
+        record = {
+            "day": round((self.clock.now() - self.start) / timedelta(days=1), 2),
+            "time": self.clock.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "wall_seconds": round(time.perf_counter() - self.wall_start, 1),
+            "db_bytes": storage["bytes"],
+            "rows": storage["rows"],
+            "content": sum(len(account.content_history) for account in accounts),
+            "posts": count_posts(),
+            "credits": {account.name: account.credits for account in accounts},
+            "schedule": schedule_metrics(),
+            "calls": {call: percentiles(values) for call, values in sorted(self.latencies.items())},
+            "counts": dict(self.counts),
+        }
+        self.samples.append(record)
+        self.latencies.clear()
+        print_sample(record, header=len(self.samples) == 1)
+
+    def summary(self) -> dict:
+        """Growth and latency trends across the samples"""
+        if not self.samples:
+            return {"samples": []}
+        days = np.array([sample["day"] for sample in self.samples])
+        db_bytes = np.array([sample["db_bytes"] for sample in self.samples], dtype=np.float64)
+        growth = float(np.polyfit(days, db_bytes, 1)[0]) if len(days) > 1 else 0.0
+        last = self.samples[-1]
+        latency = {}
+        for call in sorted({call for sample in self.samples for call in sample["calls"]}):
+            p95s = [sample["calls"][call]["p95_ms"] for sample in self.samples if call in sample["calls"]]
+            latency[call] = {"first_p95_ms": p95s[0], "last_p95_ms": p95s[-1]}
+        return {
+            "days": last["day"],
+            "wall_seconds": last["wall_seconds"],
+            "db_bytes": last["db_bytes"],
+            "db_growth_bytes_per_day": round(growth),
+            "rows": last["rows"],
+            "counts": last["counts"],
+            "latency": latency,
+            "errors": dict(self.errors),
+            "error_examples": self.error_examples,
+            "samples": self.samples,
+        }
+
+
+def print_sample(record: dict, header: bool = False) -> None:
+    if header:
+        print(f"{'day':>6}{'DB MiB':>8}{'content':>9}{'posts':>7}{'queued':>8}{'lag p95 s':>10}"
+              + "".join(f"{call[:14]:>16}" for call in REPORTED_CALLS) + f"{'wall s':>8}")
+    pending = record["schedule"]["queue"].get("pending", 0)
+    lag = record["schedule"]["last_24h"].get("lag_p95_seconds", 0.0)
+    calls = "".join(f"{record['calls'].get(call, {}).get('p95_ms', 0.0):>16.2f}" for call in REPORTED_CALLS)
+    print(f"{record['day']:>6.0f}{record['db_bytes'] / 2**20:>8.2f}{record['content']:>9}{record['posts']:>7}"
+          f"{pending:>8}{lag:>10.0f}{calls}{record['wall_seconds']:>8.1f}")
+
+
+def print_summary(summary: dict) -> None:
+    print(f"\n{summary['days']:.0f} simulated days in {summary['wall_seconds']:.0f}s: "
+          f"{summary['counts'].get('events', 0)} events")
+    print(f"Database {summary['db_bytes'] / 2**20:.2f} MiB, growing {summary['db_growth_bytes_per_day'] / 1024:.1f} KiB/day")
+    print("  " + ", ".join(f"{table} {rows}" for table, rows in sorted(summary["rows"].items()) if rows))
+    counts = summary["counts"]
+    print(f"Content: {counts.get('created', 0)} created, {counts.get('scheduled', 0)} scheduled, "
+          f"{counts.get('skipped', 0)} skipped on low trend scores, {counts.get('out_of_credits', 0)} skipped out of credits")
+    print(f"{'p95 ms':<22}{'first sample':>14}{'last sample':>14}")
+    for call, latency in summary["latency"].items():
+        print(f"  {call:<20}{latency['first_p95_ms']:>14.2f}{latency['last_p95_ms']:>14.2f}")
+    for label, count in summary["errors"].items():
+        print(f"{count} errors in {label}, first: {summary['error_examples'].get(label)}")
+
+
+def main():
+    from content_floor import names
+
+    parser = argparse.ArgumentParser(description="Simulate months of curator floor operation on a virtual clock")
+    parser.add_argument("--days", type=float, default=90)
+    parser.add_argument("--start", type=datetime.fromisoformat, help="virtual start time (default: now)")
+    parser.add_argument("--curators", default=",".join(names))
+    parser.add_argument("--cycle-minutes", type=float, default=60, help="time between a curator's cycles")
+    parser.add_argument("--scheduler-seconds", type=float, default=300,
+                        help="publish scheduler check interval; lag is measured to about this resolution")
+    parser.add_argument("--poll-seconds", type=float, default=300, help="engagement poller check interval")
+    parser.add_argument("--trend-hours", type=float, default=24, help="time between trend refreshes")
+    parser.add_argument("--monthly-credits", type=float, default=100, help="credits added to every account each 30 days")
+    parser.add_argument("--sample-days", type=float, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="directory for the scratch database (default: a temp dir)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show what the account and trend code prints")
+    args = parser.parse_args()
+
+    curators = [names.index(name.strip()) for name in args.curators.split(",")]
+    json_path = os.path.abspath(args.json) if args.json else None
+    # database.py opens profiles.db in the working directory, so move before importing it
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="curator-sim-"))
+    print(f"Simulation database: {os.path.abspath('profiles.db')}")
+
+    virtual = clock.VirtualClock(args.start)
+    clock.install(virtual)
+    floor = Floor(virtual, curators, timedelta(minutes=args.cycle_minutes), timedelta(seconds=args.scheduler_seconds),
+                  timedelta(seconds=args.poll_seconds), timedelta(hours=args.trend_hours), args.monthly_credits,
+                  args.seed)
+    floor.run(virtual.now() + timedelta(days=args.days), timedelta(days=args.sample_days), quiet=not args.verbose)
+    summary = floor.summary()
+    print_summary(summary)
+    if json_path:
+        from serialization import dumps
+        with open(json_path, "w") as f:
+            f.write(dumps(summary, pretty=True))
+
+
+if __name__ == "__main__":
+    main()
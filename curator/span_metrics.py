@@ -0,0 +1,67 @@
+"""Latency and token metrics over the spans recorded by LogTracer"""
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from database import read_spans, read_tokens_by_mode
+from serialization import dumps
+
+
+def latency_percentiles(spans: list[dict], key: str) -> dict[str, dict]:
+    """Count, p50, p95 and max duration (ms) of spans grouped by a column"""
+    groups = defaultdict(list)
+    for span in spans:
+        if span["duration_ms"] is not None:
+            groups[span[key] or "unknown"].append(span["duration_ms"])
+    stats = {}
+    for group, durations in sorted(groups.items()):
+        values = np.array(durations)
+        stats[group] = {
+            "count": len(values),
+            "p50_ms": round(float(np.percentile(values, 50)), 1),
+            "p95_ms": round(float(np.percentile(values, 95)), 1),
+            "max_ms": round(float(values.max()), 1),
+        }
+    return stats
+
+
+def tool_latency(since: float | None = None) -> dict[str, dict]:
+    """Latency per tool call, keyed "server/tool" for MCP tools"""
+    spans = read_spans(kind="function", since=since)
+    for span in spans:
+        span["tool"] = f"{span['server']}/{span['name']}" if span["server"] else span["name"]
+    return latency_percentiles(spans, "tool")
+
+
+def model_latency(since: float | None = None) -> dict[str, dict]:
+    """Latency per LLM generation, by model"""
+    return latency_percentiles(read_spans(kind="generation", since=since), "model")
+
+
+def tokens_by_mode(since: float | None = None) -> dict[str, dict]:
+    """Input and output tokens per curator mode, in total and per run"""
+    return {
+        mode or "unknown": {
+            "runs": runs,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "tokens_per_run": round((input_tokens + output_tokens) / runs, 1) if runs else 0.0,
+        }
+        for mode, runs, input_tokens, output_tokens in read_tokens_by_mode(since)
+    }
+
+
+def summary(hours: float | None = None) -> dict:
+    since = time.time() - hours * 3600 if hours else None
+    return {
+        "tools": tool_latency(since),
+        "models": model_latency(since),
+        "modes": tokens_by_mode(since),
+    }
+
+
+if __name__ == "__main__":
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(dumps(summary(hours), pretty=True))
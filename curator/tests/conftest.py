@@ -0,0 +1,8 @@
+"""Shared setup: the curator modules are flat scripts, and database.py opens profiles.db in the working
+directory when it is imported, so tests import them from the curator directory and run in a scratch one"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix="curator-test-"))
@@ -0,0 +1,147 @@
+"""EmailDispatcher against a local stand-in for the Resend API"""
+import socket
+import sqlite3
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import clock
+import collector_runtime
+import database
+import email_dispatch
+from collector_runtime import TokenBucket, CircuitBreaker
+from email_dispatch import EmailDispatcher, enqueue_email
+from serialization import dumpb, loads
+
+
+def accept(path: str, payload) -> tuple[int, dict]:
+    """Resend's success responses: one id per email"""
+    if path.endswith("/batch"):
+        return 200, {"data": [{"id": f"re_{i}"} for i in range(len(payload))]}
+    return 200, {"id": "re_0"}
+
+
+def reject_bad_addresses(path: str, payload) -> tuple[int, dict]:
+    """Like Resend's validation: any bad recipient fails the whole request with a 422"""
+    messages = payload if isinstance(payload, list) else [payload]
+    if any(message["to"][0].startswith("bad") for message in messages):
+        return 422, {"name": "validation_error", "message": "Invalid `to` field"}
+    return accept(path, payload)
+
+
+class ResendStub(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.calls.append({"path": self.path, "payload": payload,
+                                  "idempotency_key": self.headers.get("Idempotency-Key")})
+        status, body = self.server.respond(self.path, payload)
+        data = dumpb(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def outbox(monkeypatch):
+    with sqlite3.connect(database.DB) as conn:
+        conn.execute('DELETE FROM email_outbox')
+    # Fresh limits per test, and retries that don't wait
+    monkeypatch.setattr(email_dispatch.resend_api, "bucket", TokenBucket(1000, 1000))
+    monkeypatch.setattr(email_dispatch.resend_api, "breaker", CircuitBreaker())
+    monkeypatch.setattr(collector_runtime, "BASE_RETRY_DELAY", 0.01)
+
+
+@pytest.fixture
+def resend(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ResendStub)
+    server.calls = []
+    server.respond = accept
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(email_dispatch, "RESEND_API_URL", f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def queue(*recipients: str, digest: bool = False) -> list[int]:
+    return [enqueue_email(to, f"Update for {to}", "<p>Hello</p>", digest=digest) for to in recipients]
+
+
+def test_due_emails_go_out_in_one_batch(resend):
+    ids = queue("a@example.com", "b@example.com", "c@example.com")
+
+    assert EmailDispatcher(digest_window=0).run_once() == 3
+    assert [call["path"] for call in resend.calls] == ["/emails/batch"]
+    assert [message["to"] for message in resend.calls[0]["payload"]] == [["a@example.com"], ["b@example.com"],
+                                                                         ["c@example.com"]]
+    assert [database.read_email(i)["resend_id"] for i in ids] == ["re_0", "re_1", "re_2"]
+    assert {database.read_email(i)["status"] for i in ids} == {"sent"}
+
+
+def test_server_error_is_retried_with_the_same_idempotency_key(resend):
+    responses = [(503, {"message": "unavailable"})]
+    resend.respond = lambda path, payload: responses.pop() if responses else accept(path, payload)
+    [email_id] = queue("a@example.com")
+
+    assert EmailDispatcher(digest_window=0).run_once() == 1
+    assert len(resend.calls) == 2
+    assert resend.calls[0]["idempotency_key"] == resend.calls[1]["idempotency_key"]
+    assert database.read_email(email_id)["status"] == "sent"
+
+
+def test_rejected_email_is_failed_without_retry(resend):
+    resend.respond = reject_bad_addresses
+    [email_id] = queue("bad@example")
+
+    assert EmailDispatcher(digest_window=0).run_once() == 0
+    assert len(resend.calls) == 1
+    email = database.read_email(email_id)
+    assert email["status"] == "failed"
+    assert "422" in email["error"]
+
+
+def test_rejected_batch_is_resent_one_by_one(resend):
+    resend.respond = reject_bad_addresses
+    good, bad, other = queue("a@example.com", "bad@example", "c@example.com")
+
+    assert EmailDispatcher(digest_window=0).run_once() == 2
+    assert [call["path"] for call in resend.calls] == ["/emails/batch", "/emails", "/emails", "/emails"]
+    assert database.read_email(good)["status"] == "sent"
+    assert database.read_email(other)["status"] == "sent"
+    assert database.read_email(bad)["status"] == "failed"
+
+
+def test_digest_is_held_for_its_window_then_sent_as_one_message(resend):
+    ids = queue("a@example.com", "a@example.com", "A@example.com", digest=True)
+    dispatcher = EmailDispatcher(digest_window=60)
+    now = clock.now()
+
+    assert dispatcher.run_once(now) == 0
+    assert resend.calls == []
+
+    assert dispatcher.run_once(now + timedelta(seconds=61)) == 3
+    assert len(resend.calls) == 1
+    message = resend.calls[0]["payload"]
+    assert message["subject"] == "Curator digest: 3 updates"
+    assert {database.read_email(i)["status"] for i in ids} == {"sent"}
+
+
+def test_unreachable_api_requeues_the_email(monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(email_dispatch, "RESEND_API_URL", f"http://127.0.0.1:{port}")
+    [email_id] = queue("a@example.com")
+
+    assert EmailDispatcher(digest_window=0).run_once() == 0
+    email = database.read_email(email_id)
+    assert email["status"] == "pending"
+    assert email["attempts"] == 1
+    assert email["next_attempt_at"] > email["created_at"]
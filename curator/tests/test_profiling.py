@@ -0,0 +1,57 @@
+"""profiled captures: one per process at a time, and never an error for the code being profiled"""
+import cProfile
+import glob
+import os
+import threading
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "ENV_TARGETS", {"tools"})
+    return tmp_path
+
+
+def test_overlapping_captures_in_other_threads_are_skipped(profile_dir):
+    inside, release = threading.Event(), threading.Event()
+
+    def hold():
+        with profiling.profiled("tools", "first"):
+            inside.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    inside.wait()
+    with profiling.profiled("tools", "second"):
+        pass
+    release.set()
+    thread.join()
+    with profiling.profiled("tools", "third"):
+        pass
+
+    names = sorted(os.path.basename(path).split("-")[1] for path in glob.glob(str(profile_dir / "*.prof")))
+    assert names == ["first", "third"]
+
+
+def test_another_active_profiler_skips_the_capture(monkeypatch, profile_dir):
+    class Busy:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    profile = cProfile.Profile
+    monkeypatch.setattr(cProfile, "Profile", Busy)
+    ran = []
+    with profiling.profiled("tools", "busy"):
+        ran.append(True)
+
+    assert ran == [True]
+    assert glob.glob(str(profile_dir / "*.prof")) == []
+    monkeypatch.setattr(cProfile, "Profile", profile)
+    with profiling.profiled("tools", "after"):
+        pass
+    assert len(glob.glob(str(profile_dir / "*.prof"))) == 1
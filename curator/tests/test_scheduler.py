@@ -0,0 +1,123 @@
+"""PublishScheduler and the scheduled_posts queue: claims, fencing, unclaiming and shared rate limits"""
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from database import claim_due_posts, unclaim_scheduled_posts, requeue_stale_claims, read_scheduled_posts, write_post
+from scheduler import PublishScheduler, TIME_FORMAT
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def queue():
+    with sqlite3.connect(database.DB) as conn:
+        conn.execute('DELETE FROM scheduled_posts')
+        conn.execute('DELETE FROM publish_budgets')
+
+
+class Publisher:
+    """Stands in for content_server.publish_scheduled, recording what it was asked to publish"""
+
+    def __init__(self):
+        self.published = []
+
+    def __call__(self, entry: dict) -> dict | None:
+        post = write_post({"platform": entry["platform"], "content": entry["content"],
+                           "content_type": entry["content_type"], "timestamp": NOW.strftime(TIME_FORMAT),
+                           "status": "published", "engagement": {}}, entry)
+        if post is not None:
+            self.published.append(entry["content"])
+        return post
+
+
+def schedule(scheduler: PublishScheduler, *contents: str, platform: str = "twitter") -> list[dict]:
+    return [scheduler.schedule(platform, content, "post", (NOW - timedelta(minutes=len(contents) - i)).isoformat())[0]
+            for i, content in enumerate(contents)]
+
+
+def claim(limit: int = 10, capacity: float = 10, now: datetime = NOW) -> list[dict]:
+    return claim_due_posts("twitter", now.strftime(TIME_FORMAT), limit, 0, capacity, now.timestamp())
+
+
+def test_due_posts_are_published_in_order_once():
+    publish = Publisher()
+    scheduler = PublishScheduler(publish, rate_limits={"twitter": (0, 10)})
+    schedule(scheduler, "first", "second", "third")
+    scheduler.schedule("twitter", "later", "post", (NOW + timedelta(hours=1)).isoformat())
+
+    assert scheduler.run_once(NOW) == 3
+    assert scheduler.run_once(NOW) == 0
+    assert publish.published == ["first", "second", "third"]
+    assert [entry["status"] for entry in read_scheduled_posts()] == ["published"] * 3 + ["pending"]
+
+
+def test_same_post_scheduled_twice_is_queued_once():
+    scheduler = PublishScheduler(Publisher())
+    first, created = scheduler.schedule("twitter", "hello", "post", NOW.isoformat())
+    again, created_again = scheduler.schedule("twitter", "hello", "post", NOW.isoformat())
+
+    assert created and not created_again
+    assert again["id"] == first["id"]
+
+
+def test_lost_claim_is_not_published():
+    scheduler = PublishScheduler(Publisher())
+    schedule(scheduler, "hello")
+    [stale] = claim()
+    # The first worker stalls past its lease and another worker claims the post again
+    requeue_stale_claims((NOW + timedelta(minutes=1)).strftime(TIME_FORMAT))
+    [current] = claim()
+    publish = Publisher()
+
+    assert publish(stale) is None
+    assert publish(current) is not None
+    assert publish.published == ["hello"]
+
+
+def test_unclaimed_posts_go_back_with_their_attempt_and_budget():
+    scheduler = PublishScheduler(Publisher())
+    schedule(scheduler, "first", "second")
+    entries = claim(capacity=2)
+    assert claim(capacity=2) == []
+
+    unclaim_scheduled_posts(entries)
+
+    assert [(entry["status"], entry["attempts"]) for entry in read_scheduled_posts()] == [("pending", 0)] * 2
+    assert len(claim(capacity=2)) == 2
+
+
+def test_unattempted_claims_are_unclaimed_when_a_run_is_interrupted():
+    def publish(entry):
+        raise KeyboardInterrupt
+
+    scheduler = PublishScheduler(publish, rate_limits={"twitter": (0, 10)})
+    schedule(scheduler, "first", "second")
+
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.run_once(NOW)
+    # The interrupted attempt keeps its claim until the lease runs out; the one never tried goes straight back
+    assert [entry["status"] for entry in read_scheduled_posts()] == ["publishing", "pending"]
+
+
+def test_rate_limit_is_shared_by_every_scheduler():
+    first, second = Publisher(), Publisher()
+    limits = {"twitter": (1 / 30, 2)}
+    schedule(PublishScheduler(first), "a", "b", "c", "d")
+
+    assert PublishScheduler(first, rate_limits=limits).run_once(NOW) == 2
+    # A scheduler in another process starts without a fresh burst
+    assert PublishScheduler(second, rate_limits=limits).run_once(NOW) == 0
+    assert PublishScheduler(second, rate_limits=limits).run_once(NOW + timedelta(seconds=30)) == 1
+    assert first.published == ["a", "b"]
+    assert second.published == ["c"]
+
+
+def test_claimed_post_carries_the_account_it_was_scheduled_for():
+    scheduler = PublishScheduler(Publisher())
+    scheduler.schedule("twitter", "hello", "post", NOW.isoformat(), account="alex")
+
+    [entry] = claim()
+    assert entry["account"] == "alex"
@@ -0,0 +1,296 @@
+"""Per-tool call counts, errors, payload sizes and latency histograms for the MCP servers.
+
+Tools registered with server_tracing.traced_tool are recorded here on every call. Each server
+exposes the numbers through a get_server_metrics tool, and MetricsExporter writes them to
+metrics/<server>-<pid>.prom in the Prometheus text format for a node-exporter textfile collector.
+Servers are restarted every curator cycle and several can run at once, so every process writes its
+own file, labelled instance="<pid>"; sum rate() across instances for a server's totals.
+"""
+import atexit
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+import orjson
+from pydantic import BaseModel
+
+from serialization import dumps
+
+METRICS_DIR = os.getenv("MCP_METRICS_DIR", "metrics")
+EXPORT_INTERVAL = float(os.getenv("MCP_METRICS_INTERVAL", "15"))
+STALE_AFTER = float(os.getenv("MCP_METRICS_STALE_AFTER", "600"))  # seconds before a dead process's file goes
+
+SIGNIFICANT_BITS = 7          # latency buckets are at most 1/64 (~1.6%) wide
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99, "p999": 0.999}
+# Prometheus histogram boundaries, in seconds
+PROMETHEUS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """HDR-style histogram of microsecond latencies: log-linear buckets give a fixed relative error
+    at any scale, recording is O(1) and memory grows only with the range of values seen"""
+
+    def __init__(self, significant_bits: int = SIGNIFICANT_BITS):
+        self.bits = significant_bits
+        self.half = 1 << (significant_bits - 1)
+        self.counts: dict[int, int] = {}
+        self.le_counts = [0] * (len(PROMETHEUS_BUCKETS) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def _index(self, us: int) -> int:
+        shift = max(0, us.bit_length() - self.bits)
+        return shift * self.half + (us >> shift)
+
+    def _highest(self, index: int) -> int:
+        """Largest value that falls in a bucket"""
+        shift = max(0, index // self.half - 1)
+        return (((index - shift * self.half) + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        us = max(0, int(seconds * 1e6))
+        index = self._index(us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.le_counts[bisect_left(PROMETHEUS_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total_us += us
+        self.max_us = max(self.max_us, us)
+
+    def percentile(self, q: float) -> float:
+        """Latency in ms at quantile q (0-1)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> dict:
+        return {
+            "mean_ms": round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            **{f"{key}_ms": round(self.percentile(q), 3) for key, q in QUANTILES.items()},
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+
+class ToolStats:
+    """Counters for one tool"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.max_request_bytes = 0
+        self.max_response_bytes = 0
+        self.latency = LatencyHistogram()
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+            "request_bytes": {"total": self.request_bytes, "max": self.max_request_bytes,
+                              "mean": round(self.request_bytes / self.calls, 1) if self.calls else 0.0},
+            "response_bytes": {"total": self.response_bytes, "max": self.max_response_bytes,
+                               "mean": round(self.response_bytes / self.calls, 1) if self.calls else 0.0},
+            "latency": self.latency.summary(),
+        }
+
+
+def _encode_default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return str(obj)
+
+
+def payload_size(obj) -> int:
+    """Size in bytes of a tool's arguments or result as they travel as JSON"""
+    if obj is None:
+        return 0
+    if isinstance(obj, str):
+        return len(obj.encode())
+    try:
+        # orjson directly, so sizing doesn't show up as json spans in server traces
+        return len(orjson.dumps(obj, default=_encode_default, option=orjson.OPT_NON_STR_KEYS))
+    except TypeError:
+        return 0
+
+
+def is_error_result(result) -> bool:
+    """Tools report failures by returning {"error": ...} rather than raising"""
+    return isinstance(result, str) and result.startswith('{"error"')
+
+
+class MetricsRegistry:
+    """Stats per (server, tool), shared by every traced tool in the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools: dict[tuple[str, str], ToolStats] = {}
+        self.started = time.time()
+
+    def record(self, server: str, tool: str, seconds: float, request_bytes: int, response_bytes: int,
+               error: bool) -> None:
+        with self._lock:
+            stats = self._tools.get((server, tool))
+            if stats is None:
+                stats = self._tools[(server, tool)] = ToolStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            stats.max_request_bytes = max(stats.max_request_bytes, request_bytes)
+            stats.max_response_bytes = max(stats.max_response_bytes, response_bytes)
+            stats.latency.record(seconds)
+
+    def snapshot(self, server: str | None = None) -> dict:
+        """Summary per tool, optionally for one server only"""
+        with self._lock:
+            tools = {
+                f"{name}/{tool}" if server is None else tool: stats.summary()
+                for (name, tool), stats in sorted(self._tools.items())
+                if server is None or name == server
+            }
+        return {"uptime_seconds": round(time.time() - self.started, 1), "tools": tools}
+
+    def prometheus_text(self, server: str | None = None, instance: str | None = None) -> str:
+        """All stats in the Prometheus text exposition format, labelled with instance if given"""
+        with self._lock:
+            items = [(name, tool, stats) for (name, tool), stats in sorted(self._tools.items())
+                     if server is None or name == server]
+            lines = []
+
+            def family(metric: str, kind: str, help_text: str, values):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for suffix, labels, value in values:
+                    label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                    lines.append(f"{metric}{suffix}{{{label_text}}} {value}")
+
+            def tool_labels(name, tool):
+                if instance is None:
+                    return {"server": name, "tool": tool}
+                return {"server": name, "instance": instance, "tool": tool}
+
+            def per_tool(attribute):
+                return [("", tool_labels(name, tool), getattr(stats, attribute)) for name, tool, stats in items]
+
+            family("mcp_tool_calls_total", "counter", "Tool calls handled", per_tool("calls"))
+            family("mcp_tool_errors_total", "counter", "Tool calls that raised or returned an error",
+                   per_tool("errors"))
+            family("mcp_tool_request_bytes_total", "counter", "JSON size of tool arguments",
+                   per_tool("request_bytes"))
+            family("mcp_tool_response_bytes_total", "counter", "Size of tool results", per_tool("response_bytes"))
+
+            histogram = []
+            for name, tool, stats in items:
+                labels = tool_labels(name, tool)
+                cumulative = 0
+                for bound, count in zip(PROMETHEUS_BUCKETS + ("+Inf",), stats.latency.le_counts):
+                    cumulative += count
+                    histogram.append(("_bucket", {**labels, "le": bound}, cumulative))
+                histogram.append(("_sum", labels, stats.latency.total_us / 1e6))
+                histogram.append(("_count", labels, stats.latency.count))
+            family("mcp_tool_duration_seconds", "histogram", "Tool call latency", histogram)
+
+            family("mcp_tool_duration_quantile_seconds", "gauge", "Tool call latency quantiles since start-up", [
+                ("", {**tool_labels(name, tool), "quantile": q}, stats.latency.percentile(q) / 1000)
+                for name, tool, stats in items for q in QUANTILES.values()
+            ])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def add_metrics_tool(mcp) -> None:
+    """Register a get_server_metrics tool reporting this server's tool stats"""
+    @mcp.tool()
+    def get_server_metrics() -> str:
+        """Get call counts, error rates, payload sizes and latency percentiles for this server's tools"""
+        return dumps({"server": mcp.name, **registry.snapshot(mcp.name)})
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsExporter:
+    """Writes one server process's stats to a Prometheus text file: at start, periodically, and at exit"""
+
+    def __init__(self, server: str, directory: str = METRICS_DIR, interval: float = EXPORT_INTERVAL):
+        self.server = server
+        self.instance = str(os.getpid())
+        self.slug = re.sub(r"[^a-z0-9]+", "_", server.lower()).strip("_")
+        self.directory = directory
+        self.path = os.path.join(directory, f"{self.slug}-{self.instance}.prom")
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._at_exit = False
+
+    def run_once(self) -> None:
+        """Write the current stats; the rename keeps scrapers from reading a half-written file"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(registry.prometheus_text(self.server, self.instance))
+        os.replace(tmp_path, self.path)
+
+    def remove_stale(self) -> None:
+        """Delete files this server's earlier processes left behind once they have had time to be scraped"""
+        cutoff = time.time() - STALE_AFTER
+        for path in glob.glob(os.path.join(self.directory, f"{self.slug}-*.prom")):
+            pid = os.path.basename(path)[len(self.slug) + 1:-len(".prom")]
+            try:
+                if pid.isdigit() and not _pid_alive(int(pid)) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _write(self) -> None:
+        try:
+            self.run_once()
+        except Exception as e:
+            print(f"Error writing metrics to {self.path}: {e}", file=sys.stderr)
+
+    def _run(self) -> None:
+        self.remove_stale()
+        self._write()
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def start(self) -> None:
+        """Start writing the metrics file on a daemon thread, and once more when the process exits"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+            self._thread.start()
+        if not self._at_exit:
+            atexit.register(self.stop)
+            self._at_exit = True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._write()
@@ -0,0 +1,59 @@
+"""Trigram index for case-insensitive substring lookups over topics"""
+
+GRAM_SIZE = 3
+
+
+def normalize_topic(topic: str) -> str:
+    return topic.lower()
+
+
+def topic_grams(topic: str) -> set[str]:
+    """Return the trigrams of a normalized topic.
+
+    Topics shorter than a trigram are indexed under their whole normalized text, so every
+    topic has at least one entry without ever matching a trigram query it doesn't contain.
+    """
+    text = normalize_topic(topic)
+    if len(text) < GRAM_SIZE:
+        return {text}
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def query_grams(query: str) -> set[str] | None:
+    """Return the trigrams every match must contain, or None if the query is too short to index."""
+    text = normalize_topic(query)
+    if len(text) < GRAM_SIZE:
+        return None
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def matches(query: str, topic: str) -> bool:
+    """The matching rule the index accelerates: case-insensitive substring."""
+    return query.lower() in topic.lower()
+
+
+class TopicIndex:
+    """In-memory trigram index over a list of topics, addressed by position"""
+
+    def __init__(self, topics=()):
+        self.topics: list[str] = []
+        self.postings: dict[str, set[int]] = {}
+        for topic in topics:
+            self.add(topic)
+
+    def add(self, topic: str) -> int:
+        position = len(self.topics)
+        self.topics.append(topic)
+        for gram in topic_grams(topic):
+            self.postings.setdefault(gram, set()).add(position)
+        return position
+
+    def search(self, query: str) -> list[int]:
+        """Return positions of topics containing query, in insertion order"""
+        grams = query_grams(query)
+        if grams is None:
+            candidates = range(len(self.topics))
+        else:
+            postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            candidates = sorted(set.intersection(*postings)) if postings[0] else []
+        return [i for i in candidates if matches(query, self.topics[i])]
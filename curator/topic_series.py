@@ -0,0 +1,121 @@
+"""Per-topic engagement time series and vectorized momentum (EWMA, velocity, acceleration)"""
+import numpy as np
+
+import clock
+from database import write_topic_samples, read_topic_samples
+
+MOMENTUM_WINDOW_HOURS = 14 * 24
+MOMENTUM_BUCKET_HOURS = 24  # trends are collected once per day
+EWMA_ALPHA = 0.5
+
+
+class TopicSeries:
+    """Columnar view of sampled engagement: topics x time buckets, one matrix per source"""
+
+    def __init__(self, topics: list[str], sources: list[str], bucket_starts: np.ndarray, values: np.ndarray,
+                 observed: np.ndarray):
+        self.topics = topics
+        self.sources = sources
+        self.bucket_starts = bucket_starts  # epoch seconds, shape (buckets,)
+        self.values = values                # shape (sources, topics, buckets), forward-filled
+        self.observed = observed            # shape (topics, buckets), True where any sample landed
+
+    def weighted(self, weights: dict[str, float], scale: float = 1.0) -> np.ndarray:
+        """Collapse sources into one topics x buckets matrix of weighted engagement"""
+        weight_vector = np.array([weights.get(source, 0.0) for source in self.sources])
+        return np.tensordot(weight_vector, self.values, axes=1) / scale
+
+
+def record_samples(trends: dict, ts: int | None = None) -> None:
+    """Store one engagement sample per topic and source from a trends snapshot"""
+    ts = int(clock.time()) if ts is None else ts
+    write_topic_samples([
+        (topic, ts, source, float(value))
+        for topic, trend in trends.items()
+        for source, value in trend.sources.items()
+    ])
+
+
+def load_series(since: int, until: int, bucket_seconds: int, topics: list[str] | None = None) -> TopicSeries:
+    """Load samples in [since, until) into fixed-width buckets, keeping the last sample per bucket"""
+    rows = read_topic_samples(since, until, topics)
+    n_buckets = max(1, -(-(until - since) // bucket_seconds))
+    bucket_starts = since + np.arange(n_buckets) * bucket_seconds
+
+    topic_names = topics if topics is not None else sorted({row[0] for row in rows})
+    source_names = sorted({row[2] for row in rows})
+    topic_ids = {topic: i for i, topic in enumerate(topic_names)}
+    source_ids = {source: i for i, source in enumerate(source_names)}
+
+    values = np.full((len(source_names), len(topic_names), n_buckets), np.nan)
+    if rows:
+        topic_col, ts_col, source_col, value_col = zip(*rows)
+        t = np.fromiter((topic_ids[topic] for topic in topic_col), dtype=np.intp, count=len(rows))
+        s = np.fromiter((source_ids[source] for source in source_col), dtype=np.intp, count=len(rows))
+        b = (np.asarray(ts_col, dtype=np.int64) - since) // bucket_seconds
+        # Rows are time-ordered per topic, so later samples overwrite earlier ones in a bucket
+        values[s, t, b] = np.asarray(value_col, dtype=np.float64)
+
+    observed = ~np.isnan(values).all(axis=0)
+    return TopicSeries(topic_names, source_names, bucket_starts, forward_fill(values), observed)
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last observed value forward along the last axis; leading gaps become 0"""
+    mask = np.isnan(values)
+    index = np.where(mask, 0, np.arange(values.shape[-1]))
+    np.maximum.accumulate(index, axis=-1, out=index)
+    filled = np.take_along_axis(values, index, axis=-1)
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def ewma(matrix: np.ndarray, alpha: float = EWMA_ALPHA, start: np.ndarray | None = None) -> np.ndarray:
+    """Exponentially weighted moving average along time, computed for all rows at once.
+
+    With start (one bucket index per row), each row's average is seeded at its own start bucket;
+    the buckets before it are copied through unsmoothed.
+    """
+    smoothed = np.empty_like(matrix)
+    if matrix.shape[-1] == 0:
+        return smoothed
+    start = np.zeros(matrix.shape[:-1], dtype=np.intp) if start is None else start
+    smoothed[..., 0] = matrix[..., 0]
+    for i in range(1, matrix.shape[-1]):
+        step = alpha * matrix[..., i] + (1 - alpha) * smoothed[..., i - 1]
+        smoothed[..., i] = np.where(i <= start, matrix[..., i], step)
+    return smoothed
+
+
+def compute_momentum(series: TopicSeries, weights: dict[str, float], scale: float = 1.0,
+                     alpha: float = EWMA_ALPHA) -> dict[str, dict]:
+    """Velocity and acceleration (per hour) of each topic's smoothed weighted engagement"""
+    bucket_hours = (
+        (series.bucket_starts[1] - series.bucket_starts[0]) / 3600 if len(series.bucket_starts) > 1 else 1.0
+    )
+    level = series.weighted(weights, scale)
+    # Smoothing and rate of change run from the first bucket a topic was actually sampled in;
+    # the zero-filled buckets before it would otherwise read as a jump from nothing
+    first = np.argmax(series.observed, axis=1)
+    smoothed = ewma(level, alpha, first)
+
+    samples = series.observed.sum(axis=1)
+    last = smoothed[:, -1]
+    previous = smoothed[:, -2] if smoothed.shape[1] > 1 else last
+    before_previous = smoothed[:, -3] if smoothed.shape[1] > 2 else previous
+
+    # A difference needs two sampled buckets and a second difference three; until then both are 0
+    velocity = np.where(samples >= 2, (last - previous) / bucket_hours, 0.0)
+    acceleration = np.where(samples >= 3, ((last - previous) - (previous - before_previous)) / bucket_hours ** 2, 0.0)
+    start = np.take_along_axis(level, first[:, None], axis=1)[:, 0]
+    rate_of_change = np.divide(level[:, -1] - start, np.abs(start), out=np.zeros_like(start), where=start != 0)
+
+    return {
+        topic: {
+            "ewma": float(last[i]),
+            "velocity": float(velocity[i]),
+            "acceleration": float(acceleration[i]),
+            "rate_of_change": float(rate_of_change[i]),
+            "samples": int(samples[i]),
+        }
+        for i, topic in enumerate(series.topics)
+    }
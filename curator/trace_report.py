@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Waterfall, critical path and time breakdown of curator runs, rebuilt from the spans table.
+
+    python trace_report.py list [--limit N]
+    python trace_report.py show [TRACE_ID|latest] [--chrome out.json]
+    python trace_report.py modes [--hours H]
+    python trace_report.py chrome out.json [--hours H]
+"""
+import argparse
+import heapq
+import itertools
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from database import read_spans
+from serialization import dumpb
+
+CATEGORIES = ("llm", "tools", "sqlite", "json", "http", "mcp_startup", "mcp_list_tools", "idle")
+GAP_THRESHOLD_MS = 100.0
+BAR_WIDTH = 40
+
+
+def span_category(span: dict) -> str:
+    """Which bucket time spent directly in a span (not in its children) counts towards"""
+    kind = span["kind"]
+    if kind in ("generation", "response"):
+        return "llm"
+    if kind in ("function", "mcp_server"):
+        return "tools"
+    if kind in ("sqlite", "json", "http"):
+        # Recorded inside the MCP server processes
+        return kind
+    if kind == "mcp_tools":
+        return "mcp_list_tools"
+    if kind == "custom" and span["name"] == "mcp_startup":
+        return "mcp_startup"
+    # Trace, agent and other framework spans only count where nothing below them is running
+    return "idle"
+
+
+class TraceTree:
+    """One trace's spans linked into a tree, with times relative to the trace start in ms"""
+
+    def __init__(self, spans: list[dict]):
+        self.root = next((span for span in spans if span["kind"] == "trace"), None)
+        if self.root is None:
+            trace_id = spans[0]["trace_id"] if spans else None
+            raise LookupError(f"Trace {trace_id} not found" if trace_id else "Trace not found")
+        self.spans = spans
+        self.start = self.root["start_ts"]
+        self.children = defaultdict(list)
+        span_ids = {span["span_id"] for span in spans}
+        for span in spans:
+            if span is not self.root:
+                # Spans whose parent wasn't recorded hang off the root
+                parent = span["parent_id"] if span["parent_id"] in span_ids else self.root["span_id"]
+                self.children[parent].append(span)
+        for children in self.children.values():
+            children.sort(key=lambda span: span["start_ts"])
+
+    @classmethod
+    def load(cls, trace_id: str) -> "TraceTree":
+        spans = read_spans(trace_id=trace_id)
+        if not any(span["kind"] == "trace" for span in spans):
+            raise LookupError(f"Trace {trace_id} not found")
+        return cls(spans)
+
+    def offset_ms(self, ts: float) -> float:
+        return (ts - self.start) * 1000
+
+    def walk(self, span: dict | None = None, depth: int = 0):
+        """Yield (depth, span) in start order, depth first"""
+        span = span or self.root
+        yield depth, span
+        for child in self.children[span["span_id"]]:
+            yield from self.walk(child, depth + 1)
+
+    def breakdown(self) -> dict[str, float]:
+        """Wall-clock ms per category; each instant goes to the deepest span running then, so the parts sum
+        to the trace duration even when tool calls run concurrently"""
+        depths = {span["span_id"]: depth for depth, span in self.walk()}
+        spans = [span for span in self.spans if span["span_id"] in depths and span["end_ts"] > span["start_ts"]]
+        # Sweep the start and end times in order, keeping the running spans in a heap deepest first;
+        # spans that have ended are dropped from the heap once they reach the top
+        ranks = [(-depths[span["span_id"]], CATEGORIES.index(span_category(span)), i) for i, span in enumerate(spans)]
+        events = sorted(itertools.chain(((span["start_ts"], True, i) for i, span in enumerate(spans)),
+                                        ((span["end_ts"], False, i) for i, span in enumerate(spans))))
+        running, ended = [], set()
+        totals = dict.fromkeys(CATEGORIES, 0.0)
+        previous = None
+        for ts, group in itertools.groupby(events, key=lambda event: event[0]):
+            while running and running[0][2] in ended:
+                heapq.heappop(running)
+            if running:
+                totals[CATEGORIES[running[0][1]]] += (ts - previous) * 1000
+            for _, starts, i in group:
+                if starts:
+                    heapq.heappush(running, ranks[i])
+                else:
+                    ended.add(i)
+            previous = ts
+        return totals
+
+    def critical_path(self, span: dict | None = None) -> list[dict]:
+        """The chain of spans that determined when the span finished"""
+        span = span or self.root
+        path = []
+        horizon = span["end_ts"]
+        for child in sorted(self.children[span["span_id"]], key=lambda s: s["end_ts"], reverse=True):
+            if child["end_ts"] <= horizon + 1e-6:
+                path = self.critical_path(child) + path
+                horizon = child["start_ts"]
+        return [span] + path
+
+    def gaps(self, threshold_ms: float = GAP_THRESHOLD_MS) -> list[dict]:
+        """Stretches inside a span where none of its children were running"""
+        found = []
+        for _, span in self.walk():
+            children = self.children[span["span_id"]]
+            if not children:
+                continue
+            cursor = span["start_ts"]
+            for child in children + [{"start_ts": span["end_ts"], "end_ts": span["end_ts"]}]:
+                gap_ms = (child["start_ts"] - cursor) * 1000
+                if gap_ms >= threshold_ms:
+                    found.append({"parent": label(span), "at_ms": self.offset_ms(cursor), "gap_ms": gap_ms})
+                cursor = max(cursor, child["end_ts"])
+        return sorted(found, key=lambda gap: gap["gap_ms"], reverse=True)
+
+
+def label(span: dict) -> str:
+    name = span["name"] or span["kind"]
+    if span["server"]:
+        name = f"{span['server']}/{name}"
+    return name if span["kind"] == "trace" else f"{span['kind']}:{name}"
+
+
+def print_waterfall(tree: TraceTree) -> None:
+    total_ms = max(tree.root["duration_ms"], 1e-3)
+    critical = {span["span_id"] for span in tree.critical_path()}
+    print(f"{tree.root['name']}  {tree.root['trace_id']}  {total_ms / 1000:.2f}s")
+    for depth, span in tree.walk():
+        start = tree.offset_ms(span["start_ts"])
+        left = int(start / total_ms * BAR_WIDTH)
+        width = max(1, int(span["duration_ms"] / total_ms * BAR_WIDTH))
+        bar = " " * left + "#" * min(width, BAR_WIDTH - left)
+        marker = "*" if span["span_id"] in critical else " "
+        tokens = f"  {span['input_tokens']}+{span['output_tokens']} tok" if span["input_tokens"] is not None else ""
+        error = f"  ERROR {span['error']}" if span["error"] else ""
+        print(f"{marker} {bar:<{BAR_WIDTH}} {start:9.0f} {span['duration_ms']:9.0f} ms  "
+              f"{'  ' * depth}{label(span)}{tokens}{error}")
+
+
+def print_summary(tree: TraceTree) -> None:
+    total_ms = max(tree.root["duration_ms"], 1e-3)
+    print("\nTime breakdown:")
+    for category, ms in tree.breakdown().items():
+        print(f"  {category:<15} {ms:9.0f} ms  {ms / total_ms:6.1%}")
+    print("\nCritical path:")
+    for span in tree.critical_path()[1:]:
+        print(f"  {tree.offset_ms(span['start_ts']):9.0f} ms  {span['duration_ms']:9.0f} ms  {label(span)}")
+    gaps = tree.gaps()
+    if gaps:
+        print(f"\nIdle gaps over {GAP_THRESHOLD_MS:.0f} ms:")
+        for gap in gaps[:10]:
+            print(f"  {gap['at_ms']:9.0f} ms  {gap['gap_ms']:9.0f} ms  in {gap['parent']}")
+
+
+def assign_lanes(spans: list[dict]) -> dict[str, int]:
+    """Thread lanes in which every span nests properly, so overlapping siblings don't collide in the viewer"""
+    lanes: list[list[float]] = []  # per lane, a stack of open span end times
+    assignment = {}
+    for span in sorted(spans, key=lambda s: (s["start_ts"], -s["end_ts"])):
+        for lane, stack in enumerate(lanes):
+            while stack and stack[-1] <= span["start_ts"]:
+                stack.pop()
+            if not stack or stack[-1] >= span["end_ts"]:
+                break
+        else:
+            lanes.append([])
+            lane, stack = len(lanes) - 1, lanes[-1]
+        stack.append(span["end_ts"])
+        assignment[span["span_id"]] = lane + 1
+    return assignment
+
+
+def chrome_trace(trees: list[TraceTree]) -> dict:
+    """Chrome trace-event JSON (one process per run), loadable in Perfetto or chrome://tracing"""
+    events = []
+    for pid, tree in enumerate(trees, start=1):
+        events.append({"ph": "M", "name": "process_name", "pid": pid, "args": {"name": tree.root["name"]}})
+        lanes = assign_lanes(tree.spans)
+        for span in tree.spans:
+            args = {k: span[k] for k in ("server", "model", "input_tokens", "output_tokens", "error") if span[k]}
+            events.append({
+                "name": label(span),
+                "cat": span_category(span) if span["kind"] != "trace" else "trace",
+                "ph": "X",
+                "ts": span["start_ts"] * 1e6,
+                "dur": span["duration_ms"] * 1e3,
+                "pid": pid,
+                "tid": lanes[span["span_id"]],
+                "args": args,
+            })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def mode_summary(trees: list[TraceTree]) -> dict[str, dict]:
+    """Per mode: run count, duration percentiles, share of all cycle time and mean breakdown"""
+    by_mode = defaultdict(list)
+    for tree in trees:
+        by_mode[tree.root["mode"] or "unknown"].append(tree)
+    total = sum(tree.root["duration_ms"] for tree in trees) or 1.0
+    summary = {}
+    for mode, mode_trees in sorted(by_mode.items()):
+        durations = np.array([tree.root["duration_ms"] for tree in mode_trees])
+        breakdowns = [tree.breakdown() for tree in mode_trees]
+        summary[mode] = {
+            "runs": len(mode_trees),
+            "p50_s": float(np.percentile(durations, 50)) / 1000,
+            "p95_s": float(np.percentile(durations, 95)) / 1000,
+            "share_of_cycle_time": float(durations.sum()) / total,
+            "mean_ms": {
+                category: sum(b[category] for b in breakdowns) / len(breakdowns) for category in CATEGORIES
+            },
+        }
+    return summary
+
+
+def print_mode_summary(summary: dict[str, dict]) -> None:
+    header = "".join(f"{category:>15}" for category in CATEGORIES)
+    print(f"{'mode':<18}{'runs':>5}{'p50 s':>9}{'p95 s':>9}{'share':>8}{header}")
+    for mode, stats in sorted(summary.items(), key=lambda item: item[1]["share_of_cycle_time"], reverse=True):
+        means = "".join(f"{stats['mean_ms'][category] / 1000:14.1f}s" for category in CATEGORIES)
+        print(f"{mode:<18}{stats['runs']:>5}{stats['p50_s']:9.1f}{stats['p95_s']:9.1f}"
+              f"{stats['share_of_cycle_time']:8.1%}{means}")
+
+
+def load_trees(hours: float | None = None) -> list[TraceTree]:
+    since = time.time() - hours * 3600 if hours else None
+    return [TraceTree.load(root["trace_id"]) for root in read_spans(kind="trace", since=since)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Curator trace waterfall and critical-path report")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="recent runs")
+    list_parser.add_argument("--limit", type=int, default=20)
+    show_parser = commands.add_parser("show", help="waterfall, breakdown and critical path of one run")
+    show_parser.add_argument("trace_id", nargs="?", default="latest")
+    show_parser.add_argument("--chrome", help="also write a Chrome trace-event file")
+    modes_parser = commands.add_parser("modes", help="cycle time per curator mode")
+    modes_parser.add_argument("--hours", type=float)
+    chrome_parser = commands.add_parser("chrome", help="write all runs as one Chrome trace-event file")
+    chrome_parser.add_argument("output")
+    chrome_parser.add_argument("--hours", type=float)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for root in read_spans(kind="trace")[-args.limit:]:
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(root["start_ts"]))
+            print(f"{started}  {root['duration_ms'] / 1000:8.1f}s  {root['trace_id']}  {root['name']}")
+    elif args.command == "show":
+        trace_id = args.trace_id
+        if trace_id == "latest":
+            roots = read_spans(kind="trace")
+            if not roots:
+                print("No traces recorded")
+                return
+            trace_id = roots[-1]["trace_id"]
+        try:
+            tree = TraceTree.load(trace_id)
+        except LookupError as e:
+            print(e)
+            return
+        print_waterfall(tree)
+        print_summary(tree)
+        if args.chrome:
+            with open(args.chrome, "wb") as f:
+                f.write(dumpb(chrome_trace([tree])))
+            print(f"\nWrote {args.chrome}")
+    elif args.command == "modes":
+        print_mode_summary(mode_summary(load_trees(args.hours)))
+    elif args.command == "chrome":
+        trees = load_trees(args.hours)
+        with open(args.output, "wb") as f:
+            f.write(dumpb(chrome_trace(trees)))
+        print(f"Wrote {len(trees)} runs to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
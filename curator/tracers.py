@@ -1,10 +1,21 @@
-from agents import TracingProcessor, Trace, Span
-from database import write_log
+from agents import TracingProcessor, Trace, Span, get_current_span, get_current_trace
+from agents.mcp import MCPServerStdio
+from mcp import types
+from mcp.shared.message import SessionMessage
+from database import write_log, write_spans
+from server_tracing import now_ts
 import secrets
 import string
+import threading
+from contextlib import asynccontextmanager
 
 ALPHANUM = string.ascii_lowercase + string.digits 
 
+SPAN_BATCH_SIZE = 50
+
+# Operator-facing tools every server registers; kept out of the agents' tool lists
+OPERATOR_TOOLS = {"get_server_metrics", "set_profiling", "get_profile_summary"}
+
 def make_trace_id(tag: str) -> str:
     """
     Return a string of the form 'trace_<tag><random>',
@@ -15,8 +26,47 @@ def make_trace_id(tag: str) -> str:
     random_suffix = ''.join(secrets.choice(ALPHANUM) for _ in range(pad_len))
     return f"trace_{tag}{random_suffix}"
 
+def span_details(span: Span) -> dict:
+    """Kind, name, server, model and token usage of a finished span"""
+    data = span.span_data
+    details = {"kind": data.type if data else "span"}
+    if data is None:
+        return details
+    details["name"] = getattr(data, "name", None)
+    details["server"] = getattr(data, "server", None)
+    mcp_data = getattr(data, "mcp_data", None)
+    if mcp_data:
+        details["server"] = mcp_data.get("server")
+    model = getattr(data, "model", None)
+    if model:
+        details["model"] = str(model)
+        details["name"] = details["name"] or str(model)
+    usage = getattr(data, "usage", None)
+    response = getattr(data, "response", None)
+    if usage is None and response is not None and getattr(response, "usage", None):
+        usage = {"input_tokens": response.usage.input_tokens, "output_tokens": response.usage.output_tokens}
+        details["model"] = response.model
+    if usage:
+        details["input_tokens"] = usage.get("input_tokens")
+        details["output_tokens"] = usage.get("output_tokens")
+    return details
+
 class LogTracer(TracingProcessor):
 
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: list[dict] = []
+        self._starts: dict[str, float] = {}
+        self._traces: dict[str, tuple[str, str]] = {}  # trace_id -> (account, mode)
+
+    def _record(self, row: dict) -> None:
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) < SPAN_BATCH_SIZE:
+                return
+            batch, self._pending = self._pending, []
+        write_spans(batch)
+
     def get_name(self, trace_or_span: Trace | Span) -> str | None:
         trace_id = trace_or_span.trace_id
         name = trace_id.split("_")[1]
@@ -27,15 +77,28 @@ class LogTracer(TracingProcessor):
 
     def on_trace_start(self, trace) -> None:
         name = self.get_name(trace)
+        self._starts[trace.trace_id] = now_ts()
         if name:
+            # Curator traces are named "<name>-<mode>"
+            self._traces[trace.trace_id] = (name, trace.name.rsplit("-", 1)[-1])
             write_log(name, "trace", f"Started: {trace.name}")
 
     def on_trace_end(self, trace) -> None:
         name = self.get_name(trace)
+        end = now_ts()
+        start = self._starts.pop(trace.trace_id, end)
+        account, mode = self._traces.pop(trace.trace_id, (name, None))
+        self._record({
+            "span_id": trace.trace_id, "trace_id": trace.trace_id, "account": account, "mode": mode,
+            "kind": "trace", "name": trace.name, "start_ts": start, "end_ts": end,
+            "duration_ms": (end - start) * 1000,
+        })
+        self.force_flush()
         if name:
             write_log(name, "trace", f"Ended: {trace.name}")
 
     def on_span_start(self, span) -> None:
+        self._starts[span.span_id] = now_ts()
         name = self.get_name(span)
         type = span.span_data.type if span.span_data else "span"
         if name:
@@ -52,6 +115,15 @@ class LogTracer(TracingProcessor):
             write_log(name, type, message)
 
     def on_span_end(self, span) -> None:
+        end = now_ts()
+        start = self._starts.pop(span.span_id, end)
+        account, mode = self._traces.get(span.trace_id, (self.get_name(span), None))
+        self._record({
+            "span_id": span.span_id, "trace_id": span.trace_id, "parent_id": span.parent_id or span.trace_id,
+            "account": account, "mode": mode, "start_ts": start, "end_ts": end, "duration_ms": (end - start) * 1000,
+            "error": span.error["message"] if span.error else None,
+            **span_details(span),
+        })
         name = self.get_name(span)
         type = span.span_data.type if span.span_data else "span"
         if name:
@@ -69,7 +141,53 @@ class LogTracer(TracingProcessor):
             write_log(name, type, message)
 
     def force_flush(self) -> None:
-        pass
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            write_spans(batch)
 
     def shutdown(self) -> None:
-        pass
\ No newline at end of file
+        self.force_flush()
+
+
+class TraceMetaStream:
+    """Write side of an MCP server connection that adds the current trace and span ids to the _meta
+    of each tools/call request sent while a trace is active"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self._stream.__aexit__(*exc)
+
+    async def send(self, message: SessionMessage) -> None:
+        request = message.message.root
+        trace = get_current_trace()
+        if trace is not None and isinstance(request, types.JSONRPCRequest) and request.method == "tools/call":
+            span = get_current_span()
+            params = dict(request.params or {})
+            params["_meta"] = {**params.get("_meta", {}), "trace_id": trace.trace_id, "trace_name": trace.name,
+                               "span_id": span.span_id if span else None}
+            message = SessionMessage(types.JSONRPCMessage(request.model_copy(update={"params": params})),
+                                     metadata=message.metadata)
+        await self._stream.send(message)
+
+
+class TracedMCPServerStdio(MCPServerStdio):
+    """MCPServerStdio that passes the current trace and span ids to the server in each tool call's _meta,
+    and doesn't offer the servers' operator tools to the agents"""
+
+    @asynccontextmanager
+    async def create_streams(self):
+        async with super().create_streams() as (read_stream, write_stream, *rest):
+            yield read_stream, TraceMetaStream(write_stream), *rest
+
+    async def list_tools(self) -> list[types.Tool]:
+        return [tool for tool in await super().list_tools() if tool.name not in OPERATOR_TOOLS]
@@ -3,9 +3,24 @@ import os
 import requests
 import json
 from datetime import datetime, timedelta
+import clock
 import random
+import sys
+import time
+import struct
+import threading
+import numpy as np
+import orjson
 from database import write_trends, read_trends
 from functools import lru_cache
+from itertools import takewhile
+from topic_index import TopicIndex
+from hackernews import crawl_hackernews
+from topic_series import record_samples, load_series, compute_momentum, MOMENTUM_WINDOW_HOURS, MOMENTUM_BUCKET_HOURS
+from collector_runtime import (
+    fetch_json, post_json, token_cache, configure_api, get_api,
+    RateLimitExceeded, CircuitOpenError,
+)
 import tweepy
 
 load_dotenv(override=True)
@@ -15,7 +30,6 @@ reddit_client_id = os.getenv("REDDIT_CLIENT_ID")
 reddit_client_secret = os.getenv("REDDIT_CLIENT_SECRET")
 twitter_bearer_token = os.getenv("TWITTER_BEARER_TOKEN")
 youtube_api_key = os.getenv("YOUTUBE_API_KEY")
-hackernews_base_url = "https://hacker-news.firebaseio.com/v0"
 
 # Trend scoring weights
 REDDIT_WEIGHT = 0.3
@@ -23,6 +37,35 @@ TWITTER_WEIGHT = 0.25
 HACKERNEWS_WEIGHT = 0.25
 YOUTUBE_WEIGHT = 0.2
 
+SOURCE_WEIGHTS = {
+    "reddit": REDDIT_WEIGHT,
+    "twitter": TWITTER_WEIGHT,
+    "hackernews": HACKERNEWS_WEIGHT,
+    "youtube": YOUTUBE_WEIGHT,
+}
+
+# Optional per-source normalization applied before weighting: "log" (log1p) or "zscore"
+SOURCE_NORMALIZATION: dict[str, str] = {}
+
+# Weighted engagement that maps to a score of 1 on the 0-100 scale
+SCORE_SCALE = 100
+
+# Score factor for topics that only match a tracked keyword
+PARTIAL_MATCH_FACTOR = 0.7
+
+# Request budgets per API: (sustained requests/second, burst size)
+API_RATE_LIMITS = {
+    "reddit": (100 / 60, 10),       # 100 queries/minute per OAuth client
+    "hackernews": (20, 20),
+    "youtube": (100 / 86400, 100),  # a search costs 100 of the 10,000 daily quota units
+    "twitter": (60 / 900, 60),      # recent search, per 15-minute window
+}
+for api_name, (rate, burst) in API_RATE_LIMITS.items():
+    configure_api(api_name, rate, burst)
+
+# Errors that mean an API has no budget left for this collection run
+QUOTA_ERRORS = (RateLimitExceeded, CircuitOpenError)
+
 AI_KEYWORDS = [
     "artificial intelligence", "machine learning", "deep learning", "neural networks",
     "GPT", "Claude", "ChatGPT", "LLM", "large language model", "generative AI",
@@ -35,6 +78,8 @@ AI_KEYWORDS = [
 
 
 class TrendData:
+    __slots__ = ("topic", "score", "sources", "timestamp")
+
     def __init__(self, topic: str, score: float, sources: dict, timestamp: str):
         self.topic = topic
         self.score = score
@@ -49,33 +94,128 @@ class TrendData:
             "timestamp": self.timestamp
         }
 
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["topic"], data["score"], data["sources"], data["timestamp"])
+
+
+class TrendSnapshot:
+    """A day's trends stored as parallel arrays, read like a {topic: TrendData} dict"""
+
+    MAGIC = b"TRS1"
+
+    def __init__(self, topics: list[str], sources: list[str], values: np.ndarray, scores: np.ndarray,
+                 timestamps: list[str]):
+        self.topics = [sys.intern(topic) for topic in topics]
+        self.sources = tuple(sys.intern(source) for source in sources)
+        self.matrix = np.ascontiguousarray(values, dtype=np.float64).reshape(len(self.topics), len(self.sources))
+        self.scores = np.ascontiguousarray(scores, dtype=np.float64)
+        self.timestamps = [sys.intern(timestamp) for timestamp in timestamps]
+        self.index = {topic: i for i, topic in enumerate(self.topics)}
+
+    @classmethod
+    def from_trends(cls, trends: dict):
+        """Build a snapshot from a {topic: TrendData} dict"""
+        sources = list(dict.fromkeys(source for trend in trends.values() for source in trend.sources))
+        values = np.array(
+            [[trend.sources.get(source, 0) for source in sources] for trend in trends.values()],
+            dtype=np.float64
+        )
+        scores = np.fromiter((trend.score for trend in trends.values()), dtype=np.float64, count=len(trends))
+        return cls(list(trends), sources, values, scores, [trend.timestamp for trend in trends.values()])
+
+    def __len__(self):
+        return len(self.topics)
+
+    def __contains__(self, topic):
+        return topic in self.index
+
+    def __iter__(self):
+        return iter(self.topics)
+
+    def __getitem__(self, topic: str) -> TrendData:
+        i = self.index[topic]
+        return TrendData(topic, float(self.scores[i]), dict(zip(self.sources, self.matrix[i].tolist())),
+                         self.timestamps[i])
+
+    def get(self, topic: str, default=None):
+        return self[topic] if topic in self.index else default
+
+    def keys(self):
+        return list(self.topics)
+
+    def values(self):
+        return [self[topic] for topic in self.topics]
+
+    def items(self):
+        return [(topic, self[topic]) for topic in self.topics]
+
+    def to_dict(self):
+        return {topic: trend.to_dict() for topic, trend in self.items()}
+
+    def to_bytes(self) -> bytes:
+        """Serialize as MAGIC, a length-prefixed orjson header, then the raw float64 arrays"""
+        header = orjson.dumps({"topics": self.topics, "sources": self.sources, "timestamps": self.timestamps})
+        return b"".join([
+            self.MAGIC, struct.pack("<I", len(header)), header, self.scores.tobytes(), self.matrix.tobytes()
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        if data[:4] != cls.MAGIC:
+            raise ValueError("Not a serialized TrendSnapshot")
+        (header_length,) = struct.unpack_from("<I", data, 4)
+        offset = 8 + header_length
+        header = orjson.loads(data[8:offset])
+        n_topics, n_sources = len(header["topics"]), len(header["sources"])
+        scores = np.frombuffer(data, dtype=np.float64, count=n_topics, offset=offset)
+        values = np.frombuffer(data, dtype=np.float64, count=n_topics * n_sources, offset=offset + scores.nbytes)
+        return cls(header["topics"], header["sources"], values.copy(), scores.copy(), header["timestamps"])
+
+
+def get_reddit_access_token() -> tuple[str, float]:
+    """Request a Reddit application-only OAuth token and its lifetime in seconds"""
+    auth = requests.auth.HTTPBasicAuth(reddit_client_id, reddit_client_secret)
+    data = {'grant_type': 'client_credentials', 'username': 'ai-curator-bot', 'password': ''}
+    headers = {'User-Agent': 'AI-Curator/0.1'}
+    
+    token = post_json('https://www.reddit.com/api/v1/access_token',
+                      api="reddit", auth=auth, data=data, headers=headers)
+    return token['access_token'], token.get('expires_in', 3600)
+
+
+@lru_cache(maxsize=1)
+def get_twitter_client(bearer_token: str) -> tweepy.Client:
+    """Get a shared Twitter API v2 client (it keeps its own keep-alive session)"""
+    return tweepy.Client(bearer_token=bearer_token)
+
 
 def get_reddit_ai_trends() -> dict[str, float]:
     """Get trending AI topics from Reddit"""
+    trends = {}
     try:
         if not reddit_client_id or not reddit_client_secret:
             return {}
         
-        # Reddit API authentication
-        auth = requests.auth.HTTPBasicAuth(reddit_client_id, reddit_client_secret)
-        data = {'grant_type': 'client_credentials', 'username': 'ai-curator-bot', 'password': ''}
-        headers = {'User-Agent': 'AI-Curator/0.1'}
-        
-        response = requests.post('https://www.reddit.com/api/v1/access_token',
-                               auth=auth, data=data, headers=headers)
-        token = response.json()['access_token']
-        headers['Authorization'] = f'bearer {token}'
+        token = token_cache.get("reddit", get_reddit_access_token)
+        headers = {'User-Agent': 'AI-Curator/0.1', 'Authorization': f'bearer {token}'}
         
         # Get hot posts from AI-related subreddits
         subreddits = ['MachineLearning', 'artificial', 'OpenAI', 'singularity', 'technology']
-        trends = {}
         
         for subreddit in subreddits:
             url = f'https://oauth.reddit.com/r/{subreddit}/hot'
-            response = requests.get(url, headers=headers, params={'limit': 25})
+            try:
+                listing = fetch_json(url, headers=headers, params={'limit': 25}, api="reddit")
+            except QUOTA_ERRORS as e:
+                print(f"Stopping Reddit collection at r/{subreddit}: {e}")
+                break
+            except Exception as e:
+                print(f"Error fetching r/{subreddit}: {e}")
+                continue
             
-            if response.status_code == 200:
-                posts = response.json()['data']['children']
+            if listing is not None:
+                posts = listing['data']['children']
                 for post in posts:
                     title = post['data']['title'].lower()
                     score = post['data']['score']
@@ -88,25 +228,21 @@ def get_reddit_ai_trends() -> dict[str, float]:
         return trends
     except Exception as e:
         print(f"Error fetching Reddit trends: {e}")
-        return {}
+        return trends
 
 
 def get_hackernews_ai_trends() -> dict[str, float]:
     """Get trending AI topics from Hacker News"""
     try:
-        # Get top stories
-        response = requests.get(f"{hackernews_base_url}/topstories.json")
-        story_ids = response.json()[:50]  # Top 50 stories
+        # Top stories, served from the item cache where nothing has changed
+        stories = crawl_hackernews()
         
         trends = {}
         
-        for story_id in story_ids:
-            story_response = requests.get(f"{hackernews_base_url}/item/{story_id}.json")
-            story = story_response.json()
-            
-            if story and 'title' in story:
+        for story in stories:
+            if story and story.get('title'):
                 title = story['title'].lower()
-                score = story.get('score', 0)
+                score = story.get('score') or 0
                 
                 # Check if title contains AI keywords
                 for keyword in AI_KEYWORDS:
@@ -121,52 +257,71 @@ def get_hackernews_ai_trends() -> dict[str, float]:
 
 def get_youtube_ai_trends() -> dict[str, float]:
     """Get trending AI topics from YouTube"""
+    trends = {}
     try:
         if not youtube_api_key:
             return {}
-            
-        trends = {}
         
-        for keyword in AI_KEYWORDS[:10]:  # Limit API calls
+        # Cover as many keywords as the quota allows
+        for keyword in AI_KEYWORDS:
             url = "https://www.googleapis.com/youtube/v3/search"
             params = {
                 'part': 'snippet',
                 'q': keyword,
                 'type': 'video',
                 'order': 'relevance',
-                'publishedAfter': (datetime.now() - timedelta(days=7)).isoformat() + 'Z',
+                'publishedAfter': (clock.now() - timedelta(days=7)).isoformat() + 'Z',
                 'maxResults': 10,
                 'key': youtube_api_key
             }
             
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                videos = response.json().get('items', [])
+            try:
+                result = fetch_json(url, params=params, api="youtube")
+            except QUOTA_ERRORS as e:
+                print(f"Stopping YouTube collection after {len(trends)} keywords: {e}")
+                break
+            except Exception as e:
+                print(f"Error fetching YouTube trends for {keyword}: {e}")
+                continue
+            
+            if result is not None:
+                videos = result.get('items', [])
                 total_engagement = sum(1 for video in videos)  # Simplified engagement
                 trends[keyword] = trends.get(keyword, 0) + total_engagement * 100
         
         return trends
     except Exception as e:
         print(f"Error fetching YouTube trends: {e}")
-        return {}
+        return trends
 
 
 def get_twitter_ai_trends() -> dict[str, float]:
     """Get trending AI topics from Twitter (X)"""
+    trends = {}
     try:
         if not twitter_bearer_token:
             return {}
             
         # Using tweepy for Twitter API v2
-        client = tweepy.Client(bearer_token=twitter_bearer_token)
-        trends = {}
+        client = get_twitter_client(twitter_bearer_token)
+        twitter_api = get_api("twitter")
         
-        for keyword in AI_KEYWORDS[:10]:  # Limit API calls
-            tweets = client.search_recent_tweets(
-                query=f'"{keyword}" -is:retweet',
-                max_results=10,
-                tweet_fields=['public_metrics']
-            )
+        # Cover as many keywords as the rate limit allows
+        for keyword in AI_KEYWORDS:
+            try:
+                tweets = twitter_api.call(
+                    client.search_recent_tweets,
+                    query=f'"{keyword}" -is:retweet',
+                    max_results=10,
+                    tweet_fields=['public_metrics'],
+                    retry_on=(tweepy.TooManyRequests, tweepy.TwitterServerError, requests.ConnectionError)
+                )
+            except QUOTA_ERRORS + (tweepy.TooManyRequests,) as e:
+                print(f"Stopping Twitter collection after {len(trends)} keywords: {e}")
+                break
+            except Exception as e:
+                print(f"Error fetching Twitter trends for {keyword}: {e}")
+                continue
             
             if tweets.data:
                 total_engagement = sum(
@@ -179,79 +334,178 @@ def get_twitter_ai_trends() -> dict[str, float]:
         return trends
     except Exception as e:
         print(f"Error fetching Twitter trends: {e}")
-        return {}
+        return trends
 
 
 def calculate_trend_score(topic: str, source_data: dict) -> float:
-    """Calculate weighted trend score from multiple sources"""
-    reddit_score = source_data.get('reddit', 0) * REDDIT_WEIGHT
-    twitter_score = source_data.get('twitter', 0) * TWITTER_WEIGHT
-    hackernews_score = source_data.get('hackernews', 0) * HACKERNEWS_WEIGHT
-    youtube_score = source_data.get('youtube', 0) * YOUTUBE_WEIGHT
-    
-    total_score = reddit_score + twitter_score + hackernews_score + youtube_score
+    """Calculate weighted trend score from multiple sources (raw values, no normalization)"""
+    total_score = sum(source_data.get(source, 0) * weight for source, weight in SOURCE_WEIGHTS.items())
     
     # Normalize to 0-100 scale
-    return min(100, max(0, total_score / 100))
+    return min(100, max(0, total_score / SCORE_SCALE))
+
+
+def normalize_source_matrix(matrix: np.ndarray, sources: list[str], normalization: dict[str, str]) -> np.ndarray:
+    """Apply per-source column normalization to a topics x sources matrix"""
+    modes = np.array([normalization.get(source, "") for source in sources])
+    unknown = set(modes) - {"", "log", "zscore"}
+    if unknown:
+        raise ValueError(f"Unknown source normalization: {sorted(unknown)}")
+
+    matrix = matrix.copy()
+    log_columns = modes == "log"
+    if log_columns.any():
+        matrix[:, log_columns] = np.log1p(np.maximum(matrix[:, log_columns], 0))
+
+    zscore_columns = modes == "zscore"
+    if zscore_columns.any() and len(matrix):
+        columns = matrix[:, zscore_columns]
+        std = columns.std(axis=0)
+        std[std == 0] = 1.0
+        matrix[:, zscore_columns] = (columns - columns.mean(axis=0)) / std
+    return matrix
+
+
+def score_trend_matrix(matrix, sources: list[str], weights: dict[str, float] | None = None,
+                       normalization: dict[str, str] | None = None) -> np.ndarray:
+    """Calculate trend scores for a topics x sources engagement matrix in one step"""
+    weights = SOURCE_WEIGHTS if weights is None else weights
+    normalization = SOURCE_NORMALIZATION if normalization is None else normalization
+
+    matrix = np.asarray(matrix, dtype=np.float64).reshape(-1, len(sources))
+    if normalization:
+        matrix = normalize_source_matrix(matrix, sources, normalization)
+    weight_vector = np.array([weights.get(source, 0.0) for source in sources], dtype=np.float64)
+
+    # Normalize to 0-100 scale
+    return np.clip(matrix @ weight_vector / SCORE_SCALE, 0, 100)
+
+
+# Held while a date's trends are loaded, so concurrent cache misses wait for one crawl instead of each starting one
+_trends_load_lock = threading.Lock()
 
 
 @lru_cache(maxsize=2)
 def get_trends_for_date(today):
     """Get cached trends for a specific date"""
-    trends_data = read_trends(today)
-    if not trends_data:
+    with _trends_load_lock:
+        return _load_trends(today)
+
+
+def _load_trends(today):
+    """Read a date's trends from the database, crawling the sources if none are stored"""
+    stored = read_trends(today)
+    if not stored:
         trends_data = fetch_all_ai_trends()
-        write_trends(today, trends_data)
+        if trends_data:
+            write_trends(today, trends_data.to_bytes())
+    elif isinstance(stored, bytes):
+        trends_data = TrendSnapshot.from_bytes(stored)
+    else:
+        trends_data = TrendSnapshot.from_trends({topic: TrendData.from_dict(trend) for topic, trend in stored.items()})
     return trends_data
 
 
-def fetch_all_ai_trends() -> dict[str, TrendData]:
+@lru_cache(maxsize=2)
+def get_keyword_scores_for_date(today):
+    """Get partial-match scores of the tracked keywords present in a date's trends, in priority order"""
+    trends_data = get_trends_for_date(today)
+    return [
+        (keyword.lower(), trends_data[keyword].score * PARTIAL_MATCH_FACTOR)
+        for keyword in AI_KEYWORDS if keyword in trends_data
+    ]
+
+
+def fetch_all_ai_trends() -> TrendSnapshot:
     """Fetch trends from all sources and combine them"""
-    reddit_trends = get_reddit_ai_trends()
-    hackernews_trends = get_hackernews_ai_trends()
-    youtube_trends = get_youtube_ai_trends()
-    twitter_trends = get_twitter_ai_trends()
-    
-    # Combine all trends
-    all_topics = set(reddit_trends.keys()) | set(hackernews_trends.keys()) | \
-                set(youtube_trends.keys()) | set(twitter_trends.keys())
+    source_trends = {
+        'reddit': get_reddit_ai_trends(),
+        'hackernews': get_hackernews_ai_trends(),
+        'youtube': get_youtube_ai_trends(),
+        'twitter': get_twitter_ai_trends()
+    }
+    sources = list(source_trends)
     
-    trend_objects = {}
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    for topic in all_topics:
-        source_data = {
-            'reddit': reddit_trends.get(topic, 0),
-            'hackernews': hackernews_trends.get(topic, 0),
-            'youtube': youtube_trends.get(topic, 0),
-            'twitter': twitter_trends.get(topic, 0)
-        }
-        
-        score = calculate_trend_score(topic, source_data)
-        trend_objects[topic] = TrendData(topic, score, source_data, timestamp)
+    # Combine all trends into a topics x sources matrix
+    all_topics = list(set().union(*source_trends.values()))
+    matrix = np.column_stack([
+        np.fromiter((trends.get(topic, 0) for topic in all_topics), dtype=np.float64, count=len(all_topics))
+        for trends in source_trends.values()
+    ])
+    scores = score_trend_matrix(matrix, sources)
+    timestamp = clock.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    trend_objects = TrendSnapshot(all_topics, sources, matrix, scores, [timestamp] * len(all_topics))
+    record_samples(trend_objects)
     return trend_objects
 
 
+def get_trend_scores(topics: list[str]) -> list[float]:
+    """Get trend scores for many topics against a single trends snapshot"""
+    today = clock.now().date().strftime("%Y-%m-%d")
+    trends_data = get_trends_for_date(today)
+    keyword_scores = get_keyword_scores_for_date(today)
+
+    scores = []
+    for topic in topics:
+        if topic in trends_data:
+            scores.append(trends_data[topic].score)
+            continue
+        # Fallback: first tracked keyword contained in the topic, at a reduced score
+        lowered = topic.lower()
+        scores.append(next((score for keyword, score in keyword_scores if keyword in lowered), 0.0))
+    return scores
+
+
 def get_trend_score(topic: str) -> float:
     """Get trend score for a specific topic"""
-    today = datetime.now().date().strftime("%Y-%m-%d")
-    trends_data = get_trends_for_date(today)
-    
-    if topic in trends_data:
-        return trends_data[topic].score
-    
-    # Fallback: check if topic contains any AI keywords
-    for keyword in AI_KEYWORDS:
-        if keyword.lower() in topic.lower() and keyword in trends_data:
-            return trends_data[keyword].score * 0.7  # Reduced score for partial match
+    return get_trend_scores([topic])[0]
+
+
+def match_tracked_topic(topic: str) -> str | None:
+    """Map a free-text topic to the tracked keyword its samples are stored under"""
+    if topic in AI_KEYWORDS:
+        return topic
+    lowered = topic.lower()
+    return next((keyword for keyword in AI_KEYWORDS if keyword.lower() in lowered), None)
+
+
+def get_trend_momentum(topics: list[str], window_hours: int = MOMENTUM_WINDOW_HOURS,
+                       bucket_hours: int = MOMENTUM_BUCKET_HOURS) -> dict[str, dict]:
+    """Get EWMA, velocity and acceleration (score points per hour) for topics with sampled history.
+
+    A topic that only contains a tracked keyword gets the keyword's momentum scaled like its score is.
+    """
+    bucket_seconds = bucket_hours * 3600
+    now = int(clock.time())
+    until = now - now % bucket_seconds + bucket_seconds
+    since = until - window_hours * 3600
     
-    return 0.0
+    tracked = {topic: match_tracked_topic(topic) for topic in topics}
+    series = load_series(since, until, bucket_seconds, sorted({t for t in tracked.values() if t}))
+    momentum = compute_momentum(series, SOURCE_WEIGHTS, SCORE_SCALE)
+    result = {}
+    for topic, keyword in tracked.items():
+        if keyword not in momentum or not momentum[keyword]["samples"]:
+            continue
+        if keyword == topic:
+            result[topic] = momentum[keyword]
+        else:
+            result[topic] = {**momentum[keyword], **{
+                key: momentum[keyword][key] * PARTIAL_MATCH_FACTOR for key in ("ewma", "velocity", "acceleration")
+            }}
+    return result
+
+
+def get_trends_timestamp() -> str | None:
+    """When today's trends were collected"""
+    trends_data = get_trends_for_date(clock.now().date().strftime("%Y-%m-%d"))
+    return trends_data.timestamps[0] if trends_data else None
 
 
 def get_top_trending_topics(limit: int = 10) -> list[TrendData]:
     """Get top trending AI topics"""
-    today = datetime.now().date().strftime("%Y-%m-%d")
+    today = clock.now().date().strftime("%Y-%m-%d")
     trends_data = get_trends_for_date(today)
     
     # Sort by score and return top N
@@ -259,10 +513,26 @@ def get_top_trending_topics(limit: int = 10) -> list[TrendData]:
     return sorted_trends[:limit]
 
 
+@lru_cache(maxsize=2)
+def get_trend_index_for_date(today):
+    """Get trends ranked by score together with a topic index over the ranking"""
+    trends_data = get_trends_for_date(today)
+    ranked = sorted(trends_data.values(), key=lambda x: x.score, reverse=True)
+    return ranked, TopicIndex(trend.topic for trend in ranked)
+
+
+def search_trending_topics(keyword: str, limit: int = 5, pool: int = 50) -> list[TrendData]:
+    """Get top trending topics containing a keyword, searching within the top `pool` trends"""
+    today = clock.now().date().strftime("%Y-%m-%d")
+    ranked, index = get_trend_index_for_date(today)
+    positions = list(takewhile(lambda i: i < pool, index.search(keyword)))
+    return [ranked[i] for i in positions[:limit]]
+
+
 def get_mock_trend_score(topic: str) -> float:
     """Mock trend score for testing when APIs are not available"""
     # Simple hash-based mock scoring for consistency
-    score = hash(topic + datetime.now().date().strftime("%Y-%m-%d")) % 100
+    score = hash(topic + clock.now().date().strftime("%Y-%m-%d")) % 100
     return float(score)
 
 
@@ -276,6 +546,15 @@ def get_trend_score_with_fallback(topic: str) -> float:
         return get_mock_trend_score(topic)
 
 
+def get_trend_scores_with_fallback(topics: list[str]) -> list[float]:
+    """Get trend scores for many topics with fallback to mock data if APIs fail"""
+    try:
+        return get_trend_scores(topics)
+    except Exception as e:
+        print(f"Error getting trend scores for {len(topics)} topics: {e}, using mock data")
+        return [get_mock_trend_score(topic) for topic in topics]
+
+
 if __name__ == "__main__":
     # Test the trend scoring system
     trends = get_top_trending_topics(5)
@@ -1,25 +1,42 @@
 #!/usr/bin/env python3
-"""MCP Server for AI Trends Data"""
+"""MCP Server for AI Trends Data
 
+Tools that may load or crawl the trends run on the tool thread pool (traced_tool offload), so cheap
+tools keep answering while a crawl is in progress; today's trends are prefetched at startup.
+"""
+
+import sys
+import threading
 from mcp.server.fastmcp import FastMCP
+from server_tracing import traced_tool, instrument_server
+from tool_metrics import add_metrics_tool, MetricsExporter
+from profiling import add_profiling_tools
 from trends import (
     get_trend_score_with_fallback,
+    get_trend_scores_with_fallback,
+    get_trend_momentum,
     get_top_trending_topics,
-    fetch_all_ai_trends,
+    search_trending_topics,
+    get_trends_timestamp,
     AI_KEYWORDS
 )
-import json
+from serialization import dumps
 
 # Create the MCP server
 mcp = FastMCP("AI Trends Server")
+add_metrics_tool(mcp)
+add_profiling_tools(mcp)
+
+# Sampled collections needed before momentum overrides the fixed score thresholds
+MIN_MOMENTUM_SAMPLES = 3
 
-@mcp.tool()
+@traced_tool(mcp, offload=True)
 def get_trend_score(topic: str) -> str:
     """Get trend score for a specific AI topic"""
     score = get_trend_score_with_fallback(topic)
     return f"Trend score for '{topic}': {score:.2f}/100"
 
-@mcp.tool()
+@traced_tool(mcp, offload=True)
 def get_trending_ai_topics(limit: int = 10) -> str:
     """Get top trending AI topics with scores and sources"""
     try:
@@ -33,24 +50,23 @@ def get_trending_ai_topics(limit: int = 10) -> str:
             }
             for trend in trending
         ]
-        return json.dumps(results, indent=2)
+        return dumps(results)
     except Exception as e:
-        return f"Error fetching trending topics: {e}"
+        return dumps({"error": f"Failed to fetch trending topics: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp)
 def get_ai_keywords() -> str:
     """Get the list of AI keywords being tracked"""
-    return json.dumps({
+    return dumps({
         "keywords": AI_KEYWORDS,
         "total_count": len(AI_KEYWORDS),
         "description": "AI-related keywords and phrases being monitored for trends"
-    }, indent=2)
+    })
 
-@mcp.tool()
+@traced_tool(mcp, offload=True)
 def search_trending_by_keyword(keyword: str, limit: int = 5) -> str:
     """Search for trending topics containing a specific keyword"""
     try:
-        all_trends = get_top_trending_topics(50)  # fetch larger pool
         matching_trends = [
             {
                 "topic": trend.topic,
@@ -58,17 +74,17 @@ def search_trending_by_keyword(keyword: str, limit: int = 5) -> str:
                 "sources": trend.sources,
                 "timestamp": trend.timestamp
             }
-            for trend in all_trends if keyword.lower() in trend.topic.lower()
-        ][:limit]
-        return json.dumps({
+            for trend in search_trending_topics(keyword, limit, pool=50)
+        ]
+        return dumps({
             "keyword": keyword,
             "matching_trends": matching_trends,
             "count": len(matching_trends)
-        }, indent=2)
+        })
     except Exception as e:
-        return f"Error searching trends by keyword: {e}"
+        return dumps({"error": f"Failed to search trends by keyword: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp, offload=True)
 def get_trend_sources_breakdown() -> str:
     """Get breakdown of trend data sources and their contributions"""
     try:
@@ -95,15 +111,15 @@ def get_trend_sources_breakdown() -> str:
             else:
                 source_stats[src]["average"] = 0
 
-        return json.dumps({
+        return dumps({
             "source_breakdown": source_stats,
             "total_trending_topics": len(trending),
             "description": "Breakdown of trend data sources and their contributions"
-        }, indent=2)
+        })
     except Exception as e:
-        return f"Error getting source breakdown: {e}"
+        return dumps({"error": f"Failed to get source breakdown: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp, offload=True)
 def evaluate_content_opportunity(topic: str, platform: str) -> str:
     """Evaluate a content opportunity based on trend score and platform fit"""
     try:
@@ -126,50 +142,60 @@ def evaluate_content_opportunity(topic: str, platform: str) -> str:
         else:
             recommendation = "SKIP - Low trend score, better opportunities available"
 
-        trends_cache = fetch_all_ai_trends()
-        timestamp = "unknown"
-        if trends_cache:
-            timestamp = next(iter(trends_cache.values())).timestamp
+        timestamp = get_trends_timestamp() or "unknown"
 
-        return json.dumps({
+        return dumps({
             "topic": topic,
             "platform": platform,
             "raw_trend_score": round(score, 2),
             "platform_adjusted_score": round(adjusted_score, 2),
             "recommendation": recommendation,
             "evaluation_timestamp": timestamp
-        }, indent=2)
+        })
     except Exception as e:
-        return f"Error evaluating content opportunity: {e}"
+        return dumps({"error": f"Failed to evaluate content opportunity: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp, offload=True)
 def get_content_timing_recommendation(topic: str) -> str:
     """Get timing recommendation for content creation based on trend analysis"""
     try:
         score = get_trend_score_with_fallback(topic)
-        if score >= 80:
+
+        # With enough history, judge the trend by where it is heading in the next day
+        momentum = get_trend_momentum([topic]).get(topic)
+        outlook = score
+        if momentum and momentum["samples"] >= MIN_MOMENTUM_SAMPLES:
+            outlook = min(100, max(0, score + momentum["velocity"] * 24))
+
+        if momentum and momentum["samples"] >= MIN_MOMENTUM_SAMPLES and momentum["velocity"] < 0 and score >= 40 > outlook:
+            timing = "LATE - Trend is cooling quickly, only publish if you can ship within hours"
+        elif outlook >= 80:
             timing = "URGENT - Create within 2-4 hours while trend is hot"
-        elif score >= 60:
+        elif outlook >= 60:
             timing = "SOON - Create within 24 hours to capitalize on trend"
-        elif score >= 40:
+        elif outlook >= 40:
             timing = "NORMAL - Create within 2-3 days, trend is stable"
-        elif score >= 25:
+        elif outlook >= 25:
             timing = "FLEXIBLE - No urgency, can schedule when convenient"
         else:
             timing = "LOW PRIORITY - Consider skipping or saving for later"
 
-        urgency = "high" if score >= 70 else "medium" if score >= 40 else "low"
+        urgency = "high" if outlook >= 70 else "medium" if outlook >= 40 else "low"
 
-        return json.dumps({
+        result = {
             "topic": topic,
             "trend_score": round(score, 2),
             "timing_recommendation": timing,
             "urgency_level": urgency
-        }, indent=2)
+        }
+        if momentum:
+            result["projected_score_24h"] = round(outlook, 2)
+            result["momentum"] = {k: round(v, 4) if isinstance(v, float) else v for k, v in momentum.items()}
+        return dumps(result)
     except Exception as e:
-        return f"Error getting timing recommendation: {e}"
+        return dumps({"error": f"Failed to get timing recommendation: {e}"})
 
-@mcp.tool()
+@traced_tool(mcp, offload=True)
 def compare_topic_trends(topics: list) -> str:
     """Compare trend scores for multiple topics"""
     try:
@@ -178,21 +204,55 @@ def compare_topic_trends(topics: list) -> str:
             topics = ast.literal_eval(topics)
 
         comparisons = [
-            {"topic": t, "score": round(get_trend_score_with_fallback(t), 2)}
-            for t in topics
+            {"topic": t, "score": round(score, 2)}
+            for t, score in zip(topics, get_trend_scores_with_fallback(topics))
         ]
         comparisons.sort(key=lambda x: x["score"], reverse=True)
 
-        return json.dumps({
+        return dumps({
             "topic_comparison": comparisons,
             "top_topic": comparisons[0]["topic"] if comparisons else None,
             "score_range": {
                 "highest": comparisons[0]["score"] if comparisons else 0,
                 "lowest": comparisons[-1]["score"] if comparisons else 0
             }
-        }, indent=2)
+        })
+    except Exception as e:
+        return dumps({"error": f"Failed to compare topics: {e}"})
+
+@traced_tool(mcp, offload=True)
+def score_topics_batch(topics: list, limit: int = 0) -> str:
+    """Score many candidate topics in one call and return them ranked by trend score"""
+    try:
+        if isinstance(topics, str):
+            import ast
+            topics = ast.literal_eval(topics)
+
+        scores = get_trend_scores_with_fallback(topics)
+        ranked = sorted(
+            ({"topic": t, "score": round(score, 2)} for t, score in zip(topics, scores)),
+            key=lambda x: x["score"],
+            reverse=True
+        )
+        if limit > 0:
+            ranked = ranked[:limit]
+
+        return dumps({
+            "ranked_topics": ranked,
+            "scored_count": len(topics)
+        })
+    except Exception as e:
+        return dumps({"error": f"Failed to score topics: {e}"})
+
+def prefetch_trends() -> None:
+    """Load today's trends, crawling the sources if they aren't stored yet"""
+    try:
+        get_trends_timestamp()
     except Exception as e:
-        return f"Error comparing topics: {e}"
+        print(f"Error prefetching trends: {e}", file=sys.stderr)
 
 if __name__ == "__main__":
+    instrument_server()
+    MetricsExporter(mcp.name).start()
+    threading.Thread(target=prefetch_trends, name="trends-prefetch", daemon=True).start()
     mcp.run(transport='stdio')